@@ -4,13 +4,29 @@
 import pygame
 import random
 import math
-from game_assets import WHITE, BLACK, RED, GREEN
+from game_assets import WHITE, BLACK, RED, GREEN, register_gradient
 from enemy_data import get_enemy_by_type
 
 # 画面サイズ定数
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 
+# ダメージ演出（animation_frame）の進む速さ（フレーム/秒）
+ANIMATION_FPS = 60
+
+def _battle_background_color(y, height):
+    """バトル背景のグラデーション色"""
+    color_value = 20 + int((y / height) * 30)
+    return (color_value // 2, color_value // 2, color_value)
+
+def _battle_message_box_color(y, height):
+    """メッセージボックスのグラデーション色"""
+    color_val = 50 + int(y / 2)
+    return (color_val // 2, color_val // 2, color_val)
+
+register_gradient("battle_background", _battle_background_color)
+register_gradient("battle_message_box", _battle_message_box_color)
+
 class BattleSystem:
     def __init__(self, player, party, assets):
         self.player = player
@@ -26,6 +42,8 @@ class BattleSystem:
         self.battle_log = []
         self.party_skill_mode = False
         self.selected_party_member = None
+        self.dirty_rects = []  # 直前のdrawで変化した矩形
+        self._last_view = None
         
     def start_battle(self, enemy_type="normal"):
         """バトルを開始する"""
@@ -178,10 +196,14 @@ class BattleSystem:
             # 敵の攻撃ターンへ
             self.state = "enemy_turn"
             
-    def update(self):
-        """バトル状態の更新"""
+    def update(self, dt):
+        """バトル状態をdt秒進める"""
         if self.state == "enemy_turn":
             self.enemy_attack()
+            
+        # ダメージ演出のフレームを経過時間で進める
+        if self.animation_frame > 0:
+            self.animation_frame = max(0, self.animation_frame - dt * ANIMATION_FPS)
         
         # アニメーションフレームが0になったら次の状態に進む
         if self.animation_frame <= 0 and self.state == "enemy_damage":
@@ -190,24 +212,33 @@ class BattleSystem:
             else:
                 self.state = "enemy_turn"
             
+    def is_animating(self):
+        """入力を待たずに画面が変化する状態か（敵のターン・ダメージ演出中）"""
+        return self.animation_frame > 0 or self.state in ("enemy_turn", "enemy_damage")
+        
     def draw(self, screen):
         """バトル画面を描画"""
         # 背景（グラデーション）
-        for y in range(SCREEN_HEIGHT):
-            color_value = 20 + int((y / SCREEN_HEIGHT) * 30)
-            color = (color_value // 2, color_value // 2, color_value)
-            pygame.draw.line(screen, color, (0, y), (SCREEN_WIDTH, y))
+        screen.blit(self.assets.get_gradient("battle_background", SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0))
             
         # 敵の描画
         enemy_img = self.assets.get_image("enemy")
         enemy_x = SCREEN_WIDTH // 2 - enemy_img.get_width() // 2
         enemy_y = 150
         
+        # 変化した範囲を報告（メッセージやログが変われば全体、点滅中は敵の画像のみ）
+        view = (self.state, self.message, tuple(self.battle_log))
+        if view != self._last_view:
+            self.dirty_rects = [screen.get_rect()]
+            self._last_view = view
+        else:
+            self.dirty_rects = []
+            
         # 敵のアニメーション（ダメージ時に点滅）
         if self.animation_frame > 0 and self.state == "enemy_damage":
-            if self.animation_frame % 4 < 2:  # 点滅効果
+            if int(self.animation_frame) % 4 < 2:  # 点滅効果
                 screen.blit(enemy_img, (enemy_x, enemy_y))
-            self.animation_frame -= 1
+            self.dirty_rects.append(enemy_img.get_rect(topleft=(enemy_x, enemy_y)))
         else:
             screen.blit(enemy_img, (enemy_x, enemy_y))
             
@@ -304,10 +335,8 @@ class BattleSystem:
         # メッセージボックス（装飾付き）
         message_box = pygame.Rect(50, 50, 700, 80)
         # グラデーション背景
-        for y in range(80):
-            color_val = 50 + int(y / 2)
-            color = (color_val // 2, color_val // 2, color_val)
-            pygame.draw.line(screen, color, (50, 50 + y), (750, 50 + y))
+        screen.blit(self.assets.get_gradient("battle_message_box", message_box.width, message_box.height),
+                    message_box.topleft)
             
         pygame.draw.rect(screen, WHITE, message_box, 2)
         
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+# 画面なしで描画する
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from game_assets import GameAssets
+
+# アセットを画面のピクセル形式に変換する効果のベンチマーク（python benchmark_assets.py）
+# 全画像を20回ずつblitする時間を、変換の前後で比べる
+
+if __name__ == "__main__":
+    pygame.init()
+    pygame.display.set_mode((800, 600))
+    assets = GameAssets()
+    stats = assets.finalize_display_format(measure=True)
+    print(f"Converted {stats['images']} images "
+          f"(opaque {stats['opaque']}, colorkey {stats['colorkey']}, alpha {stats['alpha']})")
+    print(f"  blit all images x20  {stats['blit_ms_before']:8.2f} ms -> {stats['blit_ms_after']:8.2f} ms")
+    pygame.quit()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import map_generator
+from map_generator import generate_world_tiles
+
+# マップ生成のマイクロベンチマーク（python benchmark_map_generation.py）
+# numpyを使う場合と、1マスずつ計算する場合（numpyが無い環境と同じ処理）を比べる
+
+def bench(label, size, seed, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tiles = generate_world_tiles(size, size, seed)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<12} {elapsed:9.2f} ms")
+    return tiles
+
+def run(size, seed, repeat, compare=True):
+    print(f"World {size}x{size} (seed: {seed})")
+    vectorized = bench("numpy", size, seed, repeat)
+    if not compare:
+        return
+    numpy = map_generator.numpy
+    map_generator.numpy = None
+    try:
+        per_tile = bench("per tile", size, seed, 1)
+    finally:
+        map_generator.numpy = numpy
+    print(f"  identical: {vectorized == per_tile}")
+
+if __name__ == "__main__":
+    run(50, None, 100)
+    run(500, 1, 5)
+    # 1マスずつの計算は時間がかかるため、2000x2000はnumpyのみ
+    run(2000, None, 3, compare=False)
+    run(2000, 1, 3, compare=False)
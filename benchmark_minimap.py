@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import time
+
+# 画面なしで描画する
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from game_map import GameMap, TILE_GRASS, TILE_WATER
+from map_generator import generate_world_tiles
+
+# ミニマップのマイクロベンチマーク（python benchmark_minimap.py）
+# 最初の作成、タイルを1枚ずつ変えたときの書き直し、全体図の拡大縮小にかかる時間を測る
+
+def run(size, changes=1000, repeat=20):
+    game_map = GameMap("Benchmark", size, size, generate=False)
+    game_map.tiles = generate_world_tiles(size, size, 1)
+    
+    start = time.perf_counter()
+    minimap = game_map.get_minimap()
+    minimap.update()
+    build = (time.perf_counter() - start) * 1000
+    
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(changes):
+        game_map.set_tile(rng.randrange(size), rng.randrange(size), rng.choice((TILE_GRASS, TILE_WATER)))
+        minimap.update()
+    patch = (time.perf_counter() - start) / changes * 1000
+    
+    start = time.perf_counter()
+    for index in range(repeat):
+        # 毎回大きさを変えてキャッシュを使わずに拡大縮小する
+        minimap.get_view(0, 0, size, size, (680 - index, 480))
+    overview = (time.perf_counter() - start) / repeat * 1000
+    
+    print(f"Map {size}x{size} (1 pixel = {minimap.scale}x{minimap.scale} tiles, {minimap.width}x{minimap.height} pixels)")
+    print(f"  build          {build:9.2f} ms")
+    print(f"  patch 1 tile   {patch:9.3f} ms")
+    print(f"  overview view  {overview:9.2f} ms")
+
+if __name__ == "__main__":
+    run(50)
+    run(1000)
+    run(4000)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import random
+
+# 画面なしでマップを生成する
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from tile_grid import TileGrid
+from game_map import GameMap, MapManager, TILE_GRASS, TILE_WALL, MAP_WORLD
+from pathfinding import find_path_astar, find_path_jps
+
+# 経路探索のマイクロベンチマーク（python benchmark_pathfinding.py）
+
+def make_synthetic_map(size, seed=1):
+    """壁の線分をランダムに置いた size x size のマップ"""
+    rng = random.Random(seed)
+    game_map = GameMap("Synthetic", size, size, MAP_WORLD, generate=False)
+    tiles = TileGrid(size, size, TILE_GRASS)
+    for _ in range(size * size // 200):
+        x, y = rng.randrange(size), rng.randrange(size)
+        if rng.random() < 0.5:
+            tiles.fill_region(x, y, rng.randint(5, 40), 1, TILE_WALL)
+        else:
+            tiles.fill_region(x, y, 1, rng.randint(5, 40), TILE_WALL)
+    tiles.fill_region(0, 0, 2, 2, TILE_GRASS)
+    tiles.fill_region(size - 2, size - 2, 2, 2, TILE_GRASS)
+    game_map.tiles = tiles
+    return game_map
+
+def bench(label, function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    length = len(result) - 1 if result else None
+    print(f"  {label:<24} {elapsed:9.2f} ms  (path length: {length})")
+
+def run(game_map, start, goal, repeat):
+    walkable = game_map.get_walkable_grid()
+    print(f"{game_map.name} ({game_map.width}x{game_map.height}) {start} -> {goal}")
+    bench("A*", lambda: find_path_astar(walkable, game_map.width, game_map.height, start, goal), repeat)
+    bench("Jump point search", lambda: find_path_jps(walkable, game_map.width, game_map.height, start, goal), repeat)
+    game_map.path_finder.clear()
+    game_map.find_path(start, goal)
+    bench("PathFinder (cached)", lambda: game_map.find_path(start, goal), repeat * 100)
+
+if __name__ == "__main__":
+    world = MapManager().get_map("AWS Cloud World")
+    run(world, (29, 36), (10, 10), 50)
+    run(make_synthetic_map(1000), (0, 0), (999, 999), 1)
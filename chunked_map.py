@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+from tile_grid import TileGrid
+
+# ストリーミングするチャンクの大きさ（タイル数）
+MAP_CHUNK_SIZE = 32
+
+# カメラの外に先読みしておくチャンク数
+MAP_CHUNK_PREFETCH = 1
+
+class ChunkRow:
+    """ChunkedTileGridの1行（tiles[y][x] で読み書きするためのビュー）"""
+        
+    def __init__(self, grid, y):
+        self.grid = grid
+        self.y = y
+        
+    def __len__(self):
+        return self.grid.width
+        
+    def __getitem__(self, x):
+        return self.grid.get(x, self.y)
+        
+    def __setitem__(self, x, tile_type):
+        self.grid.set(x, self.y, tile_type)
+        
+    def __iter__(self):
+        return iter(self.grid.row(self.y))
+
+class ChunkedTileGrid:
+    """チャンク単位で必要になったときに読み込むタイルグリッド（TileGridと同じ読み書きができる）"""
+        
+    def __init__(self, width, height, load_chunk, chunk_size=MAP_CHUNK_SIZE):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.load_chunk = load_chunk  # load_chunk(chunk_x, chunk_y, width, height) -> TileGrid
+        self.chunks = OrderedDict()   # 読み込み済みのチャンク（最近使った順）
+        self.modified = {}            # 書き換え後に破棄したチャンクの内容
+        self.dirty = set()
+        self.on_load = None           # チャンクを読み込んだときに呼ぶ関数
+        self.stats = {"loads": 0, "evictions": 0}
+        
+    def get_chunk(self, chunk_x, chunk_y):
+        """チャンクを取得（未読み込みなら読み込む）"""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+        
+        start_x = chunk_x * self.chunk_size
+        start_y = chunk_y * self.chunk_size
+        width = min(self.chunk_size, self.width - start_x)
+        height = min(self.chunk_size, self.height - start_y)
+        if key in self.modified:
+            chunk = TileGrid(width, height, data=bytearray(self.modified.pop(key)))
+            self.dirty.add(key)
+        else:
+            chunk = self.load_chunk(chunk_x, chunk_y, width, height)
+        self.chunks[key] = chunk
+        self.stats["loads"] += 1
+        if self.on_load:
+            self.on_load(chunk_x, chunk_y)
+        return chunk
+        
+    def is_loaded(self, chunk_x, chunk_y):
+        return (chunk_x, chunk_y) in self.chunks
+        
+    def evict(self, chunk_x, chunk_y):
+        """チャンクを破棄（書き換えた内容は次に読み込むときのために残す）"""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.pop(key, None)
+        if chunk is None:
+            return
+        if key in self.dirty:
+            self.modified[key] = bytes(chunk.data)
+            self.dirty.discard(key)
+        self.stats["evictions"] += 1
+        
+    def chunk_memory(self, chunk_x, chunk_y):
+        """読み込み済みチャンクのタイルデータのバイト数"""
+        chunk = self.chunks.get((chunk_x, chunk_y))
+        return len(chunk.data) if chunk is not None else 0
+        
+    def get(self, x, y):
+        chunk = self.get_chunk(x // self.chunk_size, y // self.chunk_size)
+        return chunk.get(x % self.chunk_size, y % self.chunk_size)
+        
+    def set(self, x, y, tile_type):
+        chunk_x, chunk_y = x // self.chunk_size, y // self.chunk_size
+        self.get_chunk(chunk_x, chunk_y).set(x % self.chunk_size, y % self.chunk_size, tile_type)
+        self.dirty.add((chunk_x, chunk_y))
+        
+    def row(self, y, start=0, end=None):
+        """y行目の start～end のタイル（bytes、必要なチャンクを読み込む）"""
+        end = self.width if end is None else end
+        chunk_y, local_y = divmod(y, self.chunk_size)
+        parts = []
+        x = start
+        while x < end:
+            chunk_x, local_x = divmod(x, self.chunk_size)
+            count = min(end - x, self.chunk_size - local_x)
+            parts.append(self.get_chunk(chunk_x, chunk_y).row(local_y, local_x, local_x + count))
+            x += count
+        return b"".join(parts)
+        
+    def __len__(self):
+        return self.height
+        
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("tile row out of range")
+        return ChunkRow(self, y)
+        
+    def __iter__(self):
+        for y in range(self.height):
+            yield self[y]
+        
+    def find_all(self, *tile_types):
+        """読み込み済みのチャンクにある指定タイルの座標 (x, y) を行優先の順で取得"""
+        found = []
+        for (chunk_x, chunk_y), chunk in self.chunks.items():
+            offset_x = chunk_x * self.chunk_size
+            offset_y = chunk_y * self.chunk_size
+            found.extend((offset_x + x, offset_y + y) for x, y in chunk.find_all(*tile_types))
+        found.sort(key=lambda position: (position[1], position[0]))
+        return found
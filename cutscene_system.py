@@ -4,11 +4,57 @@
 import pygame
 import random
 import math
+from game_assets import register_gradient
 
 # 画面サイズ定数
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 
+def _office_background_color(y, height):
+    """オフィス - 暗い青から暗い灰色へ"""
+    color_value = 20 + int((y / height) * 30)
+    return (color_value, color_value, color_value + 10)
+
+def _light_background_color(y, height):
+    """光 - 白から青へ"""
+    color_value = 200 - int((y / height) * 50)
+    return (color_value, color_value, min(255, color_value + 50))
+
+def _aws_world_background_color(y, height):
+    """AWS世界 - 青から緑へ"""
+    color_value = 50 + int((y / height) * 100)
+    return (color_value // 2, color_value, color_value)
+
+def _battle_background_color(y, height):
+    """バトル - 赤から黒へ"""
+    color_value = 100 - int((y / height) * 50)
+    return (color_value, color_value // 2, color_value // 2)
+
+def _default_background_color(y, height):
+    """デフォルト"""
+    color_value = 50 + int((y / height) * 50)
+    return (color_value // 2, color_value // 2, color_value)
+
+def _text_box_color(y, height):
+    """テキストボックスのグラデーション色"""
+    color_val = 0 + int(y / 2)
+    return (color_val, color_val, color_val)
+
+# 背景名ごとのグラデーション
+CUTSCENE_GRADIENTS = {
+    "office_bg": "cutscene_office_bg",
+    "light_bg": "cutscene_light_bg",
+    "aws_world_bg": "cutscene_aws_world_bg",
+    "battle_bg": "cutscene_battle_bg",
+}
+
+register_gradient("cutscene_office_bg", _office_background_color)
+register_gradient("cutscene_light_bg", _light_background_color)
+register_gradient("cutscene_aws_world_bg", _aws_world_background_color)
+register_gradient("cutscene_battle_bg", _battle_background_color)
+register_gradient("cutscene_default_bg", _default_background_color)
+register_gradient("cutscene_text_box", _text_box_color)
+
 class CutsceneSystem:
     def __init__(self, assets):
         self.assets = assets
@@ -18,9 +64,12 @@ class CutsceneSystem:
         self.scene_type = None  # "opening" または "ending"
         self.fade_alpha = 0
         self.fade_direction = 1  # 1: フェードイン, -1: フェードアウト
-        self.fade_speed = 5
+        self.fade_speed = 300  # アルファ値/秒
         self.text_display_progress = 0
-        self.text_speed = 2
+        self.text_speed = 120  # 文字/秒
+        self.dirty_rects = []  # 直前のdrawで変化した矩形
+        self._last_view = None
+        self._last_progress = None
         
         # 背景画像（仮の実装）
         self.backgrounds = {
@@ -195,13 +244,13 @@ class CutsceneSystem:
             }
         ]
         
-    def update(self):
-        """カットシーンの状態を更新"""
+    def update(self, dt):
+        """カットシーンの状態をdt秒進める"""
         if not self.active:
             return False
             
         # フェードエフェクトの更新
-        self.fade_alpha += self.fade_direction * self.fade_speed
+        self.fade_alpha += self.fade_direction * self.fade_speed * dt
         if self.fade_alpha <= 0:
             self.fade_alpha = 0
             self.fade_direction = 0  # フェード停止
@@ -213,11 +262,17 @@ class CutsceneSystem:
         if self.fade_direction == 0:  # フェードが完了している場合
             current_text = self.scenes[self.current_scene]["text"]
             if self.text_display_progress < len(current_text):
-                self.text_display_progress += self.text_speed
+                self.text_display_progress += self.text_speed * dt
                 self.text_display_progress = min(self.text_display_progress, len(current_text))
                 
         return True
         
+    def is_animating(self):
+        """フェード中または文字送り中か"""
+        if not self.active or self.current_scene >= len(self.scenes):
+            return False
+        return self.fade_direction != 0 or self.text_display_progress < len(self.scenes[self.current_scene]["text"])
+        
     def next_scene(self):
         """次のシーンに進む"""
         if not self.active:
@@ -244,8 +299,8 @@ class CutsceneSystem:
             
         return True
         
-    def draw(self, screen):
-        """カットシーンを描画"""
+    def draw(self, screen, lag=0.0):
+        """カットシーンを描画（lagは最後の更新からの経過秒数。フェードと文字送りを補間する）"""
         if not self.active or self.current_scene >= len(self.scenes):
             return
             
@@ -255,30 +310,8 @@ class CutsceneSystem:
         bg_color = self.backgrounds.get(scene["background"], (0, 0, 0))
         
         # グラデーション背景
-        for y in range(600):
-            # 背景に応じたグラデーション
-            if scene["background"] == "office_bg":
-                # オフィス - 暗い青から暗い灰色へ
-                color_value = 20 + int((y / 600) * 30)
-                color = (color_value, color_value, color_value + 10)
-            elif scene["background"] == "light_bg":
-                # 光 - 白から青へ
-                color_value = 200 - int((y / 600) * 50)
-                color = (color_value, color_value, min(255, color_value + 50))
-            elif scene["background"] == "aws_world_bg":
-                # AWS世界 - 青から緑へ
-                color_value = 50 + int((y / 600) * 100)
-                color = (color_value // 2, color_value, color_value)
-            elif scene["background"] == "battle_bg":
-                # バトル - 赤から黒へ
-                color_value = 100 - int((y / 600) * 50)
-                color = (color_value, color_value // 2, color_value // 2)
-            else:
-                # デフォルト
-                color_value = 50 + int((y / 600) * 50)
-                color = (color_value // 2, color_value // 2, color_value)
-                
-            pygame.draw.line(screen, color, (0, y), (800, y))
+        gradient = CUTSCENE_GRADIENTS.get(scene["background"], "cutscene_default_bg")
+        screen.blit(self.assets.get_gradient(gradient, SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0))
             
         # 背景の装飾
         if scene["background"] == "office_bg":
@@ -332,12 +365,8 @@ class CutsceneSystem:
         # テキストボックス（装飾付き）
         text_box = pygame.Rect(50, screen.get_height() - 150, screen.get_width() - 100, 100)
         # グラデーション背景
-        for y in range(100):
-            color_val = 0 + int(y / 2)
-            color = (color_val, color_val, color_val, 180)
-            pygame.draw.line(screen, color, 
-                           (50, screen.get_height() - 150 + y), 
-                           (screen.get_width() - 50, screen.get_height() - 150 + y))
+        screen.blit(self.assets.get_gradient("cutscene_text_box", text_box.width, text_box.height),
+                    text_box.topleft)
             
         pygame.draw.rect(screen, (255, 255, 255), text_box, 2)
         
@@ -351,12 +380,17 @@ class CutsceneSystem:
         
         # テキスト（徐々に表示）
         full_text = scene["text"]
-        display_text = full_text[:int(self.text_display_progress)]
+        progress = self.text_display_progress
+        if self.fade_direction == 0 and progress < len(full_text):
+            progress = min(progress + self.text_speed * lag, len(full_text))
+        progress = int(progress)
         
-        # テキストを複数行に分割
-        lines = self._wrap_text(display_text, 50)
-        for i, line in enumerate(lines):
-            text_surf = self.assets.render_text(line, "normal", (255, 255, 255))
+        # 全文で一度だけ折り返しを決め、表示済みの部分だけを描画する（表示途中で行が組み変わらない）
+        spans = self.assets.text_layout.get_line_spans(full_text, "normal", text_box.width - 40)
+        for i, (start, end) in enumerate(spans):
+            if start >= progress:
+                break
+            text_surf = self.assets.render_text(full_text[start:min(end, progress)], "normal", (255, 255, 255))
             screen.blit(text_surf, (70, screen.get_height() - 130 + i * 30))
         
         # 続行指示（テキストが全て表示された場合のみ）
@@ -366,30 +400,21 @@ class CutsceneSystem:
                                       screen.get_height() - 70))
         
         # フェードエフェクト
-        if self.fade_alpha > 0:
-            fade_surface = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
-            fade_surface.fill((0, 0, 0, self.fade_alpha))
-            screen.blit(fade_surface, (0, 0))
-            
-    def _wrap_text(self, text, chars_per_line):
-        """テキストを指定した文字数で折り返す"""
-        words = text.split(' ')
-        lines = []
-        current_line = ""
+        fade_alpha = int(max(0, min(255, self.fade_alpha + self.fade_direction * self.fade_speed * lag)))
+        if fade_alpha > 0:
+            screen.blit(self.assets.get_overlay(screen.get_width(), screen.get_height(), (0, 0, 0), fade_alpha), (0, 0))
         
-        for word in words:
-            test_line = current_line + word + " "
-            if len(test_line) > chars_per_line:
-                lines.append(current_line)
-                current_line = word + " "
-            else:
-                current_line = test_line
-                
-        if current_line:
-            lines.append(current_line)
+        # 変化した範囲を報告（シーン切り替え・フェード中は全体、文字送り中はテキストボックスのみ）
+        view = (self.current_scene, fade_alpha)
+        if view != self._last_view:
+            self.dirty_rects = [screen.get_rect()]
+        elif progress != self._last_progress:
+            self.dirty_rects = [text_box]
+        else:
+            self.dirty_rects = []
+        self._last_view = view
+        self._last_progress = progress
             
-        return lines
-        
     def handle_event(self, event):
         """イベント処理"""
         if not self.active:
@@ -13,7 +13,7 @@ clock = pygame.time.Clock()
 
 # マップマネージャーの初期化
 map_manager = MapManager()
-computing_town = map_manager.maps["Computing Town"]
+computing_town = map_manager.get_map("Computing Town")
 
 # デバッグ情報の表示
 print("Computing Town NPCs:")
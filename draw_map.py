@@ -1,3 +1,6 @@
+from game_assets import get_animation_frame, PORTAL_ANIMATION_FRAMES, PORTAL_PULSE_PERIOD
+from game_map import TILE_PORTAL, get_tile_image
+
 def draw_map(self):
     """マップを描画"""
     # 表示範囲の計算
@@ -16,6 +19,7 @@ def draw_map(self):
     # タイルの描画
     start_x = self.camera_x // tile_size
     start_y = self.camera_y // tile_size
+    portal_frame = get_animation_frame(pygame.time.get_ticks(), PORTAL_PULSE_PERIOD, PORTAL_ANIMATION_FRAMES)
     
     for y in range(start_y, start_y + visible_tiles_y):
         for x in range(start_x, start_x + visible_tiles_x):
@@ -25,76 +29,22 @@ def draw_map(self):
                 screen_x = x * tile_size - self.camera_x
                 screen_y = y * tile_size - self.camera_y
                 
-                # タイルタイプに応じた画像を描画
-                if tile_type == 0:  # 空
-                    # 空のタイルには床を描画（黒いタイルを防ぐため）
-                    self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                elif tile_type == 1:  # 床
-                    self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                elif tile_type == 2:  # 壁
-                    self.screen.blit(self.assets.get_image("wall"), (screen_x, screen_y))
-                elif tile_type == 3:  # 草
-                    self.screen.blit(self.assets.get_image("grass"), (screen_x, screen_y))
-                elif tile_type == 4:  # 水
-                    self.screen.blit(self.assets.get_image("water"), (screen_x, screen_y))
-                elif tile_type == 5:  # 道
-                    self.screen.blit(self.assets.get_image("road"), (screen_x, screen_y))
-                elif tile_type == 6:  # ドア
-                    self.screen.blit(self.assets.get_image("door"), (screen_x, screen_y))
-                elif tile_type == 7:  # NPC
-                    self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                    self.screen.blit(self.assets.get_image("npc"), (screen_x, screen_y))
-                elif tile_type == 8:  # ポータル
-                    self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                    
-                    # ポータルアニメーション効果
-                    current_time = pygame.time.get_ticks()
-                    pulse = (math.sin(current_time / 300) + 1) / 2  # 0～1の間で脈動
-                    
-                    # ポータルの拡大縮小効果
-                    scale_factor = 1.0 + pulse * 0.2  # 1.0～1.2の間でサイズ変動
-                    portal_img = self.assets.get_image("portal")
-                    
-                    # 拡大したポータル画像を作成
-                    scaled_size = int(tile_size * scale_factor)
-                    offset = (scaled_size - tile_size) // 2
-                    
-                    # 拡大したポータルを中央に配置
+                # タイルタイプに応じた合成済み画像を描画
+                self.screen.blit(get_tile_image(self.assets, tile_type), (screen_x, screen_y))
+                
+                if tile_type == TILE_PORTAL:
+                    # 共通の時計から求めたフレームの拡大済みポータルを中央に配置
+                    portal_img, offset = self.assets.get_portal_frames()[portal_frame]
                     self.screen.blit(portal_img, (screen_x - offset, screen_y - offset))
                     
-                    # ポータルの上に町の名前を表示
+                    # ポータルの上に町の名前を表示（明るさ違いのラベルをキャッシュから取得）
                     portal = self.map_manager.current_map.get_portal_at(x, y)
                     if portal and "destination" in portal:
-                        # 名前の色をアニメーション（明るさを変化）
-                        name_brightness = int(200 + 55 * pulse)  # 200～255の間で明るさ変動
-                        name_color = (name_brightness, name_brightness, name_brightness)
-                        
-                        town_name = self.assets.render_text(portal["destination"], "small", name_color)
-                        # 名前を中央に配置
-                        name_x = screen_x + (tile_size - town_name.get_width()) // 2
-                        name_y = screen_y - 20  # タイルの上に表示（少し上げる）
-                        
-                        # 背景を少し暗くして読みやすくする
-                        name_bg = pygame.Surface((town_name.get_width() + 8, town_name.get_height() + 4))
-                        name_bg.fill((0, 0, 50))
-                        name_bg.set_alpha(150)  # 半透明
-                        self.screen.blit(name_bg, (name_x - 4, name_y - 2))
-                        self.screen.blit(town_name, (name_x, name_y))
-                elif tile_type == 9:  # ショップ
-                    self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                    self.screen.blit(self.assets.get_image("shop"), (screen_x, screen_y))
-                elif tile_type == 10:  # 山
-                    self.screen.blit(self.assets.get_image("mountain"), (screen_x, screen_y))
-                elif tile_type == 11:  # 森
-                    self.screen.blit(self.assets.get_image("forest"), (screen_x, screen_y))
-                elif tile_type == 12:  # 砂
-                    self.screen.blit(self.assets.get_image("sand"), (screen_x, screen_y))
-                else:  # 未定義のタイルタイプ
-                    # デフォルトで床を表示
-                    self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
+                        name_label = self.assets.get_portal_label(portal["destination"], portal_frame)
+                        self.screen.blit(name_label, (screen_x + (tile_size - name_label.get_width()) // 2, screen_y - 22))
     
-    # NPCの描画
-    for npc in self.map_manager.current_map.npcs:
+    # NPCの描画（空間ハッシュから表示範囲付近のNPCだけを取り出す）
+    for npc in self.map_manager.current_map.get_npcs_in_rect(start_x - 1, start_y - 1, visible_tiles_x + 1, visible_tiles_y + 1):
         npc_x = npc["x"] * tile_size - self.camera_x
         npc_y = npc["y"] * tile_size - self.camera_y
         
@@ -126,7 +76,7 @@ def draw_map(self):
             self.screen.blit(npc_name, (name_x, name_y))
     
     # ショップの描画
-    for shop in self.map_manager.current_map.shops:
+    for shop in self.map_manager.current_map.get_shops_in_rect(start_x - 1, start_y - 1, visible_tiles_x + 1, visible_tiles_y + 1):
         shop_x = shop["x"] * tile_size - self.camera_x
         shop_y = shop["y"] * tile_size - self.camera_y
         
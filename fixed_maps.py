@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import math
 import random
+from tile_grid import TileGrid
+from map_generator import generate_world_tiles, place_building, region_contains
 
 # Tile type constants
 TILE_EMPTY = 0
@@ -36,169 +37,8 @@ def get_world_map():
     # Create a 50x50 map
     width = 50
     height = 50
-    tiles = [[TILE_GRASS for _ in range(width)] for _ in range(height)]
-    
-    # Surround with walls
-    for x in range(width):
-        tiles[0][x] = TILE_WALL
-        tiles[height-1][x] = TILE_WALL
-    for y in range(height):
-        tiles[y][0] = TILE_WALL
-        tiles[y][width-1] = TILE_WALL
-    
-    # 固定の地形パターン
-    
-    # 中央に大きな湖（固定形状）
-    for y in range(20, 30):
-        for x in range(15, 35):
-            # 円形の湖
-            if (x - 25) ** 2 + (y - 25) ** 2 <= 100:
-                tiles[y][x] = TILE_WATER
-    
-    # 北側に山脈（固定パターン）
-    for y in range(5, 15):
-        for x in range(10, 40):
-            if (x + y) % 3 == 0 or (x - y) % 5 == 0:
-                tiles[y][x] = TILE_MOUNTAIN
-    
-    # 南側に森（固定パターン）
-    for y in range(35, 45):
-        for x in range(10, 40):
-            if (x * y) % 7 == 0 or (x + y) % 8 == 0:
-                tiles[y][x] = TILE_FOREST
-    
-    # 東側に砂漠（固定領域）
-    for y in range(15, 35):
-        for x in range(35, 45):
-            tiles[y][x] = TILE_SAND
-    
-    # 道路ネットワーク（固定パターン）
-    # 中央の十字路 - プレイヤーの初期位置
-    for x in range(1, width-1):
-        tiles[25][x] = TILE_ROAD
-    
-    for y in range(1, height-1):
-        tiles[y][25] = TILE_ROAD
-    
-    # 中央周辺の安全地帯（プレイヤーの初期位置の周り）
-    for y in range(23, 28):
-        for x in range(23, 28):
-            tiles[y][x] = TILE_ROAD
-    
-    # 町への道路（直線）
-    # Computing Town (北西)
-    for x in range(10, 25):
-        tiles[10][x] = TILE_ROAD
-    for y in range(10, 25):
-        tiles[y][10] = TILE_ROAD
-    
-    # Storage Town (北東)
-    for x in range(25, 40):
-        tiles[10][x] = TILE_ROAD
-    for y in range(10, 25):
-        tiles[y][40] = TILE_ROAD
-    
-    # Database Town (南西)
-    for x in range(10, 25):
-        tiles[40][x] = TILE_ROAD
-    for y in range(25, 40):
-        tiles[y][10] = TILE_ROAD
-    
-    # Security Town (南東)
-    for x in range(25, 40):
-        tiles[40][x] = TILE_ROAD
-    for y in range(25, 40):
-        tiles[y][40] = TILE_ROAD
-    
-    # 町の位置（ポータル）
-    portal_positions = [
-        (10, 10),  # Computing Town (北西)
-        (40, 10),  # Storage Town (北東)
-        (10, 40),  # Database Town (南西)
-        (40, 40)   # Security Town (南東)
-    ]
-    
-    # ポータル周辺を整備（町への入口を確保）
-    for px, py in portal_positions:
-        # ポータルを設置
-        tiles[py][px] = TILE_PORTAL
-        
-        # ポータル周辺の安全地帯（3マス圏内）
-        for dy in range(-3, 4):
-            for dx in range(-3, 4):
-                nx, ny = px + dx, py + dy
-                if 1 <= nx < width - 1 and 1 <= ny < height - 1:
-                    # 山や森を除去し、草原に変更（ポータル自体は上書きしない）
-                    if tiles[ny][nx] in [TILE_MOUNTAIN, TILE_FOREST] and tiles[ny][nx] != TILE_PORTAL:
-                        tiles[ny][nx] = TILE_GRASS
-    
-    # 固定の地形特徴（装飾的な要素）
-    
-    # 小さな湖（北西）
-    for y in range(5, 10):
-        for x in range(5, 10):
-            if (x - 7) ** 2 + (y - 7) ** 2 <= 4:
-                tiles[y][x] = TILE_WATER
-    
-    # 小さな湖（北東）
-    for y in range(5, 10):
-        for x in range(40, 45):
-            if (x - 42) ** 2 + (y - 7) ** 2 <= 4:
-                tiles[y][x] = TILE_WATER
-    
-    # 小さな湖（南西）
-    for y in range(40, 45):
-        for x in range(5, 10):
-            if (x - 7) ** 2 + (y - 42) ** 2 <= 4:
-                tiles[y][x] = TILE_WATER
-    
-    # 小さな湖（南東）
-    for y in range(40, 45):
-        for x in range(40, 45):
-            if (x - 42) ** 2 + (y - 42) ** 2 <= 4:
-                tiles[y][x] = TILE_WATER
-    
-    # 森林クラスター（固定位置）- プレイヤーの初期位置（25,25）を避ける
-    forest_clusters = [
-        (15, 15, 3),  # (x, y, サイズ)
-        (35, 35, 4),
-        (15, 35, 3),
-        (35, 15, 4)
-    ]
-    
-    for cx, cy, size in forest_clusters:
-        for dy in range(-size, size + 1):
-            for dx in range(-size, size + 1):
-                x, y = cx + dx, cy + dy
-                if 1 <= x < width - 1 and 1 <= y < height - 1:
-                    # 中心からの距離
-                    distance = dx**2 + dy**2
-                    # 距離に応じてタイルを配置
-                    if distance <= size**2:
-                        # 道路や水、ポータルは上書きしない
-                        if tiles[y][x] not in [TILE_ROAD, TILE_WATER, TILE_PORTAL]:
-                            tiles[y][x] = TILE_FOREST
-    
-    # 山岳クラスター（固定位置）
-    mountain_clusters = [
-        (20, 10, 2),  # (x, y, サイズ)
-        (30, 10, 3),
-        (20, 40, 3),
-        (30, 40, 2)
-    ]
-    
-    for cx, cy, size in mountain_clusters:
-        for dy in range(-size, size + 1):
-            for dx in range(-size, size + 1):
-                x, y = cx + dx, cy + dy
-                if 1 <= x < width - 1 and 1 <= y < height - 1:
-                    # 中心からの距離
-                    distance = dx**2 + dy**2
-                    # 距離に応じてタイルを配置
-                    if distance <= size**2:
-                        # 道路や水、ポータルは上書きしない
-                        if tiles[y][x] not in [TILE_ROAD, TILE_WATER, TILE_PORTAL]:
-                            tiles[y][x] = TILE_MOUNTAIN
+    # 地形・道路・ポータルの配置（固定パターン。マスク単位でまとめて塗る）
+    tiles = generate_world_tiles(width, height)
     
     # ポータルデータ
     portals = [
@@ -254,6 +94,20 @@ def get_world_map():
         }
     ]
     
+    # イベントトリガー（同じタイルのポータルの後に実行される）
+    triggers = [
+        {
+            "x": 10,
+            "y": 10,
+            "on": "step",
+            "type": "quest",
+            "requires_town": "Computing Town",  # この町が発見済みのときだけ
+            "quest": "explore_computing_town",
+            "next_quest": "defeat_sql_injection",
+            "save": True
+        }
+    ]
+    
     # マップデータを辞書として返す
     return {
         "name": "AWS Cloud World",
@@ -263,6 +117,7 @@ def get_world_map():
         "portals": portals,
         "npcs": npcs,
         "shops": [],
+        "triggers": triggers,
         "encounter_rate": 0.03
     }
 
@@ -270,15 +125,10 @@ def get_computing_town_map():
     """Computing Town map data"""
     width = 30
     height = 30
-    tiles = [[TILE_FLOOR for _ in range(width)] for _ in range(height)]
+    tiles = TileGrid(width, height, TILE_FLOOR)
     
     # Surround with walls
-    for x in range(width):
-        tiles[0][x] = TILE_WALL
-        tiles[height-1][x] = TILE_WALL
-    for y in range(height):
-        tiles[y][0] = TILE_WALL
-        tiles[y][width-1] = TILE_WALL
+    tiles.fill_border(0, 0, width, height, TILE_WALL)
     
     # Main roads - wider and more natural
     center_x = width // 2
@@ -342,13 +192,7 @@ def get_computing_town_map():
     weapon_shop_w, weapon_shop_h = 5, 5
     
     # Create weapon shop building
-    for bx in range(weapon_shop_x, weapon_shop_x+weapon_shop_w):
-        for by in range(weapon_shop_y, weapon_shop_y+weapon_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == weapon_shop_x or bx == weapon_shop_x+weapon_shop_w-1 or by == weapon_shop_y or by == weapon_shop_y+weapon_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, weapon_shop_x, weapon_shop_y, weapon_shop_w, weapon_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to weapon shop
     door_x = weapon_shop_x + weapon_shop_w//2
@@ -365,13 +209,7 @@ def get_computing_town_map():
     armor_shop_w, armor_shop_h = 5, 5
     
     # Create armor shop building
-    for bx in range(armor_shop_x, armor_shop_x+armor_shop_w):
-        for by in range(armor_shop_y, armor_shop_y+armor_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == armor_shop_x or bx == armor_shop_x+armor_shop_w-1 or by == armor_shop_y or by == armor_shop_y+armor_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, armor_shop_x, armor_shop_y, armor_shop_w, armor_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to armor shop
     door_x = armor_shop_x + armor_shop_w//2
@@ -388,13 +226,7 @@ def get_computing_town_map():
     item_shop_w, item_shop_h = 5, 5
     
     # Create item shop building
-    for bx in range(item_shop_x, item_shop_x+item_shop_w):
-        for by in range(item_shop_y, item_shop_y+item_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == item_shop_x or bx == item_shop_x+item_shop_w-1 or by == item_shop_y or by == item_shop_y+item_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, item_shop_x, item_shop_y, item_shop_w, item_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to item shop
     door_x = item_shop_x + item_shop_w//2
@@ -411,13 +243,7 @@ def get_computing_town_map():
     inn_w, inn_h = 6, 6
     
     # Create inn building
-    for bx in range(inn_x, inn_x+inn_w):
-        for by in range(inn_y, inn_y+inn_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == inn_x or bx == inn_x+inn_w-1 or by == inn_y or by == inn_y+inn_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, inn_x, inn_y, inn_w, inn_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to inn
     door_x = inn_x + inn_w//2
@@ -438,13 +264,7 @@ def get_computing_town_map():
     
     for x, y, w, h in service_buildings:
         # Create building
-        for bx in range(x, x+w):
-            for by in range(y, y+h):
-                if 1 <= bx < width-1 and 1 <= by < height-1:
-                    if bx == x or bx == x+w-1 or by == y or by == y+h-1:
-                        tiles[by][bx] = TILE_WALL
-                    else:
-                        tiles[by][bx] = TILE_FLOOR
+        place_building(tiles, x, y, w, h, bounds=(1, 1, width-1, height-1))
         
         # Add door (only one door per building)
         door_x = x + w//2
@@ -462,22 +282,11 @@ def get_computing_town_map():
         y = random.randint(2, height-h-2)
         
         # Check if overlaps with roads or other buildings
-        valid = True
-        for bx in range(x-1, x+w+1):
-            for by in range(y-1, y+h+1):
-                if 0 <= bx < width and 0 <= by < height:
-                    if tiles[by][bx] in [TILE_ROAD, TILE_WALL, TILE_DOOR, TILE_SHOP, TILE_INN]:
-                        valid = False
-                        break
+        valid = not region_contains(tiles, x-1, y-1, x+w+1, y+h+1, (TILE_ROAD, TILE_WALL, TILE_DOOR, TILE_SHOP, TILE_INN))
         
         if valid:
             # Create building with proper walls
-            for bx in range(x, x+w):
-                for by in range(y, y+h):
-                    if bx == x or bx == x+w-1 or by == y or by == y+h-1:
-                        tiles[by][bx] = TILE_WALL
-                    else:
-                        tiles[by][bx] = TILE_FLOOR
+            place_building(tiles, x, y, w, h)
             
             # Add door (only one door per building)
             door_x = x + w//2
@@ -734,522 +543,6 @@ def get_computing_town_map():
         "encounter_rate": 0.0
     }
 
-def get_storage_town_map():
-    """Storage Townのマップデータを返す"""
-    width = 30
-    height = 30
-    tiles = [[TILE_FLOOR for _ in range(width)] for _ in range(height)]
-    
-    # 外周を壁に
-    for x in range(width):
-        tiles[0][x] = TILE_WALL
-        tiles[height-1][x] = TILE_WALL
-    for y in range(height):
-        tiles[y][0] = TILE_WALL
-        tiles[y][width-1] = TILE_WALL
-    
-    # 放射状の道路（固定パターン）
-    center_x = width // 2
-    center_y = height // 2
-    
-    # 十字の道路
-    for x in range(width):
-        tiles[center_y][x] = TILE_ROAD
-    for y in range(height):
-        tiles[y][center_x] = TILE_ROAD
-    
-    # 斜めの道路
-    for i in range(-15, 16):
-        x = center_x + i
-        y = center_y + i
-        if 0 <= x < width and 0 <= y < height:
-            tiles[y][x] = TILE_ROAD
-        
-        x = center_x + i
-        y = center_y - i
-        if 0 <= x < width and 0 <= y < height:
-            tiles[y][x] = TILE_ROAD
-    
-    # 倉庫風の建物（固定位置）
-    warehouse_positions = [
-        (5, 5, 8, 8),  # (x, y, 幅, 高さ)
-        (17, 5, 8, 8),
-        (5, 17, 8, 8),
-        (17, 17, 8, 8)
-    ]
-    
-    for x, y, w, h in warehouse_positions:
-        # 建物の外周を壁に
-        for bx in range(x, min(x+w, width-1)):
-            for by in range(y, min(y+h, height-1)):
-                if bx == x or bx == min(x+w-1, width-2) or by == y or by == min(y+h-1, height-2):
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
-        
-        # ドアを追加（建物の下側中央）
-        door_x = x + w // 2
-        door_y = y + h - 1
-        if 0 <= door_x < width and 0 <= door_y < height:
-            tiles[door_y][door_x] = TILE_DOOR
-        
-        # 側面にもドアを追加（建物の右側中央）
-        door_x = x + w - 1
-        door_y = y + h // 2
-        if 0 <= door_x < width and 0 <= door_y < height:
-            tiles[door_y][door_x] = TILE_DOOR
-    
-    # 出口ポータル
-    tiles[height-2][width//2] = TILE_PORTAL
-    
-    # 町の装飾オブジェクトを追加
-    add_town_objects(tiles, width, height)
-    
-    # ショップ位置
-    tiles[7][7] = TILE_SHOP
-    tiles[22][7] = TILE_SHOP
-    tiles[7][22] = TILE_SHOP
-    
-    # NPCデータ
-    npcs = [
-        {
-            "x": 14,
-            "y": 12,
-            "name": "S3",
-            "dialog": "こんにちは、私はS3です。Simple Storage Serviceの略で、データを安全に保存するサービスです。",
-            "is_service": True,
-            "service_id": "s3"
-        },
-        {
-            "x": 8,
-            "y": 8,
-            "name": "EBS",
-            "dialog": "私はEBS、Elastic Block Storeです。EC2インスタンス用の永続ストレージを提供しています。",
-            "is_service": True,
-            "service_id": "ebs"
-        },
-        {
-            "x": 20,
-            "y": 20,
-            "name": "Glacier",
-            "dialog": "私はGlacierです。長期保存用の低コストストレージを提供しています。アクセス頻度の低いデータの保管に最適ですよ。",
-            "is_service": True,
-            "service_id": "glacier"
-        },
-        {
-            "x": 20,
-            "y": 8,
-            "name": "EFS",
-            "dialog": "私はEFS、Elastic File Systemです。複数のEC2インスタンスで共有できるファイルシステムを提供します。",
-            "is_service": True,
-            "service_id": "efs"
-        },
-        {
-            "x": 8,
-            "y": 20,
-            "name": "Storage Gateway",
-            "dialog": "私はStorage Gatewayです。オンプレミスとAWSストレージを橋渡しします。ハイブリッドクラウドの強い味方ですよ。",
-            "is_service": True,
-            "service_id": "storage_gateway"
-        },
-        {
-            "x": 13,
-            "y": 13,
-            "name": "Snow Family",
-            "dialog": "私はSnow Familyです。大量のデータを物理デバイスでAWSに転送するサービスです。Snowball、Snowcone、Snowmobileなどがありますよ。",
-            "is_service": True,
-            "service_id": "snow"
-        },
-        {
-            "x": 16,
-            "y": 13,
-            "name": "FSx",
-            "dialog": "私はFSxです。Windows File ServerやLustreなど、様々なファイルシステムをマネージドサービスとして提供しています。",
-            "is_service": True,
-            "service_id": "fsx"
-        },
-        {
-            "x": 13,
-            "y": 16,
-            "name": "Backup",
-            "dialog": "私はAWS Backupです。AWSリソースのバックアップを一元管理できるサービスです。データ保護が簡単になりますよ。",
-            "is_service": True,
-            "service_id": "backup"
-        },
-        {
-            "x": 16,
-            "y": 16,
-            "name": "S3 Glacier Deep Archive",
-            "dialog": "私はS3 Glacier Deep Archiveです。最も低コストのアーカイブストレージを提供しています。長期保存に最適ですよ。",
-            "is_service": True,
-            "service_id": "glacier_deep_archive"
-        }
-    ]
-    
-    # ポータルデータ
-    portals = [
-        {
-            "x": width//2,
-            "y": height-2,
-            "destination": "AWS Cloud World",
-            "dest_x": 40,
-            "dest_y": 11
-        }
-    ]
-    
-    # ショップデータ
-    shops = [
-        {
-            "x": 7,
-            "y": 7,
-            "name": "S3 Armory",
-            "type": "armor",
-            "dialog": "最高のストレージ防具で身を守りましょう！",
-            "items": ["leather_armor", "chain_mail", "plate_armor", "s3_shield", "glacier_helmet"]
-        },
-        {
-            "x": 22,
-            "y": 7,
-            "name": "Storage Weapons",
-            "type": "weapons",
-            "dialog": "ストレージの力を武器に変えましょう！",
-            "items": ["bronze_sword", "iron_sword", "storage_blade", "ebs_hammer"]
-        },
-        {
-            "x": 7,
-            "y": 22,
-            "name": "Bucket Potions",
-            "type": "items",
-            "dialog": "S3バケットから取り出した回復アイテムです！",
-            "items": ["potion_small", "potion_medium", "ether_small", "storage_elixir"]
-        }
-    ]
-    
-    return {
-        "name": "Storage Town",
-        "width": width,
-        "height": height,
-        "tiles": tiles,
-        "portals": portals,
-        "npcs": npcs,
-        "shops": shops,
-        "encounter_rate": 0.0
-    }
-
-def get_database_town_map():
-    """Database Townのマップデータを返す"""
-    width = 30
-    height = 30
-    tiles = [[TILE_FLOOR for _ in range(width)] for _ in range(height)]
-    
-    # 外周を壁に
-    for x in range(width):
-        tiles[0][x] = TILE_WALL
-        tiles[height-1][x] = TILE_WALL
-    for y in range(height):
-        tiles[y][0] = TILE_WALL
-        tiles[y][width-1] = TILE_WALL
-    
-    # テーブル風の建物と円形の道路（固定パターン）
-    center_x = width // 2
-    center_y = height // 2
-    
-    # 円形の道路
-    radius = 10
-    for angle in range(0, 360, 5):
-        rad = math.radians(angle)
-        x = int(center_x + radius * math.cos(rad))
-        y = int(center_y + radius * math.sin(rad))
-        if 0 <= x < width and 0 <= y < height:
-            tiles[y][x] = TILE_ROAD
-    
-    # テーブル風の建物（固定位置）
-    table_positions = [
-        (5, 5, 6, 6),  # (x, y, 幅, 高さ)
-        (19, 5, 6, 6),
-        (5, 19, 6, 6),
-        (19, 19, 6, 6),
-        (12, 12, 6, 6)  # 中央
-    ]
-    
-    for x, y, w, h in table_positions:
-        # 建物の外周を壁に
-        for bx in range(x, min(x+w, width-1)):
-            for by in range(y, min(y+h, height-1)):
-                if bx == x or bx == min(x+w-1, width-2) or by == y or by == min(y+h-1, height-2):
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
-    
-    # 出口ポータル
-    tiles[height-2][width//2] = TILE_PORTAL
-    
-    # NPCデータ
-    npcs = [
-        {
-            "x": 14,
-            "y": 12,
-            "name": "DynamoDB",
-            "dialog": "こんにちは、私はDynamoDBです。NoSQLデータベースサービスとして、高速で柔軟なデータ管理を提供しています。",
-            "is_service": True,
-            "service_id": "dynamodb"
-        },
-        {
-            "x": 8,
-            "y": 8,
-            "name": "RDS",
-            "dialog": "私はRDS、Relational Database Serviceです。MySQLやPostgreSQLなどのリレーショナルデータベースを簡単に設定・運用できます。",
-            "is_service": True,
-            "service_id": "rds"
-        },
-        {
-            "x": 20,
-            "y": 20,
-            "name": "Redshift",
-            "dialog": "私はRedshiftです。データウェアハウスサービスとして、大規模なデータ分析を高速に実行できます。",
-            "is_service": True,
-            "service_id": "redshift"
-        },
-        {
-            "x": 7,
-            "y": 14,
-            "name": "Aurora",
-            "dialog": "私はAuroraです。MySQLやPostgreSQLと互換性のある高性能なリレーショナルデータベースです。クラウドに最適化されていますよ。",
-            "is_service": True,
-            "service_id": "aurora"
-        },
-        {
-            "x": 14,
-            "y": 7,
-            "name": "ElastiCache",
-            "dialog": "私はElastiCacheです。RedisやMemcachedのマネージドサービスとして、インメモリキャッシュを提供しています。アプリケーションの高速化に役立ちますよ。",
-            "is_service": True,
-            "service_id": "elasticache"
-        },
-        {
-            "x": 21,
-            "y": 14,
-            "name": "DocumentDB",
-            "dialog": "私はDocumentDBです。MongoDBと互換性のあるドキュメントデータベースサービスです。スケーラブルで高可用性があります。",
-            "is_service": True,
-            "service_id": "documentdb"
-        },
-        {
-            "x": 14,
-            "y": 21,
-            "name": "Neptune",
-            "dialog": "私はNeptuneです。グラフデータベースサービスとして、高度に接続されたデータセットを簡単に構築・実行できます。",
-            "is_service": True,
-            "service_id": "neptune"
-        },
-        {
-            "x": 7,
-            "y": 7,
-            "name": "Timestream",
-            "dialog": "私はTimestreamです。IoTアプリケーションやデバイスからの時系列データを効率的に保存・分析できる時系列データベースです。",
-            "is_service": True,
-            "service_id": "timestream"
-        },
-        {
-            "x": 21,
-            "y": 21,
-            "name": "QLDB",
-            "dialog": "私はQLDBです。Quantum Ledger Database の略で、完全に検証可能な台帳データベースサービスです。変更履歴を追跡できますよ。",
-            "is_service": True,
-            "service_id": "qldb"
-        }
-    ]
-    
-    # ポータルデータ
-    portals = [
-        {
-            "x": width//2,
-            "y": height-2,
-            "destination": "AWS Cloud World",
-            "dest_x": 10,
-            "dest_y": 39
-        }
-    ]
-    
-    # ショップデータ
-    shops = [
-        {
-            "x": 22,
-            "y": 8,
-            "name": "Database Shop",
-            "items": ["potion_small", "potion_medium", "potion_large", "ether_small", "ether_medium"]
-        }
-    ]
-    
-    return {
-        "name": "Database Town",
-        "width": width,
-        "height": height,
-        "tiles": tiles,
-        "portals": portals,
-        "npcs": npcs,
-        "shops": shops,
-        "encounter_rate": 0.0
-    }
-
-def get_security_town_map():
-    """Security Townのマップデータを返す"""
-    width = 30
-    height = 30
-    tiles = [[TILE_FLOOR for _ in range(width)] for _ in range(height)]
-    
-    # 外周を壁に
-    for x in range(width):
-        tiles[0][x] = TILE_WALL
-        tiles[height-1][x] = TILE_WALL
-    for y in range(height):
-        tiles[y][0] = TILE_WALL
-        tiles[y][width-1] = TILE_WALL
-    
-    # 要塞風の建物と同心円状の道路（固定パターン）
-    center_x = width // 2
-    center_y = height // 2
-    
-    # 同心円状の道路
-    for radius in range(5, 15, 3):
-        for angle in range(0, 360, 5):
-            rad = math.radians(angle)
-            x = int(center_x + radius * math.cos(rad))
-            y = int(center_y + radius * math.sin(rad))
-            if 0 <= x < width and 0 <= y < height:
-                tiles[y][x] = TILE_ROAD
-    
-    # 要塞風の建物（固定位置）
-    # 中央の要塞
-    for x in range(center_x-4, min(center_x+5, width-1)):
-        for y in range(center_y-4, min(center_y+5, height-1)):
-            if x == center_x-4 or x == min(center_x+4, width-2) or y == center_y-4 or y == min(center_y+4, height-2):
-                tiles[y][x] = TILE_WALL
-            else:
-                tiles[y][x] = TILE_FLOOR
-    
-    # 監視塔（四隅）
-    tower_positions = [(5, 5), (5, height-6), (width-6, 5), (width-6, height-6)]
-    for tx, ty in tower_positions:
-        for x in range(tx, min(tx+3, width-1)):
-            for y in range(ty, min(ty+3, height-1)):
-                if x == tx or x == min(tx+2, width-2) or y == ty or y == min(ty+2, height-2):
-                    tiles[y][x] = TILE_WALL
-                else:
-                    tiles[y][x] = TILE_FLOOR
-    
-    # 出口ポータル
-    tiles[height-2][width//2] = TILE_PORTAL
-    
-    # NPCデータ
-    npcs = [
-        {
-            "x": 14,
-            "y": 12,
-            "name": "IAM",
-            "dialog": "こんにちは、私はIAMです。Identity and Access Managementの略で、AWSリソースへのアクセス制御を担当しています。",
-            "is_service": True,
-            "service_id": "iam"
-        },
-        {
-            "x": 8,
-            "y": 8,
-            "name": "WAF",
-            "dialog": "私はWAF、Web Application Firewallです。ウェブアプリケーションを攻撃から守ります。",
-            "is_service": True,
-            "service_id": "waf"
-        },
-        {
-            "x": 20,
-            "y": 20,
-            "name": "Shield",
-            "dialog": "私はShieldです。DDoS攻撃からアプリケーションを保護するサービスです。常に警戒を怠りません。",
-            "is_service": True,
-            "service_id": "shield"
-        },
-        {
-            "x": 7,
-            "y": 14,
-            "name": "GuardDuty",
-            "dialog": "私はGuardDutyです。インテリジェントな脅威検出サービスとして、AWSアカウントとワークロードを継続的にモニタリングしています。",
-            "is_service": True,
-            "service_id": "guardduty"
-        },
-        {
-            "x": 14,
-            "y": 7,
-            "name": "KMS",
-            "dialog": "私はKMS、Key Management Serviceです。暗号化キーの作成と管理を簡単にします。データの安全を守りましょう。",
-            "is_service": True,
-            "service_id": "kms"
-        },
-        {
-            "x": 21,
-            "y": 14,
-            "name": "Cognito",
-            "dialog": "私はCognitoです。ウェブおよびモバイルアプリのユーザー認証、認可、ユーザー管理を提供します。",
-            "is_service": True,
-            "service_id": "cognito"
-        },
-        {
-            "x": 14,
-            "y": 21,
-            "name": "Secrets Manager",
-            "dialog": "私はSecrets Managerです。データベース認証情報、APIキー、その他のシークレットを安全に保存・管理します。",
-            "is_service": True,
-            "service_id": "secrets_manager"
-        },
-        {
-            "x": 7,
-            "y": 7,
-            "name": "Inspector",
-            "dialog": "私はInspectorです。AWSリソースの自動セキュリティ評価サービスです。脆弱性やベストプラクティスからの逸脱を検出します。",
-            "is_service": True,
-            "service_id": "inspector"
-        },
-        {
-            "x": 21,
-            "y": 21,
-            "name": "Macie",
-            "dialog": "私はMacieです。機械学習を使用して、S3に保存された機密データを自動的に検出、分類、保護します。",
-            "is_service": True,
-            "service_id": "macie"
-        }
-    ]
-    
-    # ポータルデータ
-    portals = [
-        {
-            "x": width//2,
-            "y": height-2,
-            "destination": "AWS Cloud World",
-            "dest_x": 40,
-            "dest_y": 39
-        }
-    ]
-    
-    # ショップデータ
-    shops = [
-        {
-            "x": 22,
-            "y": 8,
-            "name": "Security Shop",
-            "items": ["fire_scroll", "ice_scroll", "thunder_scroll", "barrier_amulet", "speed_boots"]
-        }
-    ]
-    
-    return {
-        "name": "Security Town",
-        "width": width,
-        "height": height,
-        "tiles": tiles,
-        "portals": portals,
-        "npcs": npcs,
-        "shops": shops,
-        "encounter_rate": 0.0
-    }
-    # 町の装飾オブジェクトを追加
-    add_town_objects(tiles, width, height)
 # 町中のオブジェクトを追加する関数
 def add_town_objects(tiles, width, height):
     """町中のオブジェクトを追加する"""
@@ -1270,16 +563,15 @@ def add_town_objects(tiles, width, height):
             if (i % 10 == 0 or j % 10 == 0) and tiles[j][i] == TILE_ROAD:
                 tiles[j][i] = TILE_LAMP
     
-    # 看板（ショップの近く）
-    for i in range(1, width-1):
-        for j in range(1, height-1):
-            if tiles[j][i] == TILE_SHOP:
-                # ショップの周囲に看板を配置
-                for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
-                    nx, ny = i + dx, j + dy
-                    if 0 <= nx < width and 0 <= ny < height and tiles[ny][nx] == TILE_FLOOR:
-                        tiles[ny][nx] = TILE_SIGN
-                        break
+    # 看板（ショップの近く）。全マスを走査せずショップの位置だけを取り出す（列優先の順を保つ）
+    for i, j in sorted(tiles.find_all(TILE_SHOP)):
+        if 1 <= i < width-1 and 1 <= j < height-1:
+            # ショップの周囲に看板を配置
+            for dx, dy in [(0, -1), (0, 1), (-1, 0), (1, 0)]:
+                nx, ny = i + dx, j + dy
+                if 0 <= nx < width and 0 <= ny < height and tiles[ny][nx] == TILE_FLOOR:
+                    tiles[ny][nx] = TILE_SIGN
+                    break
     
     # 花壇（装飾用）
     for i in range(3, width-3, 7):
@@ -1290,15 +582,10 @@ def get_storage_town_map():
     """Storage Town map data"""
     width = 30
     height = 30
-    tiles = [[TILE_FLOOR for _ in range(width)] for _ in range(height)]
+    tiles = TileGrid(width, height, TILE_FLOOR)
     
     # Surround with walls
-    for x in range(width):
-        tiles[0][x] = TILE_WALL
-        tiles[height-1][x] = TILE_WALL
-    for y in range(height):
-        tiles[y][0] = TILE_WALL
-        tiles[y][width-1] = TILE_WALL
+    tiles.fill_border(0, 0, width, height, TILE_WALL)
     
     # Main roads - wider and more natural
     center_x = width // 2
@@ -1362,13 +649,7 @@ def get_storage_town_map():
     s3_shop_w, s3_shop_h = 5, 5
     
     # Create S3 shop building
-    for bx in range(s3_shop_x, s3_shop_x+s3_shop_w):
-        for by in range(s3_shop_y, s3_shop_y+s3_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == s3_shop_x or bx == s3_shop_x+s3_shop_w-1 or by == s3_shop_y or by == s3_shop_y+s3_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, s3_shop_x, s3_shop_y, s3_shop_w, s3_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to S3 shop
     door_x = s3_shop_x + s3_shop_w//2
@@ -1385,13 +666,7 @@ def get_storage_town_map():
     glacier_shop_w, glacier_shop_h = 5, 5
     
     # Create Glacier shop building
-    for bx in range(glacier_shop_x, glacier_shop_x+glacier_shop_w):
-        for by in range(glacier_shop_y, glacier_shop_y+glacier_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == glacier_shop_x or bx == glacier_shop_x+glacier_shop_w-1 or by == glacier_shop_y or by == glacier_shop_y+glacier_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, glacier_shop_x, glacier_shop_y, glacier_shop_w, glacier_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to Glacier shop
     door_x = glacier_shop_x + glacier_shop_w//2
@@ -1408,13 +683,7 @@ def get_storage_town_map():
     efs_shop_w, efs_shop_h = 5, 5
     
     # Create EFS shop building
-    for bx in range(efs_shop_x, efs_shop_x+efs_shop_w):
-        for by in range(efs_shop_y, efs_shop_y+efs_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == efs_shop_x or bx == efs_shop_x+efs_shop_w-1 or by == efs_shop_y or by == efs_shop_y+efs_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, efs_shop_x, efs_shop_y, efs_shop_w, efs_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to EFS shop
     door_x = efs_shop_x + efs_shop_w//2
@@ -1431,13 +700,7 @@ def get_storage_town_map():
     inn_w, inn_h = 6, 6
     
     # Create inn building
-    for bx in range(inn_x, inn_x+inn_w):
-        for by in range(inn_y, inn_y+inn_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == inn_x or bx == inn_x+inn_w-1 or by == inn_y or by == inn_y+inn_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, inn_x, inn_y, inn_w, inn_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to inn
     door_x = inn_x + inn_w//2
@@ -1458,13 +721,7 @@ def get_storage_town_map():
     
     for x, y, w, h in service_buildings:
         # Create building
-        for bx in range(x, x+w):
-            for by in range(y, y+h):
-                if 1 <= bx < width-1 and 1 <= by < height-1:
-                    if bx == x or bx == x+w-1 or by == y or by == y+h-1:
-                        tiles[by][bx] = TILE_WALL
-                    else:
-                        tiles[by][bx] = TILE_FLOOR
+        place_building(tiles, x, y, w, h, bounds=(1, 1, width-1, height-1))
         
         # Add door (only one door per building)
         door_x = x + w//2
@@ -1482,22 +739,11 @@ def get_storage_town_map():
         y = random.randint(2, height-h-2)
         
         # Check if overlaps with roads or other buildings
-        valid = True
-        for bx in range(x-1, x+w+1):
-            for by in range(y-1, y+h+1):
-                if 0 <= bx < width and 0 <= by < height:
-                    if tiles[by][bx] in [TILE_ROAD, TILE_WALL, TILE_DOOR, TILE_SHOP, TILE_INN]:
-                        valid = False
-                        break
+        valid = not region_contains(tiles, x-1, y-1, x+w+1, y+h+1, (TILE_ROAD, TILE_WALL, TILE_DOOR, TILE_SHOP, TILE_INN))
         
         if valid:
             # Create building with proper walls
-            for bx in range(x, x+w):
-                for by in range(y, y+h):
-                    if bx == x or bx == x+w-1 or by == y or by == y+h-1:
-                        tiles[by][bx] = TILE_WALL
-                    else:
-                        tiles[by][bx] = TILE_FLOOR
+            place_building(tiles, x, y, w, h)
             
             # Add door (only one door per building)
             door_x = x + w//2
@@ -1626,15 +872,10 @@ def get_database_town_map():
     """Database Town map data"""
     width = 30
     height = 30
-    tiles = [[TILE_FLOOR for _ in range(width)] for _ in range(height)]
+    tiles = TileGrid(width, height, TILE_FLOOR)
     
     # Surround with walls
-    for x in range(width):
-        tiles[0][x] = TILE_WALL
-        tiles[height-1][x] = TILE_WALL
-    for y in range(height):
-        tiles[y][0] = TILE_WALL
-        tiles[y][width-1] = TILE_WALL
+    tiles.fill_border(0, 0, width, height, TILE_WALL)
     
     # Main roads - wider and more natural
     center_x = width // 2
@@ -1698,13 +939,7 @@ def get_database_town_map():
     rds_shop_w, rds_shop_h = 5, 5
     
     # Create RDS shop building
-    for bx in range(rds_shop_x, rds_shop_x+rds_shop_w):
-        for by in range(rds_shop_y, rds_shop_y+rds_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == rds_shop_x or bx == rds_shop_x+rds_shop_w-1 or by == rds_shop_y or by == rds_shop_y+rds_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, rds_shop_x, rds_shop_y, rds_shop_w, rds_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to RDS shop
     door_x = rds_shop_x + rds_shop_w//2
@@ -1721,13 +956,7 @@ def get_database_town_map():
     dynamo_shop_w, dynamo_shop_h = 5, 5
     
     # Create DynamoDB shop building
-    for bx in range(dynamo_shop_x, dynamo_shop_x+dynamo_shop_w):
-        for by in range(dynamo_shop_y, dynamo_shop_y+dynamo_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == dynamo_shop_x or bx == dynamo_shop_x+dynamo_shop_w-1 or by == dynamo_shop_y or by == dynamo_shop_y+dynamo_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, dynamo_shop_x, dynamo_shop_y, dynamo_shop_w, dynamo_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to DynamoDB shop
     door_x = dynamo_shop_x + dynamo_shop_w//2
@@ -1744,13 +973,7 @@ def get_database_town_map():
     aurora_shop_w, aurora_shop_h = 5, 5
     
     # Create Aurora shop building
-    for bx in range(aurora_shop_x, aurora_shop_x+aurora_shop_w):
-        for by in range(aurora_shop_y, aurora_shop_y+aurora_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == aurora_shop_x or bx == aurora_shop_x+aurora_shop_w-1 or by == aurora_shop_y or by == aurora_shop_y+aurora_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, aurora_shop_x, aurora_shop_y, aurora_shop_w, aurora_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to Aurora shop
     door_x = aurora_shop_x + aurora_shop_w//2
@@ -1767,13 +990,7 @@ def get_database_town_map():
     inn_w, inn_h = 6, 6
     
     # Create inn building
-    for bx in range(inn_x, inn_x+inn_w):
-        for by in range(inn_y, inn_y+inn_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == inn_x or bx == inn_x+inn_w-1 or by == inn_y or by == inn_y+inn_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, inn_x, inn_y, inn_w, inn_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to inn
     door_x = inn_x + inn_w//2
@@ -1794,13 +1011,7 @@ def get_database_town_map():
     
     for x, y, w, h in service_buildings:
         # Create building
-        for bx in range(x, x+w):
-            for by in range(y, y+h):
-                if 1 <= bx < width-1 and 1 <= by < height-1:
-                    if bx == x or bx == x+w-1 or by == y or by == y+h-1:
-                        tiles[by][bx] = TILE_WALL
-                    else:
-                        tiles[by][bx] = TILE_FLOOR
+        place_building(tiles, x, y, w, h, bounds=(1, 1, width-1, height-1))
         
         # Add door (only one door per building)
         door_x = x + w//2
@@ -1818,22 +1029,11 @@ def get_database_town_map():
         y = random.randint(2, height-h-2)
         
         # Check if overlaps with roads or other buildings
-        valid = True
-        for bx in range(x-1, x+w+1):
-            for by in range(y-1, y+h+1):
-                if 0 <= bx < width and 0 <= by < height:
-                    if tiles[by][bx] in [TILE_ROAD, TILE_WALL, TILE_DOOR, TILE_SHOP, TILE_INN]:
-                        valid = False
-                        break
+        valid = not region_contains(tiles, x-1, y-1, x+w+1, y+h+1, (TILE_ROAD, TILE_WALL, TILE_DOOR, TILE_SHOP, TILE_INN))
         
         if valid:
             # Create building with proper walls
-            for bx in range(x, x+w):
-                for by in range(y, y+h):
-                    if bx == x or bx == x+w-1 or by == y or by == y+h-1:
-                        tiles[by][bx] = TILE_WALL
-                    else:
-                        tiles[by][bx] = TILE_FLOOR
+            place_building(tiles, x, y, w, h)
             
             # Add door (only one door per building)
             door_x = x + w//2
@@ -1962,15 +1162,10 @@ def get_security_town_map():
     """Security Town map data"""
     width = 30
     height = 30
-    tiles = [[TILE_FLOOR for _ in range(width)] for _ in range(height)]
+    tiles = TileGrid(width, height, TILE_FLOOR)
     
     # Surround with walls
-    for x in range(width):
-        tiles[0][x] = TILE_WALL
-        tiles[height-1][x] = TILE_WALL
-    for y in range(height):
-        tiles[y][0] = TILE_WALL
-        tiles[y][width-1] = TILE_WALL
+    tiles.fill_border(0, 0, width, height, TILE_WALL)
     
     # Main roads - wider and more natural
     center_x = width // 2
@@ -2034,13 +1229,7 @@ def get_security_town_map():
     iam_shop_w, iam_shop_h = 5, 5
     
     # Create IAM shop building
-    for bx in range(iam_shop_x, iam_shop_x+iam_shop_w):
-        for by in range(iam_shop_y, iam_shop_y+iam_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == iam_shop_x or bx == iam_shop_x+iam_shop_w-1 or by == iam_shop_y or by == iam_shop_y+iam_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, iam_shop_x, iam_shop_y, iam_shop_w, iam_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to IAM shop
     door_x = iam_shop_x + iam_shop_w//2
@@ -2057,13 +1246,7 @@ def get_security_town_map():
     waf_shop_w, waf_shop_h = 5, 5
     
     # Create WAF shop building
-    for bx in range(waf_shop_x, waf_shop_x+waf_shop_w):
-        for by in range(waf_shop_y, waf_shop_y+waf_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == waf_shop_x or bx == waf_shop_x+waf_shop_w-1 or by == waf_shop_y or by == waf_shop_y+waf_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, waf_shop_x, waf_shop_y, waf_shop_w, waf_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to WAF shop
     door_x = waf_shop_x + waf_shop_w//2
@@ -2080,13 +1263,7 @@ def get_security_town_map():
     shield_shop_w, shield_shop_h = 5, 5
     
     # Create Shield shop building
-    for bx in range(shield_shop_x, shield_shop_x+shield_shop_w):
-        for by in range(shield_shop_y, shield_shop_y+shield_shop_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == shield_shop_x or bx == shield_shop_x+shield_shop_w-1 or by == shield_shop_y or by == shield_shop_y+shield_shop_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, shield_shop_x, shield_shop_y, shield_shop_w, shield_shop_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to Shield shop
     door_x = shield_shop_x + shield_shop_w//2
@@ -2103,13 +1280,7 @@ def get_security_town_map():
     inn_w, inn_h = 6, 6
     
     # Create inn building
-    for bx in range(inn_x, inn_x+inn_w):
-        for by in range(inn_y, inn_y+inn_h):
-            if 1 <= bx < width-1 and 1 <= by < height-1:
-                if bx == inn_x or bx == inn_x+inn_w-1 or by == inn_y or by == inn_y+inn_h-1:
-                    tiles[by][bx] = TILE_WALL
-                else:
-                    tiles[by][bx] = TILE_FLOOR
+    place_building(tiles, inn_x, inn_y, inn_w, inn_h, bounds=(1, 1, width-1, height-1))
     
     # Add door to inn
     door_x = inn_x + inn_w//2
@@ -2130,13 +1301,7 @@ def get_security_town_map():
     
     for x, y, w, h in service_buildings:
         # Create building
-        for bx in range(x, x+w):
-            for by in range(y, y+h):
-                if 1 <= bx < width-1 and 1 <= by < height-1:
-                    if bx == x or bx == x+w-1 or by == y or by == y+h-1:
-                        tiles[by][bx] = TILE_WALL
-                    else:
-                        tiles[by][bx] = TILE_FLOOR
+        place_building(tiles, x, y, w, h, bounds=(1, 1, width-1, height-1))
         
         # Add door (only one door per building)
         door_x = x + w//2
@@ -2154,22 +1319,11 @@ def get_security_town_map():
         y = random.randint(2, height-h-2)
         
         # Check if overlaps with roads or other buildings
-        valid = True
-        for bx in range(x-1, x+w+1):
-            for by in range(y-1, y+h+1):
-                if 0 <= bx < width and 0 <= by < height:
-                    if tiles[by][bx] in [TILE_ROAD, TILE_WALL, TILE_DOOR, TILE_SHOP, TILE_INN]:
-                        valid = False
-                        break
+        valid = not region_contains(tiles, x-1, y-1, x+w+1, y+h+1, (TILE_ROAD, TILE_WALL, TILE_DOOR, TILE_SHOP, TILE_INN))
         
         if valid:
             # Create building with proper walls
-            for bx in range(x, x+w):
-                for by in range(y, y+h):
-                    if bx == x or bx == x+w-1 or by == y or by == y+h-1:
-                        tiles[by][bx] = TILE_WALL
-                    else:
-                        tiles[by][bx] = TILE_FLOOR
+            place_building(tiles, x, y, w, h)
             
             # Add door (only one door per building)
             door_x = x + w//2
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from array import array
+from collections import deque
+
+# マップごとにキャッシュする距離場の上限件数
+FLOW_FIELD_CACHE_MAX_ENTRIES = 32
+
+# 到達できないことを表す距離
+UNREACHABLE = -1
+
+# 上下左右の移動（directions の値は 1 から始まる番号。0 は次に進むタイルが無い）
+NEIGHBOR_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+def distance_field(walkable, width, height, x, y):
+    """(x, y) から各タイルまでの歩数と、(x, y) へ向かうときに次に進む方向（幅優先探索、上下左右の移動）
+    
+    walkable は1タイル1バイトの歩行可能ビットマップ（行優先、歩行可能なら1）。
+    歩数は到達できなければUNREACHABLE、方向は NEIGHBOR_STEPS の番号+1。
+    """
+    distances = array("i", [UNREACHABLE]) * (width * height)
+    directions = bytearray(width * height)
+    start = y * width + x
+    distances[start] = 0
+    queue = deque([start])
+    while queue:
+        index = queue.popleft()
+        next_distance = distances[index] + 1
+        tile_y, tile_x = divmod(index, width)
+        # 隣のタイルから見て、このタイルへ向かう方向を記録する
+        for neighbor, inside, direction in ((index - 1, tile_x > 0, 1), (index + 1, tile_x < width - 1, 2),
+                                            (index - width, tile_y > 0, 3), (index + width, tile_y < height - 1, 4)):
+            if inside and distances[neighbor] == UNREACHABLE and walkable[neighbor] == 1:
+                distances[neighbor] = next_distance
+                directions[neighbor] = direction
+                queue.append(neighbor)
+    return distances, directions
+
+class FlowField:
+    """目的地への距離場。どのタイルからでも目的地までの歩数と次に進むタイルを定数時間で引ける"""
+        
+    def __init__(self, walkable, width, height, x, y):
+        self.width = width
+        self.height = height
+        self.target = (x, y)
+        self.distances, self.directions = distance_field(walkable, width, height, x, y)
+        
+    def distance(self, x, y):
+        """(x, y) から目的地までの歩数（着けなければNone）"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        steps = self.distances[y * self.width + x]
+        return None if steps == UNREACHABLE else steps
+        
+    def next_step(self, x, y):
+        """(x, y) から目的地へ向かうときに次に進むタイル（目的地上や着けなければNone）"""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        direction = self.directions[y * self.width + x]
+        if not direction:
+            return None
+        step_x, step_y = NEIGHBOR_STEPS[direction - 1]
+        return (x + step_x, y + step_y)
+        
+    def walk(self, x, y, steps):
+        """(x, y) から目的地へ最大 steps 歩進んだ経路（先頭は (x, y)）"""
+        path = [(x, y)]
+        for _ in range(steps):
+            step = self.next_step(*path[-1])
+            if step is None:
+                break
+            path.append(step)
+        return path
+        
+    def memory_usage(self):
+        """距離場のバイト数"""
+        return self.distances.itemsize * len(self.distances) + len(self.directions)
@@ -3,8 +3,17 @@
 
 import pygame
 import os
+import sys
 import random
 import math
+import time
+from collections import OrderedDict
+from text_layout import TextLayout
+
+try:
+    import numpy
+except ImportError:  # numpyが無い環境では1行ずつ描画してグラデーションを作る
+    numpy = None
 
 # 色の定数
 WHITE = (255, 255, 255)
@@ -20,10 +29,49 @@ YELLOW = (255, 255, 0)
 # タイルサイズ
 TILE_SIZE = 40
 
+# テキスト描画キャッシュの上限（件数とバイト数）
+TEXT_CACHE_MAX_ENTRIES = 512
+TEXT_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# ポータルの脈動アニメーション（sin(ticks / 300) の1周期をフレームに分割）
+PORTAL_ANIMATION_FRAMES = 24
+PORTAL_PULSE_PERIOD = 2 * math.pi * 300
+
+def get_animation_frame(ticks, period, frame_count):
+    """経過時間（ミリ秒）から周期アニメーションのフレーム番号を求める"""
+    return int((ticks % period) * frame_count / period) % frame_count
+
+# メニューなどの下に敷く半透明の黒
+DIM_OVERLAY_COLOR = (0, 0, 0, 180)
+
+# カラーキーに使う色の候補（画像内で使われていない最初の色を使う）
+COLORKEY_CANDIDATES = [(255, 0, 255), (0, 255, 255), (1, 2, 3), (254, 1, 253)]
+
+# 名前付きグラデーション（名前 -> 行ごとの色を返す関数 color_func(y, height)）
+GRADIENTS = {}
+
+def register_gradient(name, color_func):
+    """グラデーションを名前で登録する"""
+    GRADIENTS[name] = color_func
+
 class GameAssets:
     def __init__(self):
         self.images = {}
         self.fonts = {}
+        self.composites = {}
+        self.gradients = {}
+        self.overlays = {}
+        self.portal_frames = None
+        self.portal_labels = {}
+        self.fallback_images = {}
+        self.missing_images = {}
+        self.text_cache = OrderedDict()
+        self.text_cache_bytes = 0
+        self.text_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.text_layout = TextLayout(self.get_font)
+        self.source_images = {}
+        self.display_format_stats = None
+        self.display_format_version = 0  # finalize_display_format のたびに増える（画像から作ったキャッシュの破棄に使う）
         self.load_assets()
         
     def load_assets(self):
@@ -292,6 +340,38 @@ class GameAssets:
             pygame.draw.line(flowerbed, (0, 100, 0), (x, y+3), (x, y+6), 1)
         self.images["flowerbed"] = flowerbed
         
+        # 6. 像
+        statue = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        # 台座
+        pygame.draw.rect(statue, (130, 130, 140), (8, TILE_SIZE-12, TILE_SIZE-16, 8))
+        pygame.draw.rect(statue, (100, 100, 110), (8, TILE_SIZE-12, TILE_SIZE-16, 8), 1)
+        # 胴体
+        pygame.draw.rect(statue, (170, 170, 180), (TILE_SIZE//2-5, TILE_SIZE//3, 10, TILE_SIZE//2-4))
+        # 頭
+        pygame.draw.circle(statue, (190, 190, 200), (TILE_SIZE//2, TILE_SIZE//4), 6)
+        self.images["statue"] = statue
+        
+        # 7. テーブル
+        table = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        # 天板
+        pygame.draw.rect(table, (140, 90, 50), (4, TILE_SIZE//3, TILE_SIZE-8, TILE_SIZE//4))
+        pygame.draw.rect(table, (100, 60, 30), (4, TILE_SIZE//3, TILE_SIZE-8, TILE_SIZE//4), 1)
+        # 脚
+        pygame.draw.rect(table, (100, 60, 30), (7, TILE_SIZE//3+TILE_SIZE//4, 4, 12))
+        pygame.draw.rect(table, (100, 60, 30), (TILE_SIZE-11, TILE_SIZE//3+TILE_SIZE//4, 4, 12))
+        self.images["table"] = table
+        
+        # 8. 椅子
+        chair = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        # 背もたれ
+        pygame.draw.rect(chair, (120, 80, 40), (TILE_SIZE//3, 8, 4, TILE_SIZE//2))
+        # 座面
+        pygame.draw.rect(chair, (140, 90, 50), (TILE_SIZE//3, TILE_SIZE//2, TILE_SIZE//3, 5))
+        # 脚
+        pygame.draw.rect(chair, (100, 60, 30), (TILE_SIZE//3, TILE_SIZE//2+5, 3, 10))
+        pygame.draw.rect(chair, (100, 60, 30), (TILE_SIZE*2//3-3, TILE_SIZE//2+5, 3, 10))
+        self.images["chair"] = chair
+        
         # 敵キャラクター（より詳細なデザイン）
         enemy_surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
         # 本体（三角形）
@@ -561,6 +641,21 @@ class GameAssets:
         text = pygame.font.SysFont(None, 24).render("$", True, (255, 255, 255))
         shop_surface.blit(text, (TILE_SIZE//2-text.get_width()//2, TILE_SIZE//2-text.get_height()//2))
         self.images["shop"] = shop_surface
+        
+        # Inn icon (based on shop icon but with different colors and bed symbol)
+        inn_surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        # Background (blue square)
+        pygame.draw.rect(inn_surface, (51, 102, 153), (5, 5, TILE_SIZE-10, TILE_SIZE-10))
+        pygame.draw.rect(inn_surface, BLACK, (5, 5, TILE_SIZE-10, TILE_SIZE-10), 2)
+        # Inn icon (bed)
+        pygame.draw.rect(inn_surface, (255, 255, 255), (10, TILE_SIZE//2-5, TILE_SIZE-20, TILE_SIZE//3))
+        pygame.draw.rect(inn_surface, (200, 200, 255), (10, TILE_SIZE//2-5, TILE_SIZE-20, 5))
+        # Pillow
+        pygame.draw.rect(inn_surface, (220, 220, 255), (12, TILE_SIZE//2-3, 8, 8))
+        # Zzz symbol for sleep
+        text = pygame.font.SysFont(None, 20).render("Zzz", True, (255, 255, 255))
+        inn_surface.blit(text, (TILE_SIZE//2, TILE_SIZE//4))
+        self.images["inn"] = inn_surface
         # 背景（緑色の四角）
         pygame.draw.rect(s3_surface, (0, 153, 102), (5, 5, TILE_SIZE-10, TILE_SIZE-10))
         pygame.draw.rect(s3_surface, BLACK, (5, 5, TILE_SIZE-10, TILE_SIZE-10), 2)
@@ -676,90 +771,310 @@ class GameAssets:
         exp_bar.fill((0, 255, 0))
         self.images["exp_bar"] = exp_bar
         
+    def finalize_display_format(self, measure=False):
+        """画像テーブルを画面のピクセル形式に変換（set_mode後に呼ぶ。モード変更後の再呼び出しも可）
+        
+        measure=True なら変換前後の全画像のblit時間も測って統計に入れる（ベンチマーク用。起動時は測らない）。
+        """
+        screen = pygame.display.get_surface()
+        if screen is None:
+            return None
+            
+        # 変換前の元画像を保持し、再呼び出し時は常に元画像から変換し直す
+        for name, image in self.images.items():
+            if name not in self.source_images:
+                self.source_images[name] = image
+                
+        stats = {"opaque": 0, "colorkey": 0, "alpha": 0}
+        if measure:
+            scratch = screen.copy()
+            stats["blit_ms_before"] = self._measure_blit_time(scratch, self.source_images.values())
+        converted = {}
+        for name, image in self.source_images.items():
+            converted[name], kind = self._to_display_format(image)
+            stats[kind] += 1
+        if measure:
+            stats["blit_ms_after"] = self._measure_blit_time(scratch, converted.values())
+        self.images.update(converted)
+        
+        # 変換前の画像から作った派生キャッシュは作り直す
+        self.composites.clear()
+        self.gradients.clear()
+        self.overlays.clear()
+        self.portal_frames = None
+        self.portal_labels.clear()
+        self.fallback_images.clear()
+        # マップの静的レイヤーのチャンクも、display_format_version が変わったら作り直す
+        self.display_format_version += 1
+        
+        stats["images"] = len(converted)
+        self.display_format_stats = stats
+        return stats
+        
+    def _to_display_format(self, image):
+        """画像ごとに不透明・カラーキー・ピクセル単位アルファを選んで変換"""
+        if not image.get_flags() & pygame.SRCALPHA:
+            return image.convert(), "opaque"
+            
+        width, height = image.get_size()
+        opaque = pygame.mask.from_surface(image, 254)
+        visible = pygame.mask.from_surface(image, 0)
+        if opaque.count() == width * height:
+            return image.convert(), "opaque"
+        if opaque.count() != visible.count():
+            # 半透明のピクセルがある場合はピクセル単位アルファのまま
+            return image.convert_alpha(), "alpha"
+            
+        # 透明か不透明かの2値ならカラーキーにする（画像内で使われていない色をキーに選ぶ）
+        for key in COLORKEY_CANDIDATES:
+            used = pygame.mask.from_threshold(image, key, (1, 1, 1, 255))
+            if used.overlap_area(opaque, (0, 0)) == 0:
+                keyed = pygame.Surface((width, height))
+                keyed.fill(key)
+                keyed.blit(image, (0, 0))
+                keyed = keyed.convert()
+                keyed.set_colorkey(key, pygame.RLEACCEL)
+                return keyed, "colorkey"
+        return image.convert_alpha(), "alpha"
+        
+    def _measure_blit_time(self, target, images, repeat=20):
+        """画像一式をrepeat回blitした時間（ミリ秒）"""
+        images = list(images)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for image in images:
+                target.blit(image, (0, 0))
+        return (time.perf_counter() - start) * 1000
+        
     def get_image(self, name):
         """名前で画像を取得"""
         image = self.images.get(name)
         if image is None:
-            # 画像が見つからない場合は、タイルタイプに応じた代替画像を返す
-            default_image = pygame.Surface((TILE_SIZE, TILE_SIZE))
+            # 見つからなかった画像を記録
+            missing = self.missing_images.get(name)
+            if missing is None:
+                # GameAssets内部（合成画像など）を経由した場合は外側の呼び出し元を記録
+                caller = sys._getframe(1)
+                while caller.f_back is not None and caller.f_code.co_filename == __file__:
+                    caller = caller.f_back
+                missing = {
+                    "name": name,
+                    "first_caller": f"{os.path.basename(caller.f_code.co_filename)}:{caller.f_lineno} in {caller.f_code.co_name}",
+                    "hits": 0
+                }
+                self.missing_images[name] = missing
+            missing["hits"] += 1
             
-            # 名前に基づいて適切な代替画像を作成
-            if "mountain" in name:
-                # 山の代替表現
-                default_image.fill((150, 140, 130))
-                pygame.draw.polygon(default_image, (180, 170, 160), 
-                                  [(TILE_SIZE//2, 5), (TILE_SIZE-5, TILE_SIZE-5), (5, TILE_SIZE-5)])
-                pygame.draw.polygon(default_image, (220, 220, 220), 
-                                  [(TILE_SIZE//2, 5), (TILE_SIZE//2+5, 10), (TILE_SIZE//2-5, 10)])
-            elif "forest" in name:
-                # 森の代替表現
-                default_image.fill((100, 180, 100))
-                for i in range(3):
-                    x = 10 + i * 10
-                    pygame.draw.rect(default_image, (100, 70, 40), (x, 20, 4, 15))
-                    pygame.draw.circle(default_image, (50, 120, 50), (x+2, 15), 7)
-            elif "water" in name:
-                # 水の代替表現
-                default_image.fill((70, 130, 230))
-                for i in range(3):
-                    pygame.draw.line(default_image, (120, 180, 255), 
-                                   (0, 10 + i*10), (TILE_SIZE, 15 + i*10), 2)
-            elif "sand" in name:
-                # 砂の代替表現
-                default_image.fill((230, 210, 160))
-                for i in range(10):
-                    x = random.randint(5, TILE_SIZE-5)
-                    y = random.randint(5, TILE_SIZE-5)
-                    pygame.draw.circle(default_image, (210, 190, 140), (x, y), 2)
-            elif "road" in name:
-                # 道の代替表現
-                default_image.fill((200, 190, 170))
-                pygame.draw.line(default_image, (180, 170, 150), (0, 0), (TILE_SIZE, 0), 2)
-                pygame.draw.line(default_image, (180, 170, 150), (0, TILE_SIZE-1), (TILE_SIZE, TILE_SIZE-1), 2)
-            elif "wall" in name:
-                # 壁の代替表現
-                default_image.fill((150, 120, 100))
-                for y in range(0, TILE_SIZE, 8):
-                    for x in range(0, TILE_SIZE, 16):
-                        offset = 8 if y % 16 == 0 else 0
-                        pygame.draw.rect(default_image, (130, 100, 80), 
-                                       (x + offset, y, 8, 8))
-            elif "floor" in name:
-                # 床の代替表現
-                default_image.fill((220, 220, 220))
-                for y in range(0, TILE_SIZE, 10):
-                    for x in range(0, TILE_SIZE, 10):
-                        if (x + y) % 20 == 0:
-                            pygame.draw.rect(default_image, (200, 200, 200), 
-                                           (x, y, 10, 10))
-            elif "portal" in name:
-                # ポータルの代替表現
-                default_image.fill((50, 50, 50))
-                pygame.draw.circle(default_image, (200, 100, 200), 
-                                 (TILE_SIZE//2, TILE_SIZE//2), TILE_SIZE//3)
-                pygame.draw.circle(default_image, (50, 50, 50), 
-                                 (TILE_SIZE//2, TILE_SIZE//2), TILE_SIZE//6)
-            else:
-                # その他の未知のタイル - 識別できるパターン
-                default_image.fill((200, 200, 200))  # 灰色の背景
-                # 疑問符を描画
-                font = pygame.font.SysFont(None, 30)
-                text = font.render("?", True, (0, 0, 0))
-                default_image.blit(text, (TILE_SIZE//2 - text.get_width()//2, 
-                                        TILE_SIZE//2 - text.get_height()//2))
-                pygame.draw.rect(default_image, (100, 100, 100), (0, 0, TILE_SIZE, TILE_SIZE), 2)
-                
-            return default_image
+            # 代替画像は一度だけ生成して使い回す
+            image = self.fallback_images.get(name)
+            if image is None:
+                image = self._create_fallback_image(name)
+                if self.display_format_stats is not None:
+                    image = self._to_display_format(image)[0]
+                self.fallback_images[name] = image
+        return image
+        
+    def get_missing_asset_report(self):
+        """見つからなかった画像の一覧を取得（参照回数の多い順）"""
+        return sorted((dict(missing) for missing in self.missing_images.values()),
+                      key=lambda missing: missing["hits"], reverse=True)
+        
+    def _create_fallback_image(self, name):
+        """画像が見つからない場合の代替画像を作成"""
+        # 画像が見つからない場合は、タイルタイプに応じた代替画像を返す
+        default_image = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        
+        # 名前に基づいて適切な代替画像を作成
+        if "mountain" in name:
+            # 山の代替表現
+            default_image.fill((150, 140, 130))
+            pygame.draw.polygon(default_image, (180, 170, 160), 
+                              [(TILE_SIZE//2, 5), (TILE_SIZE-5, TILE_SIZE-5), (5, TILE_SIZE-5)])
+            pygame.draw.polygon(default_image, (220, 220, 220), 
+                              [(TILE_SIZE//2, 5), (TILE_SIZE//2+5, 10), (TILE_SIZE//2-5, 10)])
+        elif "forest" in name:
+            # 森の代替表現
+            default_image.fill((100, 180, 100))
+            for i in range(3):
+                x = 10 + i * 10
+                pygame.draw.rect(default_image, (100, 70, 40), (x, 20, 4, 15))
+                pygame.draw.circle(default_image, (50, 120, 50), (x+2, 15), 7)
+        elif "water" in name:
+            # 水の代替表現
+            default_image.fill((70, 130, 230))
+            for i in range(3):
+                pygame.draw.line(default_image, (120, 180, 255), 
+                               (0, 10 + i*10), (TILE_SIZE, 15 + i*10), 2)
+        elif "sand" in name:
+            # 砂の代替表現
+            default_image.fill((230, 210, 160))
+            for i in range(10):
+                x = random.randint(5, TILE_SIZE-5)
+                y = random.randint(5, TILE_SIZE-5)
+                pygame.draw.circle(default_image, (210, 190, 140), (x, y), 2)
+        elif "road" in name:
+            # 道の代替表現
+            default_image.fill((200, 190, 170))
+            pygame.draw.line(default_image, (180, 170, 150), (0, 0), (TILE_SIZE, 0), 2)
+            pygame.draw.line(default_image, (180, 170, 150), (0, TILE_SIZE-1), (TILE_SIZE, TILE_SIZE-1), 2)
+        elif "wall" in name:
+            # 壁の代替表現
+            default_image.fill((150, 120, 100))
+            for y in range(0, TILE_SIZE, 8):
+                for x in range(0, TILE_SIZE, 16):
+                    offset = 8 if y % 16 == 0 else 0
+                    pygame.draw.rect(default_image, (130, 100, 80), 
+                                   (x + offset, y, 8, 8))
+        elif "floor" in name:
+            # 床の代替表現
+            default_image.fill((220, 220, 220))
+            for y in range(0, TILE_SIZE, 10):
+                for x in range(0, TILE_SIZE, 10):
+                    if (x + y) % 20 == 0:
+                        pygame.draw.rect(default_image, (200, 200, 200), 
+                                       (x, y, 10, 10))
+        elif "portal" in name:
+            # ポータルの代替表現
+            default_image.fill((50, 50, 50))
+            pygame.draw.circle(default_image, (200, 100, 200), 
+                             (TILE_SIZE//2, TILE_SIZE//2), TILE_SIZE//3)
+            pygame.draw.circle(default_image, (50, 50, 50), 
+                             (TILE_SIZE//2, TILE_SIZE//2), TILE_SIZE//6)
+        else:
+            # その他の未知のタイル - 識別できるパターン
+            default_image.fill((200, 200, 200))  # 灰色の背景
+            # 疑問符を描画
+            font = pygame.font.SysFont(None, 30)
+            text = font.render("?", True, (0, 0, 0))
+            default_image.blit(text, (TILE_SIZE//2 - text.get_width()//2, 
+                                    TILE_SIZE//2 - text.get_height()//2))
+            pygame.draw.rect(default_image, (100, 100, 100), (0, 0, TILE_SIZE, TILE_SIZE), 2)
+            
+        return default_image
+        
+    def get_composite_image(self, layers):
+        """複数の画像を下から順に重ねた合成画像を取得（初回のみ合成）"""
+        image = self.composites.get(layers)
+        if image is None:
+            image = self.get_image(layers[0]).copy()
+            for name in layers[1:]:
+                image.blit(self.get_image(name), (0, 0))
+            self.composites[layers] = image
         return image
         
+    def get_gradient(self, name, width, height):
+        """登録済みの縦グラデーションを描いたSurfaceを取得（サイズごとに初回のみ生成）"""
+        key = (name, width, height)
+        surface = self.gradients.get(key)
+        if surface is None:
+            color_func = GRADIENTS[name]
+            rows = [color_func(y, height)[:3] for y in range(height)]
+            surface = pygame.Surface((width, height))
+            if numpy is not None:
+                # 行の色を横方向に引き伸ばして一度に書き込む
+                column = numpy.array(rows, dtype=numpy.uint8)
+                pixels = numpy.broadcast_to(column[numpy.newaxis, :, :], (width, height, 3))
+                pygame.surfarray.blit_array(surface, pixels)
+            else:
+                for y, color in enumerate(rows):
+                    pygame.draw.line(surface, color, (0, y), (width, y))
+            self.gradients[key] = surface
+        return surface
+        
+    def get_overlay(self, width, height, color=DIM_OVERLAY_COLOR, alpha=None):
+        """半透明の塗りつぶしSurfaceを取得（サイズと色ごとに初回のみ生成）
+
+        alphaを指定すると、不透明の塗りつぶし1枚にSurface全体のアルファを設定して返す（フェードのように毎フレーム変わる透明度用）。
+        """
+        if alpha is not None:
+            key = (width, height, tuple(color[:3]), "surface_alpha")
+            surface = self.overlays.get(key)
+            if surface is None:
+                surface = pygame.Surface((width, height))
+                surface.fill(color[:3])
+                self.overlays[key] = surface
+            surface.set_alpha(alpha)
+            return surface
+        key = (width, height, tuple(color))
+        surface = self.overlays.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            surface.fill(color)
+            self.overlays[key] = surface
+        return surface
+        
+    def get_portal_frames(self):
+        """拡大率を変えたポータル画像の (画像, 中央寄せオフセット) の一覧を取得（初回のみ生成）"""
+        if self.portal_frames is None:
+            portal_img = self.get_image("portal")
+            self.portal_frames = []
+            for frame in range(PORTAL_ANIMATION_FRAMES):
+                pulse = (math.sin(2 * math.pi * frame / PORTAL_ANIMATION_FRAMES) + 1) / 2
+                scaled_size = int(TILE_SIZE * (1.0 + pulse * 0.2))  # 1.0～1.2倍
+                scaled = pygame.transform.scale(portal_img, (scaled_size, scaled_size))
+                self.portal_frames.append((scaled, (scaled_size - TILE_SIZE) // 2))
+        return self.portal_frames
+        
+    def get_portal_label(self, destination, frame):
+        """行き先名のラベル（半透明の背景付き）を取得。明るさ違いをフレームごとに用意しておく"""
+        labels = self.portal_labels.get(destination)
+        if labels is None:
+            by_brightness = {}
+            labels = []
+            for i in range(PORTAL_ANIMATION_FRAMES):
+                pulse = (math.sin(2 * math.pi * i / PORTAL_ANIMATION_FRAMES) + 1) / 2
+                brightness = int(200 + 55 * pulse)  # 200～255の間で明るさ変動
+                label = by_brightness.get(brightness)
+                if label is None:
+                    text = self.get_font("small").render(destination, True, (brightness, brightness, brightness))
+                    label = pygame.Surface((text.get_width() + 8, text.get_height() + 4), pygame.SRCALPHA)
+                    label.fill((0, 0, 50, 150))
+                    label.blit(text, (4, 2))
+                    by_brightness[brightness] = label
+                labels.append(label)
+            self.portal_labels[destination] = labels
+        return labels[frame]
+        
     def get_font(self, size="normal"):
         """サイズでフォントを取得"""
         return self.fonts.get(size)
         
-    def render_text(self, text, font_size="normal", color=WHITE):
-        """テキストをレンダリング"""
+    def get_text_cache_stats(self):
+        """テキストキャッシュの統計情報を取得"""
+        stats = dict(self.text_cache_stats)
+        stats["entries"] = len(self.text_cache)
+        stats["bytes"] = self.text_cache_bytes
+        return stats
+        
+    def clear_text_cache(self):
+        """テキストキャッシュを破棄"""
+        self.text_cache.clear()
+        self.text_cache_bytes = 0
+        
+    def render_text(self, text, font_size="normal", color=WHITE, antialias=True):
+        """テキストをレンダリング（LRUキャッシュ付き）"""
+        key = (text, font_size, tuple(color), antialias)
+        surface = self.text_cache.get(key)
+        if surface is not None:
+            self.text_cache.move_to_end(key)
+            self.text_cache_stats["hits"] += 1
+            return surface
+            
+        self.text_cache_stats["misses"] += 1
         font = self.get_font(font_size)
-        return font.render(text, True, color)
+        surface = font.render(text, antialias, color)
+        
+        self.text_cache[key] = surface
+        self.text_cache_bytes += surface.get_pitch() * surface.get_height()
+        
+        # 件数またはバイト数の上限を超えたら古いものから破棄
+        while len(self.text_cache) > TEXT_CACHE_MAX_ENTRIES or self.text_cache_bytes > TEXT_CACHE_MAX_BYTES:
+            _, evicted = self.text_cache.popitem(last=False)
+            self.text_cache_bytes -= evicted.get_pitch() * evicted.get_height()
+            self.text_cache_stats["evictions"] += 1
+            
+        return surface
+        
         # 山タイル
         mountain_tile = pygame.Surface((TILE_SIZE, TILE_SIZE))
         # 山の背景色
@@ -877,17 +1192,4 @@ class GameAssets:
             pygame.draw.line(door_tile, (80, 50, 20), 
                            (TILE_SIZE*3//4, 5 + i*10), (TILE_SIZE*3//4, 15 + i*10), 2)
         self.images["door"] = door_tile
-        # Inn icon (based on shop icon but with different colors and bed symbol)
-        inn_surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-        # Background (blue square)
-        pygame.draw.rect(inn_surface, (51, 102, 153), (5, 5, TILE_SIZE-10, TILE_SIZE-10))
-        pygame.draw.rect(inn_surface, BLACK, (5, 5, TILE_SIZE-10, TILE_SIZE-10), 2)
-        # Inn icon (bed)
-        pygame.draw.rect(inn_surface, (255, 255, 255), (10, TILE_SIZE//2-5, TILE_SIZE-20, TILE_SIZE//3))
-        pygame.draw.rect(inn_surface, (200, 200, 255), (10, TILE_SIZE//2-5, TILE_SIZE-20, 5))
-        # Pillow
-        pygame.draw.rect(inn_surface, (220, 220, 255), (12, TILE_SIZE//2-3, 8, 8))
-        # Zzz symbol for sleep
-        text = pygame.font.SysFont(None, 20).render("Zzz", True, (255, 255, 255))
-        inn_surface.blit(text, (TILE_SIZE//2, TILE_SIZE//4))
-        self.images["inn"] = inn_surface
+
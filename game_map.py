@@ -1,8 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 import random
 import math
+import pygame
+from collections import OrderedDict
+from game_assets import TILE_SIZE
+from tile_grid import TileGrid
+from spatial_hash import SpatialHash
+from chunked_map import ChunkedTileGrid, MAP_CHUNK_SIZE, MAP_CHUNK_PREFETCH
+from pathfinding import PathFinder
+from flow_field import FlowField, FLOW_FIELD_CACHE_MAX_ENTRIES
+from portal_graph import PortalGraph
+from minimap import Minimap, MINIMAP_SUPPORTED
+from map_pack import MAP_PACK_PATH, MAP_PACK_SEED, open_map_pack
 from fixed_maps import get_world_map, get_computing_town_map, get_storage_town_map, get_database_town_map, get_security_town_map
 
 # Tile types
@@ -34,20 +46,211 @@ MAP_WORLD = 0
 MAP_TOWN = 1
 MAP_DUNGEON = 2
 
+# タイルタイプごとの描画レイヤー（下から順に画像名）
+TILE_LAYERS = {}
+
+# 未登録のタイルは床として描画
+DEFAULT_TILE_LAYERS = ("floor",)
+
+def register_tile(tile_type, *layers):
+    """タイルタイプと描画する画像レイヤーを登録"""
+    TILE_LAYERS[tile_type] = layers
+    
+def get_tile_image(assets, tile_type):
+    """タイルタイプに対応する合成済みの画像を取得"""
+    return assets.get_composite_image(TILE_LAYERS.get(tile_type, DEFAULT_TILE_LAYERS))
+
+register_tile(TILE_EMPTY, "floor")  # 黒いタイルを防ぐため床を描画
+register_tile(TILE_FLOOR, "floor")
+register_tile(TILE_WALL, "wall")
+register_tile(TILE_GRASS, "grass")
+register_tile(TILE_WATER, "water")
+register_tile(TILE_ROAD, "road")
+register_tile(TILE_DOOR, "floor", "door")
+register_tile(TILE_NPC, "floor", "npc")
+register_tile(TILE_PORTAL, "floor")  # ポータル本体はアニメーションとして毎フレーム描画
+register_tile(TILE_SHOP, "floor", "shop")
+register_tile(TILE_MOUNTAIN, "mountain")
+register_tile(TILE_FOREST, "forest")
+register_tile(TILE_SAND, "sand")
+register_tile(TILE_FOUNTAIN, "floor", "fountain")
+register_tile(TILE_BENCH, "floor", "bench")
+register_tile(TILE_LAMP, "floor", "lamp")
+register_tile(TILE_SIGN, "floor", "sign")
+register_tile(TILE_FLOWERBED, "floor", "flowerbed")
+register_tile(TILE_STATUE, "floor", "statue")
+register_tile(TILE_TABLE, "floor", "table")
+register_tile(TILE_CHAIR, "floor", "chair")
+register_tile(TILE_INN, "floor", "inn")
+
+# タイルの属性フラグ
+PROP_WALKABLE = 0x01       # 歩行可能
+PROP_BLOCKS_VISION = 0x02  # 視界を遮る
+PROP_ENCOUNTER = 0x04      # 敵の出現対象
+PROP_INTERACTABLE = 0x08   # 調べる・話しかけるなどの対象
+
+# タイルタイプ（0～255）ごとの属性フラグ
+TILE_PROPERTIES = bytearray(256)
+
+# 属性フラグごとの変換テーブル（タイルタイプ -> 0/1）
+_property_tables = {}
+
+def set_tile_properties(tile_type, *properties):
+    """タイルタイプの属性フラグを登録"""
+    flags = 0
+    for prop in properties:
+        flags |= prop
+    TILE_PROPERTIES[tile_type] = flags
+    _property_tables.clear()
+    
+def has_tile_property(tile_type, prop):
+    """タイルタイプが属性フラグを持つかどうか"""
+    return TILE_PROPERTIES[tile_type] & prop != 0
+    
+def get_property_table(prop):
+    """bytes.translate 用の変換テーブル（属性を持つタイルは1、それ以外は0）"""
+    table = _property_tables.get(prop)
+    if table is None:
+        table = _property_tables[prop] = bytes(1 if flags & prop else 0 for flags in TILE_PROPERTIES)
+    return table
+    
+set_tile_properties(TILE_EMPTY)
+set_tile_properties(TILE_FLOOR, PROP_WALKABLE, PROP_ENCOUNTER)
+set_tile_properties(TILE_WALL, PROP_BLOCKS_VISION)
+set_tile_properties(TILE_GRASS, PROP_WALKABLE, PROP_ENCOUNTER)
+set_tile_properties(TILE_WATER)
+set_tile_properties(TILE_ROAD, PROP_WALKABLE, PROP_ENCOUNTER)
+set_tile_properties(TILE_DOOR, PROP_WALKABLE)
+set_tile_properties(TILE_NPC, PROP_WALKABLE, PROP_INTERACTABLE)
+set_tile_properties(TILE_PORTAL, PROP_WALKABLE, PROP_INTERACTABLE)
+set_tile_properties(TILE_SHOP, PROP_WALKABLE, PROP_INTERACTABLE)
+set_tile_properties(TILE_MOUNTAIN, PROP_BLOCKS_VISION)
+set_tile_properties(TILE_FOREST, PROP_BLOCKS_VISION)
+set_tile_properties(TILE_SAND)
+set_tile_properties(TILE_FOUNTAIN, PROP_WALKABLE)
+set_tile_properties(TILE_BENCH, PROP_WALKABLE)
+set_tile_properties(TILE_LAMP, PROP_WALKABLE)
+set_tile_properties(TILE_SIGN, PROP_WALKABLE, PROP_INTERACTABLE)
+set_tile_properties(TILE_FLOWERBED, PROP_WALKABLE)
+set_tile_properties(TILE_STATUE, PROP_BLOCKS_VISION)
+set_tile_properties(TILE_TABLE)
+set_tile_properties(TILE_CHAIR)
+set_tile_properties(TILE_INN, PROP_WALKABLE, PROP_INTERACTABLE)
+
+# ミニマップでのタイルタイプ（0～255）ごとの色（RGBを3バイトずつ並べたもの。未登録のタイルは床の色）
+TILE_MINIMAP_COLORS = bytearray((170, 170, 170)) * 256
+
+def set_minimap_color(tile_type, color):
+    """タイルタイプのミニマップでの色を登録"""
+    TILE_MINIMAP_COLORS[tile_type * 3:tile_type * 3 + 3] = bytes(color)
+    
+set_minimap_color(TILE_EMPTY, (60, 60, 60))
+set_minimap_color(TILE_WALL, (110, 85, 70))
+set_minimap_color(TILE_GRASS, (90, 180, 90))
+set_minimap_color(TILE_WATER, (60, 120, 230))
+set_minimap_color(TILE_ROAD, (215, 195, 150))
+set_minimap_color(TILE_DOOR, (140, 90, 40))
+set_minimap_color(TILE_SHOP, (200, 140, 60))
+set_minimap_color(TILE_MOUNTAIN, (130, 120, 110))
+set_minimap_color(TILE_FOREST, (40, 120, 50))
+set_minimap_color(TILE_SAND, (230, 210, 150))
+set_minimap_color(TILE_FOUNTAIN, (120, 170, 230))
+set_minimap_color(TILE_FLOWERBED, (220, 120, 140))
+set_minimap_color(TILE_STATUE, (205, 205, 210))
+set_minimap_color(TILE_INN, (90, 130, 200))
+
+# トリガーの発生タイミング
+TRIGGER_STEP = "step"          # タイルに乗ったとき
+TRIGGER_INTERACT = "interact"  # Eキーで調べたとき
+
+# NPC・ショップに話しかけられる距離（タイル数）
+NPC_TALK_RADIUS = 2
+SHOP_INTERACT_RADIUS = 1
+
+# 同じタイルに複数のトリガーがあるときの実行順（小さいほど先）
+TRIGGER_PRIORITY = {"portal": 0, "npc": 1, "shop": 2, "inn": 3, "quest": 4}
+
+# 静的レイヤーのチャンクサイズ（タイル数）
+STATIC_CHUNK_SIZE = 16
+
+# チャンクのタイルデータと静的レイヤーの描画済みSurfaceに使うメモリの上限（バイト）
+MAP_MEMORY_BUDGET = 32 * 1024 * 1024
+
+# 静的レイヤーに焼き込まず毎フレーム描画するタイル
+OVERLAY_TILES = (TILE_PORTAL, TILE_INN)
+
+class StreamedPropertyMask:
+    """ストリーミングするマップ用の属性マスク（get_property_maskと同じくインデックスで0/1を返す）"""
+    def __init__(self, game_map, prop):
+        self.game_map = game_map
+        self.prop = prop
+        
+    def __getitem__(self, index):
+        y, x = divmod(index, self.game_map.width)
+        return 1 if self.game_map.has_property(x, y, self.prop) else 0
+        
+class RoutingMap:
+    """まだ作成していないマップの、ポータルの経路表を作るためのビュー（GameMapを作らず基本レイアウトから歩行可能ビットマップだけを作る）"""
+        
+    def __init__(self, layout, tile_overlays=None):
+        self.name = layout["name"]
+        self.width = layout["width"]
+        self.height = layout["height"]
+        self.portals = layout.get("portals", [])
+        self.streamed = False
+        self.tiles_version = 0
+        self._walkable = bytearray(bytes(layout["tiles"].data).translate(get_property_table(PROP_WALKABLE)))
+        # セーブデータのタイルの変更を反映
+        for position, tile_type in (tile_overlays or {}).items():
+            x, y = map(int, position.split(","))
+            self._walkable[y * self.width + x] = 1 if has_tile_property(tile_type, PROP_WALKABLE) else 0
+        self._flow_fields = {}
+        
+    def get_flow_field(self, x, y):
+        """(x, y) へ向かう距離場（目的地ごとにキャッシュ）"""
+        field = self._flow_fields.get((x, y))
+        if field is None:
+            field = self._flow_fields[(x, y)] = FlowField(self._walkable, self.width, self.height, x, y)
+        return field
+        
 class GameMap:
-    def __init__(self, name, width, height, map_type=MAP_WORLD):
+    def __init__(self, name, width, height, map_type=MAP_WORLD, generate=True):
         self.name = name
         self.width = width
         self.height = height
         self.map_type = map_type
-        self.tiles = [[TILE_EMPTY for _ in range(width)] for _ in range(height)]
+        self._static_chunks = OrderedDict()  # 最近使った順
+        self._static_assets = None
+        self._static_format_version = None
+        self._overlay_tiles = None
+        self.memory_budget = MAP_MEMORY_BUDGET
+        self._keep_chunks = set()  # 最後に stream_around で残したチャンク（カメラ付近）
+        self._keep_static = set()
+        self._streaming = False
+        self._property_masks = {}
+        self._path_finder = None
+        self._flow_fields = OrderedDict()  # 目的地 (x, y) -> FlowField（最近使った順）
+        self._flow_fields_version = 0
+        self._minimap = None
+        self.tiles_version = 0  # タイルが変わるたびに増える（経路キャッシュ・距離場の破棄に使う）
+        self._portals = []
+        self._portal_index = SpatialHash()
+        self._npcs = []
+        self._npc_index = SpatialHash()
+        self._shops = []
+        self._shop_index = SpatialHash()
+        self._triggers = []
+        self._trigger_map = None
+        self.tiles = TileGrid(width, height, TILE_EMPTY)
         self.npcs = []
         self.portals = []
         self.enemies = []
         self.shops = []
         self.encounter_rate = 0.05  # エンカウント率（マップタイプによって変更）
         
-        # マップタイプに応じた初期化
+        # マップタイプに応じた初期化（generate=Falseなら空のまま）
+        if not generate:
+            return
         if map_type == MAP_WORLD:
             self.generate_world_map()
             self.encounter_rate = 0.03
@@ -58,10 +261,343 @@ class GameMap:
             self.generate_dungeon_map()
             self.encounter_rate = 0.08  # ダンジョンではエンカウント率高め
             
+    @classmethod
+    def from_chunk_loader(cls, name, width, height, load_chunk, map_type=MAP_WORLD, chunk_size=MAP_CHUNK_SIZE):
+        """チャンク単位で読み込む大きなマップを作成（load_chunk(chunk_x, chunk_y, width, height) がTileGridを返す）"""
+        game_map = cls(name, width, height, map_type, generate=False)
+        game_map.tiles = ChunkedTileGrid(width, height, load_chunk, chunk_size)
+        return game_map
+        
+    @property
+    def tiles(self):
+        """タイルデータ（TileGridかChunkedTileGrid。tiles[y][x] で読み書きできる）"""
+        return self._tiles
+        
+    @tiles.setter
+    def tiles(self, tiles):
+        # 従来形式（リストのリスト）はTileGridに変換して保持する
+        if not isinstance(tiles, (TileGrid, ChunkedTileGrid)):
+            tiles = TileGrid.from_rows(tiles)
+        if isinstance(tiles, ChunkedTileGrid):
+            tiles.on_load = self._chunk_loaded
+        self._tiles = tiles
+        self.tiles_changed()
+        
+    @property
+    def streamed(self):
+        """タイルをチャンク単位で読み込むマップかどうか"""
+        return isinstance(self._tiles, ChunkedTileGrid)
+        
+    @property
+    def portals(self):
+        """ポータル情報のリスト"""
+        return self._portals
+        
+    @portals.setter
+    def portals(self, portals):
+        self._portals = portals
+        self._portal_index.rebuild(portals)
+        self._overlay_tiles = None
+        self._trigger_map = None
+        
+    @property
+    def npcs(self):
+        """NPC情報のリスト"""
+        return self._npcs
+        
+    @npcs.setter
+    def npcs(self, npcs):
+        self._npcs = npcs
+        self._npc_index.rebuild(npcs)
+        self._trigger_map = None
+        
+    @property
+    def shops(self):
+        """ショップ情報のリスト"""
+        return self._shops
+        
+    @shops.setter
+    def shops(self, shops):
+        self._shops = shops
+        self._shop_index.rebuild(shops)
+        self._trigger_map = None
+        
+    @property
+    def triggers(self):
+        """マップデータで定義したトリガー（クエストイベントなど）のリスト"""
+        return self._triggers
+        
+    @triggers.setter
+    def triggers(self, triggers):
+        self._triggers = triggers
+        self._trigger_map = None
+        
+    def set_tile(self, x, y, tile_type):
+        """タイルを変更し、該当する静的レイヤーのチャンクを破棄"""
+        if self._tiles[y][x] == tile_type:
+            return
+        self._tiles[y][x] = tile_type
+        self.tiles_changed(x, y, 1, 1)
+        
+    def tiles_changed(self, x=None, y=None, width=1, height=1):
+        """tilesを直接書き換えた後に呼ぶ（静的レイヤーと属性マスクを更新。範囲指定がなければ全体）"""
+        self.invalidate_static_layer(x, y, width, height)
+        self._trigger_map = None
+        self.tiles_version += 1
+        if self._minimap is not None:
+            self._minimap.mark_dirty(x, y, width, height)
+        if x is None or y is None:
+            self._property_masks = {}
+            return
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + width), min(self.height, y + height)
+        for prop, mask in self._property_masks.items():
+            table = get_property_table(prop)
+            for row_y in range(y0, y1):
+                start = row_y * self.width
+                mask[start + x0:start + x1] = self._tiles.data[start + x0:start + x1].translate(table)
+                
+    def get_property_mask(self, prop):
+        """属性フラグのビットマップ（1タイル1バイト、行優先。属性を持つタイルは1）"""
+        if self.streamed:
+            raise ValueError("streamed maps have no whole-map property mask")
+        mask = self._property_masks.get(prop)
+        if mask is None:
+            mask = self._property_masks[prop] = self._tiles.data.translate(get_property_table(prop))
+        return mask
+        
+    def has_property(self, x, y, prop):
+        """(x, y) のタイルが属性フラグを持つかどうか（マップ範囲外はFalse）"""
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+        if self.streamed:
+            return has_tile_property(self._tiles.get(x, y), prop)
+        return self.get_property_mask(prop)[y * self.width + x] == 1
+        
+    def get_walkable_grid(self):
+        """経路探索用の歩行可能ビットマップ（ストリーミングするマップはタイルを読みながら判定するビュー）"""
+        if self.streamed:
+            return StreamedPropertyMask(self, PROP_WALKABLE)
+        return self.get_property_mask(PROP_WALKABLE)
+        
+    @property
+    def path_finder(self):
+        """このマップの経路探索（キャッシュ付き）"""
+        if self._path_finder is None:
+            self._path_finder = PathFinder(self)
+        return self._path_finder
+        
+    def find_path(self, start, goal):
+        """start から goal への歩行可能な経路（(x, y) のリスト、見つからなければNone）"""
+        return self.path_finder.find_path(start, goal)
+        
+    def get_flow_field(self, x, y):
+        """(x, y) へ向かう距離場（目的地ごとにキャッシュし、タイルが変わったら作り直す）"""
+        if self._flow_fields_version != self.tiles_version:
+            self._flow_fields.clear()
+            self._flow_fields_version = self.tiles_version
+        key = (x, y)
+        field = self._flow_fields.get(key)
+        if field is not None:
+            self._flow_fields.move_to_end(key)
+            return field
+        field = self._flow_fields[key] = FlowField(self.get_walkable_grid(), self.width, self.height, x, y)
+        if len(self._flow_fields) > FLOW_FIELD_CACHE_MAX_ENTRIES:
+            self._flow_fields.popitem(last=False)
+        return field
+        
+    def get_minimap(self):
+        """このマップのミニマップ（初回のみ作成し、タイルが変わった部分だけ書き直す。numpyが無ければNone）"""
+        if self._minimap is None and MINIMAP_SUPPORTED:
+            self._minimap = Minimap(self, TILE_MINIMAP_COLORS)
+        return self._minimap
+        
+    def invalidate_static_layer(self, x=None, y=None, width=1, height=1):
+        """静的レイヤーのキャッシュを破棄（範囲指定がなければ全体）"""
+        self._overlay_tiles = None
+        if x is None or y is None:
+            self._static_chunks = OrderedDict()
+            return
+        for chunk_y in range(y // STATIC_CHUNK_SIZE, (y + height - 1) // STATIC_CHUNK_SIZE + 1):
+            for chunk_x in range(x // STATIC_CHUNK_SIZE, (x + width - 1) // STATIC_CHUNK_SIZE + 1):
+                self._static_chunks.pop((chunk_x, chunk_y), None)
+                
+    def get_static_chunk(self, chunk_x, chunk_y, assets):
+        """静的タイルレイヤーのチャンクを取得（初回のみ描画。画像が画面のピクセル形式に変換し直されたら描き直す）"""
+        if assets is not self._static_assets or assets.display_format_version != self._static_format_version:
+            self._static_chunks = OrderedDict()
+            self._static_assets = assets
+            self._static_format_version = assets.display_format_version
+            
+        chunk = self._static_chunks.get((chunk_x, chunk_y))
+        if chunk is not None:
+            self._static_chunks.move_to_end((chunk_x, chunk_y))
+            return chunk
+            
+        start_x = chunk_x * STATIC_CHUNK_SIZE
+        start_y = chunk_y * STATIC_CHUNK_SIZE
+        end_x = min(start_x + STATIC_CHUNK_SIZE, self.width)
+        end_y = min(start_y + STATIC_CHUNK_SIZE, self.height)
+        
+        chunk = pygame.Surface(((end_x - start_x) * TILE_SIZE, (end_y - start_y) * TILE_SIZE))
+        for y in range(start_y, end_y):
+            row = self._tiles.row(y, start_x, end_x)
+            for i, tile_type in enumerate(row):
+                chunk.blit(get_tile_image(assets, tile_type), (i * TILE_SIZE, (y - start_y) * TILE_SIZE))
+                
+        self._static_chunks[(chunk_x, chunk_y)] = chunk
+        return chunk
+        
+    def _chunk_loaded(self, chunk_x, chunk_y):
+        """ストリーミングでチャンクを読み込んだとき（ポータル・宿屋の一覧を作り直し、ミニマップに書き込む）"""
+        self._overlay_tiles = None
+        self._trigger_map = None
+        if self._minimap is not None:
+            size = self._tiles.chunk_size
+            self._minimap.mark_dirty(chunk_x * size, chunk_y * size, size, size)
+        # カメラ以外（経路探索やトリガーの判定など）で読み込んだときもメモリの上限を守る
+        if not self._streaming:
+            self.trim_memory(self._keep_chunks | {(chunk_x, chunk_y)}, self._keep_static)
+        
+    def stream_around(self, camera_x, camera_y, view_width, view_height):
+        """カメラ付近のチャンクを先読みし、メモリの上限を超えたら遠い（長く使っていない）チャンクを破棄"""
+        chunk_pixels = STATIC_CHUNK_SIZE * TILE_SIZE
+        keep_static = set(
+            (chunk_x, chunk_y)
+            for chunk_y in range(max(0, camera_y // chunk_pixels), (camera_y + view_height - 1) // chunk_pixels + 1)
+            for chunk_x in range(max(0, camera_x // chunk_pixels), (camera_x + view_width - 1) // chunk_pixels + 1)
+        )
+        
+        keep_chunks = set()
+        if self.streamed:
+            size = self._tiles.chunk_size * TILE_SIZE
+            last_x = (self.width - 1) // self._tiles.chunk_size
+            last_y = (self.height - 1) // self._tiles.chunk_size
+            # 先読み中は1チャンクごとに破棄せず、最後にまとめて上限を守る
+            self._streaming = True
+            try:
+                for chunk_y in range(max(0, camera_y // size - MAP_CHUNK_PREFETCH), min(last_y, (camera_y + view_height - 1) // size + MAP_CHUNK_PREFETCH) + 1):
+                    for chunk_x in range(max(0, camera_x // size - MAP_CHUNK_PREFETCH), min(last_x, (camera_x + view_width - 1) // size + MAP_CHUNK_PREFETCH) + 1):
+                        self._tiles.get_chunk(chunk_x, chunk_y)
+                        keep_chunks.add((chunk_x, chunk_y))
+            finally:
+                self._streaming = False
+                
+        self._keep_chunks = keep_chunks
+        self._keep_static = keep_static
+        self.trim_memory(keep_chunks, keep_static)
+        
+    def memory_usage(self):
+        """読み込み済みのタイルデータと描画済みSurfaceのバイト数"""
+        usage = sum(self._surface_memory(surface) for surface in self._static_chunks.values())
+        if self.streamed:
+            usage += sum(len(chunk.data) for chunk in self._tiles.chunks.values())
+        return usage
+        
+    def _surface_memory(self, surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+        
+    def trim_memory(self, keep_chunks=(), keep_static=()):
+        """メモリの上限を超えていれば、最近使っていないチャンクをSurfaceごと破棄"""
+        usage = self.memory_usage()
+        if usage <= self.memory_budget:
+            return
+            
+        if self.streamed:
+            size = self._tiles.chunk_size
+            for key in list(self._tiles.chunks):
+                if usage <= self.memory_budget:
+                    return
+                if key in keep_chunks:
+                    continue
+                usage -= self._tiles.chunk_memory(*key)
+                self._tiles.evict(*key)
+                # チャンク内の静的レイヤーも破棄
+                for static_y in range(key[1] * size // STATIC_CHUNK_SIZE, ((key[1] + 1) * size - 1) // STATIC_CHUNK_SIZE + 1):
+                    for static_x in range(key[0] * size // STATIC_CHUNK_SIZE, ((key[0] + 1) * size - 1) // STATIC_CHUNK_SIZE + 1):
+                        surface = self._static_chunks.pop((static_x, static_y), None)
+                        if surface is not None:
+                            usage -= self._surface_memory(surface)
+                self._overlay_tiles = None
+                self._trigger_map = None
+                
+        for key in list(self._static_chunks):
+            if usage <= self.memory_budget:
+                return
+            if key not in keep_static:
+                usage -= self._surface_memory(self._static_chunks.pop(key))
+                
+    def draw_static_layer(self, screen, assets, camera_x, camera_y):
+        """カメラ範囲の静的レイヤーをチャンク単位で描画"""
+        chunk_pixels = STATIC_CHUNK_SIZE * TILE_SIZE
+        view_width, view_height = screen.get_size()
+        
+        first_x = max(0, camera_x // chunk_pixels)
+        first_y = max(0, camera_y // chunk_pixels)
+        last_x = min((self.width - 1) // STATIC_CHUNK_SIZE, (camera_x + view_width - 1) // chunk_pixels)
+        last_y = min((self.height - 1) // STATIC_CHUNK_SIZE, (camera_y + view_height - 1) // chunk_pixels)
+        
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                chunk = self.get_static_chunk(chunk_x, chunk_y, assets)
+                screen.blit(chunk, (chunk_x * chunk_pixels - camera_x, chunk_y * chunk_pixels - camera_y))
+                
+    def add_trigger(self, x, y, on, trigger_type, radius=0, **data):
+        """トリガーを追加（onはTRIGGER_STEP/TRIGGER_INTERACT、radiusはチェビシェフ距離での有効範囲）"""
+        trigger = {"x": x, "y": y, "on": on, "type": trigger_type, "radius": radius}
+        trigger.update(data)
+        self._triggers.append(trigger)
+        self._trigger_map = None
+        return trigger
+        
+    def get_triggers(self, x, y, on):
+        """(x, y) で発生するトリガーを実行順で取得"""
+        if self._trigger_map is None:
+            self._trigger_map = self._build_trigger_map()
+        return self._trigger_map.get((x, y, on), ())
+        
+    def _build_trigger_map(self):
+        """ポータル・NPC・ショップ・宿屋・定義済みトリガーから (x, y, タイミング) -> トリガー一覧 の表を作る"""
+        records = []
+        for portal in self._portals:
+            records.append({"x": portal["x"], "y": portal["y"], "on": TRIGGER_STEP, "type": "portal", "radius": 0, "portal": portal})
+        for npc in self._npcs:
+            records.append({"x": npc["x"], "y": npc["y"], "on": TRIGGER_INTERACT, "type": "npc", "radius": NPC_TALK_RADIUS, "npc": npc})
+        for shop in self._shops:
+            records.append({"x": shop["x"], "y": shop["y"], "on": TRIGGER_INTERACT, "type": "shop", "radius": SHOP_INTERACT_RADIUS, "shop": shop})
+        for x, y in self._tiles.find_all(TILE_INN):
+            records.append({"x": x, "y": y, "on": TRIGGER_INTERACT, "type": "inn", "radius": 0})
+        records.extend(self._triggers)
+        
+        trigger_map = {}
+        for order, trigger in enumerate(records):
+            radius = trigger.get("radius", 0)
+            priority = TRIGGER_PRIORITY.get(trigger["type"], len(TRIGGER_PRIORITY))
+            for y in range(max(0, trigger["y"] - radius), min(self.height, trigger["y"] + radius + 1)):
+                for x in range(max(0, trigger["x"] - radius), min(self.width, trigger["x"] + radius + 1)):
+                    # 同じ種類なら近いもの、同じ距離なら先に登録されたものを優先
+                    distance = max(abs(x - trigger["x"]), abs(y - trigger["y"]))
+                    trigger_map.setdefault((x, y, trigger["on"]), []).append(((priority, distance, order), trigger))
+                    
+        for key, items in trigger_map.items():
+            items.sort(key=lambda item: item[0])
+            trigger_map[key] = [trigger for _, trigger in items]
+        return trigger_map
+        
+    def get_overlay_tiles(self):
+        """毎フレーム描画が必要なタイル（ポータル・宿屋）の一覧を (x, y, タイル, ポータル情報) で取得"""
+        if self._overlay_tiles is None:
+            portals = {(portal["x"], portal["y"]): portal for portal in self._portals}
+            self._overlay_tiles = [
+                (x, y, self._tiles.get(x, y), portals.get((x, y)))
+                for x, y in self._tiles.find_all(*OVERLAY_TILES)
+            ]
+        return self._overlay_tiles
+        
     @classmethod
     def from_map_data(cls, map_data):
         """マップデータからGameMapオブジェクトを作成"""
-        game_map = cls(map_data["name"], map_data["width"], map_data["height"])
+        game_map = cls(map_data["name"], map_data["width"], map_data["height"], map_data.get("map_type", MAP_WORLD), generate=False)
         game_map.tiles = map_data["tiles"]
         game_map.portals = map_data["portals"]
         game_map.npcs = map_data["npcs"]
@@ -74,6 +610,9 @@ class GameMap:
         else:
             game_map.shops = []
             
+        if "triggers" in map_data:
+            game_map.triggers = map_data["triggers"]
+            
         return game_map
             
     def generate_world_map(self):
@@ -809,17 +1348,9 @@ class GameMap:
         if x < 0 or y < 0 or x + width >= self.width or y + height >= self.height:
             return False
             
-        # 建物の外周を壁にする
-        for dx in range(width):
-            for dy in range(height):
-                if dx == 0 or dx == width - 1 or dy == 0 or dy == height - 1:
-                    # 範囲チェック
-                    if 0 <= y+dy < self.height and 0 <= x+dx < self.width:
-                        self.tiles[y+dy][x+dx] = TILE_WALL
-                else:
-                    # 範囲チェック
-                    if 0 <= y+dy < self.height and 0 <= x+dx < self.width:
-                        self.tiles[y+dy][x+dx] = TILE_FLOOR
+        # 建物の外周を壁、内側を床にする
+        self.tiles.fill_region(x, y, width, height, TILE_FLOOR)
+        self.tiles.fill_border(x, y, width, height, TILE_WALL)
                     
         # ドアを配置（下側の中央）
         door_x = x + width // 2
@@ -828,13 +1359,14 @@ class GameMap:
         if 0 <= door_y < self.height and 0 <= door_x < self.width:
             self.tiles[door_y][door_x] = TILE_DOOR
             
+        self.tiles_changed(x, y, width, height)
         return True
         
     def add_npc(self, x, y, name, dialog, is_service=False, service_id=None):
         """NPCを追加"""
         # タイルをNPCに設定
         if 0 <= y < self.height and 0 <= x < self.width:
-            self.tiles[y][x] = TILE_NPC
+            self.set_tile(x, y, TILE_NPC)
             
         npc_data = {
             "x": x,
@@ -847,29 +1379,38 @@ class GameMap:
             npc_data["is_service"] = True
             npc_data["service_id"] = service_id or name.lower()
             
-        self.npcs.append(npc_data)
+        self._npcs.append(npc_data)
+        self._npc_index.insert(npc_data)
+        self._trigger_map = None
         
     def add_portal(self, x, y, destination, dest_x, dest_y):
         """ポータルを追加"""
-        self.tiles[y][x] = TILE_PORTAL
-        self.portals.append({
+        self.set_tile(x, y, TILE_PORTAL)
+        portal = {
             "x": x,
             "y": y,
             "destination": destination,
             "dest_x": dest_x,
             "dest_y": dest_y
-        })
+        }
+        self._portals.append(portal)
+        self._portal_index.insert(portal)
+        self._overlay_tiles = None
+        self._trigger_map = None
         
     def add_shop(self, x, y, name, shop_type, dialog):
         """ショップを追加"""
-        self.tiles[y][x] = TILE_SHOP
-        self.shops.append({
+        self.set_tile(x, y, TILE_SHOP)
+        shop = {
             "x": x,
             "y": y,
             "name": name,
             "type": shop_type,
             "dialog": dialog
-        })
+        }
+        self._shops.append(shop)
+        self._shop_index.insert(shop)
+        self._trigger_map = None
         
     def place_random_enemies(self, count):
         """敵をランダムに配置"""
@@ -879,8 +1420,8 @@ class GameMap:
             x = random.randint(1, self.width - 2)
             y = random.randint(1, self.height - 2)
             
-            # 床、草、道の上にのみ敵を配置
-            if self.tiles[y][x] in [TILE_FLOOR, TILE_GRASS, TILE_ROAD]:
+            # 敵の出現対象のタイル（床、草、道）の上にのみ敵を配置
+            if has_tile_property(self.tiles.get(x, y), PROP_ENCOUNTER):
                 enemy_type = random.choice(["weak", "normal", "strong"])
                 self.enemies.append({
                     "type": enemy_type
@@ -888,18 +1429,8 @@ class GameMap:
                 
     def is_walkable(self, x, y):
         """指定位置が歩行可能かどうか"""
-        # マップ範囲外は歩行不可
-        if x < 0 or y < 0 or x >= self.width or y >= self.height:
-            return False
-            
-        # タイルタイプによって歩行可能かどうかを判定
-        tile_type = self.tiles[y][x]
-        
-        # 歩行可能なタイル
-        walkable_tiles = [TILE_FLOOR, TILE_GRASS, TILE_ROAD, TILE_DOOR, TILE_NPC, TILE_PORTAL, TILE_SHOP,
-                          TILE_FOUNTAIN, TILE_BENCH, TILE_LAMP, TILE_SIGN, TILE_FLOWERBED, TILE_INN]
-        
-        return tile_type in walkable_tiles
+        # マップ範囲外は歩行不可。タイルの判定は歩行可能ビットマップを参照
+        return self.has_property(x, y, PROP_WALKABLE)
         
     def get_npc_at(self, x, y):
         """Get NPC at the specified position or adjacent tiles"""
@@ -908,18 +1439,12 @@ class GameMap:
             if x < 0 or y < 0 or x >= self.width or y >= self.height:
                 return None
                 
-            # First check exact position
-            if self.tiles[y][x] == TILE_NPC:
-                for npc in self.npcs:
-                    if npc["x"] == x and npc["y"] == y:
-                        return npc
-            
-            # Then check adjacent tiles (for easier interaction)
-            for npc in self.npcs:
-                if abs(npc["x"] - x) <= 1 and abs(npc["y"] - y) <= 1:
-                    return npc
-                    
-            return None
+            # First check exact position, then adjacent tiles (for easier interaction)
+            npc = self._npc_index.get_at(x, y)
+            if npc is None:
+                nearby = self._npc_index.query_radius(x, y, 1)
+                npc = nearby[0] if nearby else None
+            return npc
         except Exception as e:
             print(f"Error in get_npc_at({x}, {y}): {e}")
             return None
@@ -929,10 +1454,8 @@ class GameMap:
         if x < 0 or y < 0 or x >= self.width or y >= self.height:
             return None
             
-        if self.tiles[y][x] == TILE_PORTAL:
-            for portal in self.portals:
-                if portal["x"] == x and portal["y"] == y:
-                    return portal
+        if self._tiles.get(x, y) == TILE_PORTAL:
+            return self._portal_index.get_at(x, y)
         return None
         
     def get_shop_at(self, x, y):
@@ -942,162 +1465,184 @@ class GameMap:
             if x < 0 or y < 0 or x >= self.width or y >= self.height:
                 return None
                 
-            # First check exact position
-            if self.tiles[y][x] == TILE_SHOP:
-                for shop in self.shops:
-                    if shop["x"] == x and shop["y"] == y:
-                        return shop
-            
-            # Then check adjacent tiles (for easier interaction)
-            for shop in self.shops:
-                if abs(shop["x"] - x) <= 1 and abs(shop["y"] - y) <= 1:
-                    return shop
-                    
-            return None
+            # First check exact position, then adjacent tiles (for easier interaction)
+            shop = self._shop_index.get_at(x, y)
+            if shop is None:
+                nearby = self._shop_index.query_radius(x, y, 1)
+                shop = nearby[0] if nearby else None
+            return shop
         except Exception as e:
             print(f"Error in get_shop_at({x}, {y}): {e}")
             return None
         
+    def get_npcs_in_rect(self, x, y, width, height):
+        """矩形範囲（タイル座標）内のNPCをリストの順で取得"""
+        return self._npc_index.query_rect(x, y, width, height)
+        
+    def get_shops_in_rect(self, x, y, width, height):
+        """矩形範囲（タイル座標）内のショップをリストの順で取得"""
+        return self._shop_index.query_rect(x, y, width, height)
+        
+    def get_portals_in_rect(self, x, y, width, height):
+        """矩形範囲（タイル座標）内のポータルをリストの順で取得"""
+        return self._portal_index.query_rect(x, y, width, height)
+        
     def check_random_encounter(self):
         """Check for random encounters"""
         return random.random() < self.encounter_rate
 
+# マップ名 -> (固定マップデータを作る関数, マップタイプ)
+MAP_BUILDERS = {}
+
+# プロセス全体で共有する基本レイアウト（一度だけ作り、変更しない）
+_base_layouts = {}
+
+# 開いているマップパック（Noneなら未オープン、Falseなら使えない）
+_map_pack = None
+
+def register_map(name, builder, map_type=MAP_TOWN):
+    """マップ名と固定マップデータを作る関数を登録"""
+    global _map_pack
+    MAP_BUILDERS[name] = (builder, map_type)
+    _base_layouts.pop(name, None)
+    _map_pack = None  # 登録内容が変わったのでパックを確認し直す
+    
+def build_layout(name):
+    """固定マップデータを生成（パックの有無で結果が変わらないよう乱数を固定し、ゲームの乱数は元に戻す）"""
+    builder, map_type = MAP_BUILDERS[name]
+    state = random.getstate()
+    random.seed(f"{MAP_PACK_SEED}:{name}")
+    try:
+        layout = builder()
+    finally:
+        random.setstate(state)
+    layout["map_type"] = map_type
+    return layout
+    
+def get_map_pack():
+    """コンパイル済みのマップパックを取得（古ければ作り直す。使えなければNone）"""
+    global _map_pack
+    if _map_pack is None:
+        try:
+            _map_pack = open_map_pack(MAP_PACK_PATH, MAP_BUILDERS, build_layout)
+        except (OSError, ValueError) as e:
+            print(f"マップパックを使わずにマップを生成します: {e}")
+            _map_pack = False
+    return _map_pack or None
+    
+def _discard_map_pack():
+    """壊れたマップパックを使わないようにし、ファイルも削除する（次回の起動で作り直す。読み込み済みのレイアウトは使い続ける）"""
+    global _map_pack
+    _map_pack = False
+    try:
+        os.remove(MAP_PACK_PATH)
+    except OSError:
+        pass
+    
+def get_base_layout(name):
+    """基本レイアウト（固定マップデータ）を取得。マップパックから読み、無ければ生成してキャッシュする"""
+    layout = _base_layouts.get(name)
+    if layout is None and name in MAP_BUILDERS:
+        pack = get_map_pack()
+        try:
+            layout = pack.get_layout(name) if pack else None
+        except ValueError as e:
+            # エンティティ表が壊れている（JSONDecodeError・UnicodeDecodeErrorはValueErrorの一種）。次回の起動で作り直す
+            print(f"マップパックの {name} が壊れているためマップを生成します: {e}")
+            layout = None
+            _discard_map_pack()
+        if layout is None:
+            layout = build_layout(name)
+        _base_layouts[name] = layout
+    return layout
+    
+def get_map_type(name):
+    """登録済みのマップのタイプ（マップを作らずに引ける。未登録ならNone）"""
+    entry = MAP_BUILDERS.get(name)
+    return None if entry is None else entry[1]
+    
+register_map("AWS Cloud World", get_world_map, MAP_WORLD)
+register_map("Computing Town", get_computing_town_map)
+register_map("Storage Town", get_storage_town_map)
+register_map("Database Town", get_database_town_map)
+register_map("Security Town", get_security_town_map)
+
+# 新しいゲームを始める位置（マップ名, x, y）。中央の十字路
+START_POSITION = ("AWS Cloud World", 25, 25)
+
 class MapManager:
     def __init__(self):
-        self.maps = {}
+        self.maps = {}      # 作成済みのマップ（get_mapで初めて作る）
+        self.overlays = {}  # セーブデータごとの変更（マップ名 -> {"tiles": {"x,y": タイル}}）
         self.current_map = None
-        self.generate_maps()
-        
-    def generate_maps(self):
-        """マップを生成"""
-        # 固定マップを使用
-        self.maps["AWS Cloud World"] = GameMap.from_map_data(get_world_map())
-        self.maps["Computing Town"] = GameMap.from_map_data(get_computing_town_map())
-        self.maps["Storage Town"] = GameMap.from_map_data(get_storage_town_map())
-        self.maps["Database Town"] = GameMap.from_map_data(get_database_town_map())
-        self.maps["Security Town"] = GameMap.from_map_data(get_security_town_map())
-        
-    def get_map(self, map_name):
-        """マップ名からマップを取得"""
-        return self.maps.get(map_name, None)
-    def get_portal_at(self, x, y):
-        """指定座標のポータル情報を取得"""
-        for portal in self.portals:
-            if portal["x"] == x and portal["y"] == y:
-                return portal
-        return None
+        self._portal_graph = None
+        self._routing_maps = {}  # まだ作成していないマップの経路用ビュー
         
-    def place_building(self, x, y, width, height):
-        """建物を配置（壁と床）"""
-        # 外周を壁に
-        for bx in range(x, x + width):
-            for by in range(y, y + height):
-                if bx == x or bx == x + width - 1 or by == y or by == y + height - 1:
-                    self.tiles[by][bx] = TILE_WALL
-                else:
-                    self.tiles[by][bx] = TILE_FLOOR
-                    
-        # ドアを配置（建物の下側中央）
-        door_x = x + width // 2
-        door_y = y + height - 1
-        self.tiles[door_y][door_x] = TILE_DOOR
-    def get_portal_at(self, x, y):
-        """指定座標のポータル情報を取得"""
-        for portal in self.portals:
-            if portal["x"] == x and portal["y"] == y:
-                return portal
-        return None
-class MapManager:
-    def __init__(self):
+    def reset(self):
+        """新しいゲーム用に作成済みのマップとセーブデータごとの変更を破棄"""
         self.maps = {}
+        self.overlays = {}
         self.current_map = None
-        self.generate_maps()
-        
-    def generate_maps(self):
-        """マップを生成"""
-        # ワールドマップ
-        self.maps["AWS Cloud World"] = GameMap.from_map_data(get_world_map())
-        
-        # 町マップ
-        self.maps["Computing Town"] = GameMap.from_map_data(get_computing_town_map())
-        self.maps["Storage Town"] = GameMap.from_map_data(get_storage_town_map())
-        self.maps["Database Town"] = GameMap.from_map_data(get_database_town_map())
-        self.maps["Security Town"] = GameMap.from_map_data(get_security_town_map())
-        
-        # 初期マップを設定
-        self.current_map = self.maps["AWS Cloud World"]
+        self._portal_graph = None
+        self._routing_maps = {}
         
     def get_map(self, map_name):
-        """名前でマップを取得"""
-        return self.maps.get(map_name)
+        """マップ名からマップを取得（初回は基本レイアウトの複製に変更を適用して作る）"""
+        game_map = self.maps.get(map_name)
+        if game_map is None:
+            layout = get_base_layout(map_name)
+            if layout is None:
+                return None
+            game_map = self.maps[map_name] = self._materialize(layout)
+        return game_map
         
-    def change_map(self, map_name, x, y):
-        """マップを変更"""
-        if map_name in self.maps:
-            self.current_map = self.maps[map_name]
-            return x, y
-        return None, None
-class MapManager:
-    def __init__(self):
-        self.maps = {}
-        self.current_map = None
+    def get_portal_graph(self, can_enter=None):
+        """全マップをポータルでつないだグラフ（タイル・入れるマップが変わったり、マップを作成したりしたら作り直す）
+        
+        作成済みのマップはそのGameMapを、まだ作成していないマップは基本レイアウトから作る経路用ビューを使う（マップは作成しない）。
+        can_enter(マップ名) がFalseのマップへのポータルは経路に使わない。
+        """
+        maps = {name: game_map for name, game_map in self.maps.items() if not game_map.streamed}
+        for map_name in MAP_BUILDERS:
+            if map_name in self.maps:
+                continue
+            routing_map = self._routing_maps.get(map_name)
+            if routing_map is None:
+                layout = get_base_layout(map_name)
+                routing_map = self._routing_maps[map_name] = RoutingMap(layout, self.overlays.get(map_name, {}).get("tiles"))
+            maps[map_name] = routing_map
+        open_maps = None if can_enter is None else {name for name in maps if can_enter(name)}
+        if self._portal_graph is None or self._portal_graph.is_stale(maps, open_maps):
+            self._portal_graph = PortalGraph(maps, open_maps)
+        return self._portal_graph
+        
+    def _materialize(self, layout):
+        """基本レイアウトを複製してGameMapを作成（タイル・NPCなどはマップごとに変更できる）"""
+        map_data = dict(layout)
+        map_data["tiles"] = layout["tiles"].copy()
+        for key in ("portals", "npcs", "shops", "triggers"):
+            if key in layout:
+                map_data[key] = [dict(entry) for entry in layout[key]]
+        game_map = GameMap.from_map_data(map_data)
+        
+        for position, tile_type in self.overlays.get(layout["name"], {}).get("tiles", {}).items():
+            x, y = map(int, position.split(","))
+            game_map.set_tile(x, y, tile_type)
+        return game_map
         
-    def generate_maps(self):
-        """Generate all maps"""
-        # Main world map
-        world_map_data = get_world_map()
-        world_map = GameMap(world_map_data["name"], world_map_data["width"], world_map_data["height"], MAP_WORLD)
-        world_map.tiles = world_map_data["tiles"]
-        world_map.npcs = world_map_data["npcs"]
-        world_map.portals = world_map_data["portals"]
-        world_map.shops = world_map_data["shops"]
-        world_map.encounter_rate = world_map_data["encounter_rate"]
-        self.maps[world_map.name] = world_map
-        
-        # Computing Town
-        computing_town_data = get_computing_town_map()
-        computing_town = GameMap(computing_town_data["name"], computing_town_data["width"], computing_town_data["height"], MAP_TOWN)
-        computing_town.tiles = computing_town_data["tiles"]
-        computing_town.npcs = computing_town_data["npcs"]
-        computing_town.portals = computing_town_data["portals"]
-        computing_town.shops = computing_town_data["shops"]
-        computing_town.encounter_rate = computing_town_data["encounter_rate"]
-        self.maps[computing_town.name] = computing_town
-        
-        # Storage Town
-        storage_town_data = get_storage_town_map()
-        storage_town = GameMap(storage_town_data["name"], storage_town_data["width"], storage_town_data["height"], MAP_TOWN)
-        storage_town.tiles = storage_town_data["tiles"]
-        storage_town.npcs = storage_town_data["npcs"]
-        storage_town.portals = storage_town_data["portals"]
-        storage_town.shops = storage_town_data["shops"]
-        storage_town.encounter_rate = storage_town_data["encounter_rate"]
-        self.maps[storage_town.name] = storage_town
-        
-        # Database Town
-        database_town_data = get_database_town_map()
-        database_town = GameMap(database_town_data["name"], database_town_data["width"], database_town_data["height"], MAP_TOWN)
-        database_town.tiles = database_town_data["tiles"]
-        database_town.npcs = database_town_data["npcs"]
-        database_town.portals = database_town_data["portals"]
-        database_town.shops = database_town_data["shops"]
-        database_town.encounter_rate = database_town_data["encounter_rate"]
-        self.maps[database_town.name] = database_town
-        
-        # Security Town
-        security_town_data = get_security_town_map()
-        security_town = GameMap(security_town_data["name"], security_town_data["width"], security_town_data["height"], MAP_TOWN)
-        security_town.tiles = security_town_data["tiles"]
-        security_town.npcs = security_town_data["npcs"]
-        security_town.portals = security_town_data["portals"]
-        security_town.shops = security_town_data["shops"]
-        security_town.encounter_rate = security_town_data["encounter_rate"]
-        self.maps[security_town.name] = security_town
-        
-        # Set current map to world map
-        self.current_map = self.maps["AWS Cloud World"]
-    def get_map(self, map_name):
-        """Get a map by name"""
+    def set_tile(self, map_name, x, y, tile_type):
+        """セーブデータに残るタイルの変更（作成済みのマップにもすぐ反映）"""
+        self.overlays.setdefault(map_name, {}).setdefault("tiles", {})[f"{x},{y}"] = tile_type
         if map_name in self.maps:
-            return self.maps[map_name]
-        return None
+            self.maps[map_name].set_tile(x, y, tile_type)
+        else:
+            self._routing_maps.pop(map_name, None)
+            
+    def get_save_data(self):
+        """セーブデータに保存するマップの変更"""
+        return self.overlays
+        
+    def load_save_data(self, overlays):
+        """セーブデータのマップの変更を読み込む（マップは次のget_mapで作り直す）"""
+        self.reset()
+        self.overlays = overlays or {}
@@ -7,8 +7,8 @@ import random
 import json
 import os
 import math
-from game_assets import GameAssets, WHITE, BLACK, BLUE, GRAY
-from game_map import GameMap, MapManager, TILE_EMPTY, TILE_FLOOR, TILE_WALL, TILE_GRASS, TILE_WATER, TILE_ROAD, TILE_DOOR, TILE_NPC, TILE_PORTAL, TILE_SHOP, TILE_MOUNTAIN, TILE_FOREST, TILE_SAND, TILE_FOUNTAIN, TILE_BENCH, TILE_LAMP, TILE_SIGN, TILE_FLOWERBED, TILE_STATUE, TILE_TABLE, TILE_CHAIR, TILE_INN
+from game_assets import GameAssets, WHITE, BLACK, BLUE, GRAY, DIM_OVERLAY_COLOR, register_gradient, get_animation_frame, PORTAL_ANIMATION_FRAMES, PORTAL_PULSE_PERIOD
+from game_map import GameMap, MapManager, TILE_EMPTY, TILE_FLOOR, TILE_WALL, TILE_GRASS, TILE_WATER, TILE_ROAD, TILE_DOOR, TILE_NPC, TILE_PORTAL, TILE_SHOP, TILE_MOUNTAIN, TILE_FOREST, TILE_SAND, TILE_FOUNTAIN, TILE_BENCH, TILE_LAMP, TILE_SIGN, TILE_FLOWERBED, TILE_STATUE, TILE_TABLE, TILE_CHAIR, TILE_INN, TRIGGER_STEP, TRIGGER_INTERACT, MAP_WORLD, START_POSITION, get_map_type
 from battle_system import BattleSystem
 from menu_system import MenuSystem
 from cutscene_system import CutsceneSystem
@@ -17,13 +17,34 @@ from recruitment_system import RecruitmentSystem
 from item_system import ItemSystem
 from shop_system import ShopSystem
 from aws_services import get_service_by_name, get_all_services
+from screen_updater import ScreenUpdater
 
 # Game constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 FPS = 60
+IDLE_WAIT_TIMEOUT = 100  # ms to sleep on screens with nothing animating
+
+# Fixed-timestep simulation (independent of the render rate FPS)
+UPDATE_RATE = 60
+UPDATE_STEP = 1.0 / UPDATE_RATE
+MAX_FRAME_TIME = 0.25  # seconds; longer stalls are dropped instead of replayed
 TITLE = "AWS Cloud Isekai RPG"
 
+# The direction arrow points at the tile this many steps ahead along the flow field
+ARROW_LOOKAHEAD = 4
+
+# Minimap in the bottom-right corner: size in pixels and how many tiles around the player it shows
+MINIMAP_WIDGET_SIZE = 150
+MINIMAP_WIDGET_TILES = 50
+
+# Space left around the full-map overview
+MAP_OVERVIEW_MARGIN = 60
+
+# Minimap markers
+MINIMAP_PLAYER_COLOR = (255, 60, 60)
+MINIMAP_PORTAL_COLOR = (200, 80, 255)
+
 # Game states
 STATE_TITLE = 0
 STATE_GAME = 1
@@ -36,6 +57,54 @@ STATE_RECRUITMENT = 7
 STATE_SHOP = 8
 STATE_INVENTORY = 9
 STATE_GAME_OVER = 10
+STATE_MAP_OVERVIEW = 11
+
+# World view is shown frozen behind these overlay states
+OVERLAY_STATES = (STATE_DIALOG, STATE_MENU, STATE_QUEST_LOG, STATE_SHOP, STATE_INVENTORY, STATE_MAP_OVERVIEW)
+
+# タイトル画面・ゲームオーバー画面のグラデーション
+def _title_background_color(y, height):
+    """Gradient from deep blue to darker blue (like a night sky)"""
+    color_value = 30 + int((y / height) * 50)
+    return (max(0, color_value - 20), max(0, color_value - 10), min(int(color_value * 2), 100))
+
+def _title_new_game_button_color(y, height):
+    """新規ゲームは目立つ色"""
+    ratio = y / height
+    return (int(50 + 100 * ratio), int(100 + 100 * ratio), int(150 + 100 * ratio))
+
+def _title_exit_button_color(y, height):
+    """終了は控えめな色"""
+    ratio = y / height
+    return (int(100 + 50 * ratio), int(50 + 50 * ratio), int(50 + 50 * ratio))
+
+def _title_button_color(y, height):
+    """その他のボタン"""
+    ratio = y / height
+    return (int(70 + 80 * ratio), int(70 + 80 * ratio), int(100 + 100 * ratio))
+
+def _game_over_background_color(y, height):
+    """暗い赤色のグラデーション"""
+    color_value = 50 - int((y / height) * 30)
+    return (color_value + 50, color_value, color_value)
+
+def _game_over_continue_button_color(y, height):
+    """続行ボタン（赤系）"""
+    color_val = 50 + int(y / height * 100)
+    return (color_val, color_val // 3, color_val // 3)
+
+def _game_over_title_button_color(y, height):
+    """タイトルに戻るボタン（青系）"""
+    color_val = 50 + int(y / height * 100)
+    return (color_val // 2, color_val // 2, color_val)
+
+register_gradient("title_background", _title_background_color)
+register_gradient("title_button_new_game", _title_new_game_button_color)
+register_gradient("title_button_exit", _title_exit_button_color)
+register_gradient("title_button_continue", _title_button_color)
+register_gradient("game_over_background", _game_over_background_color)
+register_gradient("game_over_continue_button", _game_over_continue_button_color)
+register_gradient("game_over_title_button", _game_over_title_button_color)
 
 class Game:
     instance = None  # Class variable to store the singleton instance
@@ -50,6 +119,22 @@ class Game:
         
         # Load assets
         self.assets = GameAssets()
+        self.assets.finalize_display_format()
+        
+        # Fixed-step clock: time of the last frame and time not yet simulated
+        self.frame_time = 0.0
+        self.update_lag = 0.0
+        
+        # Set by draw_map; portals pulse, so the world view keeps animating
+        self.portals_in_view = False
+        
+        # Dirty-rect display updates (full flip on view changes and input)
+        self.screen_updater = ScreenUpdater(self.screen)
+        
+        # Freeze-frame of the world view used behind overlays
+        self.world_snapshot = None
+        self.world_snapshot_dimmed = None
+        self.world_snapshot_key = None
         
         # Player data
         self.player = {
@@ -63,9 +148,9 @@ class Game:
             "attack": 10,
             "defense": 5,
             "credits": 1000,
-            "position": [25, 25],  # Central crossroads
-            "tile_x": 25,          # Central crossroads
-            "tile_y": 25,          # Central crossroads
+            "position": [START_POSITION[1], START_POSITION[2]],  # Central crossroads
+            "tile_x": START_POSITION[1],  # Central crossroads
+            "tile_y": START_POSITION[2],  # Central crossroads
             "completed_quests": [],
             "defeated_bosses": [],
             "recruited_services": []
@@ -88,6 +173,8 @@ class Game:
         
         # Quest system
         self.quest_system = QuestSystem(self.player, self.assets)
+        self.objective_key = None  # 目的地を求めたときのクエストとマップ
+        self.objective_target = None
         
         # Recruitment system
         self.recruitment_system = RecruitmentSystem(self.player, self.party, self.assets)
@@ -112,6 +199,15 @@ class Game:
         self.dialog_npc = None
         self.dialog_npc_is_service = False
         
+        # マップのトリガーの種類ごとの処理
+        self.trigger_handlers = {
+            "portal": self.trigger_portal,
+            "npc": self.trigger_npc,
+            "shop": self.trigger_shop,
+            "inn": self.trigger_inn,
+            "quest": self.trigger_quest
+        }
+        
         # Camera position
         self.camera_x = 0
         self.camera_y = 0
@@ -135,19 +231,27 @@ class Game:
     def run(self):
         """Main game loop"""
         try:
-            # Initialize maps
-            self.map_manager.generate_maps()
-            self.map_manager.current_map = self.map_manager.get_map("AWS Cloud World")
+            # Start on the world map (maps are built on first use)
+            self.map_manager.current_map = self.map_manager.get_map(START_POSITION[0])
             
             while self.running:
                 # Handle events
                 self.handle_events()
                 
-                # Update based on state
-                if self.state == STATE_BATTLE:
-                    self.battle_system.update()
-                elif self.state == STATE_CUTSCENE:
-                    self.cutscene_system.update()
+                # Run as many fixed steps as the elapsed time covers
+                self.update_lag += self.frame_time
+                while self.update_lag >= UPDATE_STEP:
+                    self.update(UPDATE_STEP)
+                    self.update_lag -= UPDATE_STEP
+                
+                # Drop the world snapshot once no overlay is open
+                if self.state not in OVERLAY_STATES and self.world_snapshot is not None:
+                    self.invalidate_world_snapshot()
+                
+                # State, map or player moves redraw the whole view
+                current_map = self.map_manager.current_map
+                self.screen_updater.set_view((self.state, current_map.name if current_map else None,
+                                              self.player["tile_x"], self.player["tile_y"]))
                 
                 # Clear screen
                 self.screen.fill(BLACK)
@@ -159,45 +263,81 @@ class Game:
                     self.draw_game_screen()
                 elif self.state == STATE_BATTLE:
                     self.battle_system.draw(self.screen)
+                    self.screen_updater.mark_all(self.battle_system.dirty_rects)
                 elif self.state == STATE_DIALOG:
-                    self.draw_game_screen()
+                    self.draw_world_snapshot()
                     self.draw_dialog()
                 elif self.state == STATE_MENU:
-                    self.draw_game_screen()
-                    self.menu_system.draw(self.screen)
+                    self.draw_world_snapshot(dimmed=True)
+                    self.menu_system.draw(self.screen, dim_background=False)
                 elif self.state == STATE_CUTSCENE:
-                    self.cutscene_system.draw(self.screen)
+                    self.cutscene_system.draw(self.screen, self.update_lag)
+                    self.screen_updater.mark_all(self.cutscene_system.dirty_rects)
                 elif self.state == STATE_QUEST_LOG:
-                    self.draw_game_screen()
-                    self.quest_log_close_button = self.quest_system.draw_quest_log(self.screen)
+                    self.draw_world_snapshot(dimmed=True)
+                    self.quest_log_close_button = self.quest_system.draw_quest_log(self.screen, dim_background=False)
                 elif self.state == STATE_SHOP:
-                    self.draw_game_screen()
+                    self.draw_world_snapshot()
                     self.draw_dialog()
                     self.shop_system.draw(self.screen)
                 elif self.state == STATE_INVENTORY:
-                    self.draw_game_screen()
+                    self.draw_world_snapshot()
                     self.item_system.draw(self.screen)
+                elif self.state == STATE_MAP_OVERVIEW:
+                    self.draw_world_snapshot(dimmed=True)
+                    self.draw_map_overview()
                 elif self.state == STATE_RECRUITMENT:
                     self.recruitment_system.draw(self.screen)
                 elif self.state == STATE_GAME_OVER:
                     # ゲームオーバー画面を描画し、ボタンを返す
                     _ = self.draw_game_over_screen()
                 
-                # 画面の更新
-                pygame.display.flip()
-                self.clock.tick(FPS)
+                # 画面の更新（変化した範囲のみ）
+                self.screen_updater.present()
+                
+                # 動きのない画面では入力が来るまで待機する
+                if self.is_animating():
+                    self.frame_time = min(self.clock.tick(FPS) / 1000.0, MAX_FRAME_TIME)
+                else:
+                    self.wait_for_input(IDLE_WAIT_TIMEOUT)
         except Exception as e:
             print(f"ゲームループでエラーが発生しました: {e}")
             
         pygame.quit()
         sys.exit()
+    def update(self, dt):
+        """Advance the simulation by one fixed step of dt seconds"""
+        if self.state == STATE_BATTLE:
+            self.battle_system.update(dt)
+        elif self.state == STATE_CUTSCENE:
+            self.cutscene_system.update(dt)
+            
+    def is_animating(self):
+        """Whether the current screen changes without input and needs every frame"""
+        if self.state == STATE_GAME:
+            return self.portals_in_view
+        if self.state == STATE_BATTLE:
+            return self.battle_system.is_animating()
+        if self.state == STATE_CUTSCENE:
+            return self.cutscene_system.is_animating()
+        return False
+        
+    def wait_for_input(self, timeout):
+        """Block until an event arrives or timeout (ms) passes, leaving events queued for handle_events"""
+        event = pygame.event.wait(timeout)
+        if event.type != pygame.NOEVENT:
+            # Put the event back in front of anything that arrived meanwhile
+            for queued in [event] + pygame.event.get():
+                pygame.event.post(queued)
+        # Nothing was animating, so the waited time is not simulated
+        self.clock.tick()
+        self.frame_time = 0.0
+        self.update_lag = 0.0
+        
     def draw_game_over_screen(self):
         """ゲームオーバー画面を描画"""
         # 背景（暗い赤色のグラデーション）
-        for y in range(SCREEN_HEIGHT):
-            color_value = 50 - int((y / SCREEN_HEIGHT) * 30)
-            color = (color_value + 50, color_value, color_value)
-            pygame.draw.line(self.screen, color, (0, y), (SCREEN_WIDTH, y))
+        self.screen.blit(self.assets.get_gradient("game_over_background", SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0))
             
         # タイトル
         game_over_text = self.assets.render_text("GAME OVER", "large", (255, 50, 50))
@@ -210,12 +350,8 @@ class Game:
         # 続行ボタン
         continue_button = pygame.Rect(300, 350, 200, 50)
         # グラデーションボタン
-        for y_offset in range(50):
-            color_val = 50 + int(y_offset / 50 * 100)
-            color = (color_val, color_val // 3, color_val // 3)
-            pygame.draw.line(self.screen, color, 
-                           (continue_button.left, continue_button.top + y_offset),
-                           (continue_button.right, continue_button.top + y_offset))
+        self.screen.blit(self.assets.get_gradient("game_over_continue_button", continue_button.width, continue_button.height),
+                         continue_button.topleft)
         pygame.draw.rect(self.screen, WHITE, continue_button, 2)
         
         continue_text = self.assets.render_text("Continue from Save", "normal", WHITE)
@@ -224,12 +360,8 @@ class Game:
         # タイトルに戻るボタン
         title_button = pygame.Rect(300, 420, 200, 50)
         # グラデーションボタン
-        for y_offset in range(50):
-            color_val = 50 + int(y_offset / 50 * 100)
-            color = (color_val // 2, color_val // 2, color_val)
-            pygame.draw.line(self.screen, color, 
-                           (title_button.left, title_button.top + y_offset),
-                           (title_button.right, title_button.top + y_offset))
+        self.screen.blit(self.assets.get_gradient("game_over_title_button", title_button.width, title_button.height),
+                         title_button.topleft)
         pygame.draw.rect(self.screen, WHITE, title_button, 2)
         
         title_text = self.assets.render_text("Return to Title", "normal", WHITE)
@@ -243,12 +375,8 @@ class Game:
         # タイトルに戻るボタン
         title_button = pygame.Rect(300, 420, 200, 50)
         # グラデーションボタン
-        for y_offset in range(50):
-            color_val = 50 + int(y_offset / 50 * 100)
-            color = (color_val // 2, color_val // 2, color_val)
-            pygame.draw.line(self.screen, color, 
-                           (title_button.left, title_button.top + y_offset),
-                           (title_button.right, title_button.top + y_offset))
+        self.screen.blit(self.assets.get_gradient("game_over_title_button", title_button.width, title_button.height),
+                         title_button.topleft)
         pygame.draw.rect(self.screen, WHITE, title_button, 2)
         
         title_text = self.assets.render_text("Return to Title", "normal", WHITE)
@@ -263,31 +391,17 @@ class Game:
                     self.running = False
                     return
                     
+                # 入力があったフレームは画面全体を更新する
+                if event.type != pygame.MOUSEMOTION:
+                    self.screen_updater.mark_full()
+                    
                 # キー入力
                 if event.type == pygame.KEYDOWN:
                     if event.key == 101 and self.state == STATE_GAME:  # 101 = pygame.K_e
-                        # プレイヤーの周囲のNPCを探す
-                        found_npc = False
+                        # プレイヤーの位置のトリガー（NPC・ショップ・宿屋）を調べる
                         print(f"Eキーが押されました。プレイヤー位置: ({self.player['tile_x']}, {self.player['tile_y']})")
-                        for dx in [-1, 0, 1]:
-                            for dy in [-1, 0, 1]:
-                                if dx == 0 and dy == 0:
-                                    continue
-                                check_x = self.player["tile_x"] + dx
-                                check_y = self.player["tile_y"] + dy
-                                try:
-                                    npc = self.map_manager.current_map.get_npc_at(check_x, check_y)
-                                    if npc:
-                                        print(f"NPCが見つかりました: {npc['name']} at ({check_x}, {check_y})")
-                                        self.start_dialog(npc["dialog"], npc)
-                                        found_npc = True
-                                        break
-                                except Exception as e:
-                                    print(f"NPC検索中のエラー: {e}")
-                            if found_npc:
-                                break
-                        if not found_npc:
-                            print("周囲にNPCが見つかりませんでした")
+                        if not self.run_triggers(self.player["tile_x"], self.player["tile_y"], TRIGGER_INTERACT):
+                            print("周囲に話しかけられる相手が見つかりませんでした")
                     elif event.key == pygame.K_r and self.state == STATE_DIALOG and self.dialog_npc_is_service:
                         # 仲間システムを起動
                         if self.dialog_npc and "name" in self.dialog_npc:
@@ -328,6 +442,11 @@ class Game:
                     # Show quest log
                     if event.key == pygame.K_q and self.state == STATE_GAME:
                         self.state = STATE_QUEST_LOG
+                    # Toggle the full-map overview
+                    elif event.key == pygame.K_TAB and self.state == STATE_MAP_OVERVIEW:
+                        self.state = STATE_GAME
+                    elif event.key == pygame.K_TAB and self.state == STATE_GAME and self.map_manager.current_map.get_minimap():
+                        self.state = STATE_MAP_OVERVIEW
                             
                     # Game screen controls
                     if self.state == STATE_GAME:
@@ -355,11 +474,6 @@ class Game:
                             except Exception as e:
                                 print(f"Error saving game: {e}")
                                 self.start_dialog("Failed to save game.")
-                        elif event.key == pygame.K_e:
-                            # Check for nearby NPCs, shops, or inns to interact with
-                            if not self.check_for_npc_interaction():
-                                if not self.check_for_shop_interaction():
-                                    self.check_for_inn_interaction()
                         elif event.key == pygame.K_s:
                             # Save game
                             if self.save_game():
@@ -526,9 +640,9 @@ class Game:
                 "attack": 10,
                 "defense": 5,
                 "credits": 1000,
-                "position": [25, 25],  # 中央の十字路に変更
-                "tile_x": 25,          # 中央の十字路に変更
-                "tile_y": 25,          # 中央の十字路に変更
+                "position": [START_POSITION[1], START_POSITION[2]],  # 中央の十字路に変更
+                "tile_x": START_POSITION[1],  # 中央の十字路に変更
+                "tile_y": START_POSITION[2],  # 中央の十字路に変更
                 "completed_quests": [],
                 "defeated_bosses": [],
                 "recruited_services": []
@@ -549,9 +663,9 @@ class Game:
                 "attack": 10,
                 "defense": 5,
                 "credits": 1000,
-                "position": [25, 25],  # Central crossroads
-                "tile_x": 25,          # Central crossroads
-                "tile_y": 25,          # Central crossroads
+                "position": [START_POSITION[1], START_POSITION[2]],  # Central crossroads
+                "tile_x": START_POSITION[1],  # Central crossroads
+                "tile_y": START_POSITION[2],  # Central crossroads
                 "completed_quests": [],
                 "defeated_bosses": [],
                 "recruited_services": [],
@@ -565,9 +679,9 @@ class Game:
             # Initialize party
             self.party = []
             
-            # Initialize maps
-            self.map_manager.generate_maps()
-            self.map_manager.current_map = self.map_manager.get_map("AWS Cloud World")
+            # Initialize maps (drop changes from the previous game; layouts are reused)
+            self.map_manager.reset()
+            self.map_manager.current_map = self.map_manager.get_map(START_POSITION[0])
             
             # Reset discovered towns - only Computing Town is available at start
             self.discovered_towns = ["Computing Town"]
@@ -632,8 +746,9 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
                     if member["hp"] <= 0:
                         member["hp"] = member["max_hp"] // 2
                 
-                # マップのロード
+                # マップのロード（マップは作り直さず、セーブデータの変更だけ読み込む）
                 map_name = save_data["current_map"]
+                self.map_manager.load_save_data(save_data.get("map_overlays"))
                 self.map_manager.current_map = self.map_manager.get_map(map_name)
                 
                 # 位置のロード
@@ -655,13 +770,10 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
         screen_height = 600
         
         # Background - deep blue gradient
-        for y in range(screen_height):
-            # Gradient from deep blue to darker blue (like a night sky)
-            color_value = 30 + int((y / screen_height) * 50)
-            color = (max(0, color_value - 20), max(0, color_value - 10), min(int(color_value * 2), 100))
-            pygame.draw.line(self.screen, color, (0, y), (screen_width, y))
+        self.screen.blit(self.assets.get_gradient("title_background", screen_width, screen_height), (0, 0))
         
-        # Draw stars
+        # Draw stars (scattered anew every frame, so the whole screen changes)
+        self.screen_updater.mark_full()
         for i in range(100):
             star_x = random.randint(0, screen_width)
             star_y = random.randint(0, screen_height)
@@ -759,21 +871,9 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
         
         for button_name, button_rect in self.title_buttons.items():
             # ボタンの背景（グラデーション）
-            for y_offset in range(button_rect.height):
-                ratio = y_offset / button_rect.height
-                if button_name == "new_game":
-                    # 新規ゲームは目立つ色
-                    color = (int(50 + 100 * ratio), int(100 + 100 * ratio), int(150 + 100 * ratio))
-                elif button_name == "exit":
-                    # 終了は控えめな色
-                    color = (int(100 + 50 * ratio), int(50 + 50 * ratio), int(50 + 50 * ratio))
-                else:
-                    # その他のボタン
-                    color = (int(70 + 80 * ratio), int(70 + 80 * ratio), int(100 + 100 * ratio))
-                
-                pygame.draw.line(self.screen, color, 
-                               (button_rect.left, button_rect.top + y_offset),
-                               (button_rect.right, button_rect.top + y_offset))
+            gradient = "title_button_" + button_name
+            self.screen.blit(self.assets.get_gradient(gradient, button_rect.width, button_rect.height),
+                             button_rect.topleft)
             
             # ボタンの枠（アニメーション効果）
             if button_name == "new_game":
@@ -821,32 +921,147 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
         self.screen.blit(objective_text, (10, 30))
         
         # Controls guide (small display)
-        guide_text = self.assets.render_text("M: Menu  Q: Quests  E: Interact", "small", WHITE)
+        guide_text = self.assets.render_text("M: Menu  Q: Quests  E: Interact  TAB: Map", "small", WHITE)
         self.screen.blit(guide_text, (800 - guide_text.get_width() - 10, 10))
         
         # Direction arrow (pointing to objective)
         self.draw_direction_arrow()
         
-    def draw_direction_arrow(self):
-        """目的地への方向を示す矢印を描画"""
-        # 現在のクエストに基づいて目的地を決定
-        destination = None
-        
-        if "meet_ec2" in self.quest_system.active_quests:
-            # EC2がいるComputing Townへの方向
-            for portal in self.map_manager.current_map.portals:
-                if portal["destination"] == "Computing Town":
-                    destination = (portal["x"], portal["y"])
-                    break
+        # Minimap around the player
+        self.draw_minimap()
         
-        if destination:
-            # プレイヤーから目的地への方向を計算
-            dx = destination[0] - self.player["tile_x"]
-            dy = destination[1] - self.player["tile_y"]
+    def draw_minimap(self):
+        """Draw the minimap in the bottom-right corner (cached image of the tiles around the player)"""
+        current_map = self.map_manager.current_map
+        minimap = current_map.get_minimap()
+        if minimap is None:
+            return
+        # Window of tiles centered on the player, clamped to the map
+        width = min(MINIMAP_WIDGET_TILES, current_map.width)
+        height = min(MINIMAP_WIDGET_TILES, current_map.height)
+        left = max(0, min(self.player["tile_x"] - width // 2, current_map.width - width))
+        top = max(0, min(self.player["tile_y"] - height // 2, current_map.height - height))
+        tile_pixels = MINIMAP_WIDGET_SIZE / max(width, height)
+        rect = pygame.Rect(0, 0, round(width * tile_pixels), round(height * tile_pixels))
+        rect.bottomright = (SCREEN_WIDTH - 10, SCREEN_HEIGHT - 10)
+        self.draw_minimap_view(minimap, rect, (left, top, width, height),
+                               current_map.get_portals_in_rect(left, top, width, height))
+        
+    def draw_map_overview(self):
+        """Draw the whole current map scaled to fit the screen"""
+        current_map = self.map_manager.current_map
+        minimap = current_map.get_minimap()
+        if minimap is None:
+            return
+        tile_pixels = min((SCREEN_WIDTH - 2 * MAP_OVERVIEW_MARGIN) / current_map.width,
+                          (SCREEN_HEIGHT - 2 * MAP_OVERVIEW_MARGIN) / current_map.height)
+        rect = pygame.Rect(0, 0, round(current_map.width * tile_pixels), round(current_map.height * tile_pixels))
+        rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+        self.draw_minimap_view(minimap, rect, (0, 0, current_map.width, current_map.height), current_map.portals)
+        
+        title = self.assets.render_text(current_map.name, "normal", WHITE)
+        self.screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, rect.top - title.get_height() - 8))
+        hint = self.assets.render_text("TAB / ESC: Close", "small", WHITE)
+        self.screen.blit(hint, (SCREEN_WIDTH // 2 - hint.get_width() // 2, rect.bottom + 8))
+        
+    def draw_minimap_view(self, minimap, rect, area, portals):
+        """Blit the minimap image of area (tiles: x, y, width, height) into rect, then the portal and player markers"""
+        left, top, width, height = area
+        self.screen.blit(minimap.get_view(left, top, width, height, rect.size), rect)
+        pygame.draw.rect(self.screen, WHITE, rect.inflate(4, 4), 2)
+        
+        # Markers are drawn every frame on top of the cached image
+        tile_width = rect.width / width
+        tile_height = rect.height / height
+        radius = max(2, min(6, int(min(tile_width, tile_height) / 2)))
+        for portal in portals:
+            center = (rect.x + int((portal["x"] - left + 0.5) * tile_width), rect.y + int((portal["y"] - top + 0.5) * tile_height))
+            pygame.draw.circle(self.screen, MINIMAP_PORTAL_COLOR, center, radius)
+        center = (rect.x + int((self.player["tile_x"] - left + 0.5) * tile_width),
+                  rect.y + int((self.player["tile_y"] - top + 0.5) * tile_height))
+        pygame.draw.circle(self.screen, WHITE, center, radius + 2)
+        pygame.draw.circle(self.screen, MINIMAP_PLAYER_COLOR, center, radius + 1)
+        
+    def draw_world_snapshot(self, dimmed=False):
+        """Draw the world view behind an overlay from a snapshot captured when it opened"""
+        # Re-capture only if something visible in the world view changed meanwhile
+        key = (self.map_manager.current_map.name, self.player["tile_x"], self.player["tile_y"],
+               tuple(self.quest_system.active_quests))
+        if self.world_snapshot is None or self.world_snapshot_key != key:
+            self.draw_game_screen()
+            self.world_snapshot = self.screen.copy()
+            self.world_snapshot_dimmed = None
+            self.world_snapshot_key = key
             
-            # 距離が近い場合は矢印を表示しない
-            if abs(dx) < 5 and abs(dy) < 5:
-                return
+        if dimmed:
+            if self.world_snapshot_dimmed is None:
+                self.world_snapshot_dimmed = self.world_snapshot.copy()
+                self.world_snapshot_dimmed.blit(self.assets.get_overlay(SCREEN_WIDTH, SCREEN_HEIGHT, DIM_OVERLAY_COLOR), (0, 0))
+            self.screen.blit(self.world_snapshot_dimmed, (0, 0))
+        else:
+            self.screen.blit(self.world_snapshot, (0, 0))
+            
+    def invalidate_world_snapshot(self):
+        """Discard the world snapshot so the next overlay captures a fresh one"""
+        self.world_snapshot = None
+        self.world_snapshot_dimmed = None
+        self.world_snapshot_key = None
+        
+    def get_objective_target(self):
+        """現在のクエストの目的地：今のマップにいる目的のNPCの位置 ("tile", (x, y))、または別のマップ ("map", マップ名)
+
+        クエストかマップが変わったときだけ求め直す（無ければNone）。
+        """
+        key = (tuple(self.quest_system.active_quests), self.map_manager.current_map.name)
+        if key != self.objective_key:
+            self.objective_key = key
+            self.objective_target = None
+            location = self.quest_system.get_objective_location()
+            current_map = self.map_manager.current_map
+            if location and location["map"] != current_map.name:
+                self.objective_target = ("map", location["map"])
+            elif location:
+                for npc in current_map.npcs:
+                    if npc["name"] == location.get("npc"):
+                        self.objective_target = ("tile", (npc["x"], npc["y"]))
+                        break
+        return self.objective_target
+        
+    def get_objective_field(self):
+        """目的地へ向かう距離場（別のマップが目的地なら最初にくぐるポータルへの距離場。無ければNone）"""
+        target = self.get_objective_target()
+        if target is None:
+            return None
+        current_map = self.map_manager.current_map
+        if target[0] == "tile":
+            return current_map.get_flow_field(*target[1])
+        graph = self.map_manager.get_portal_graph(self.can_enter_map)
+        return graph.get_flow_field(current_map.name, self.player["tile_x"], self.player["tile_y"], target[1])
+        
+    def draw_direction_arrow(self):
+        """目的地への方向を示す矢印を描画（別のマップにいれば目的のマップへ向かうポータルを指す）"""
+        # 現在のクエストに基づく目的地への距離場
+        field = self.get_objective_field()
+        
+        if field:
+            # 距離場を少し先までたどった地点の方向を指す（湖や山を回り込む）
+            start = (self.player["tile_x"], self.player["tile_y"])
+            distance = field.distance(*start)
+            if distance is not None:
+                # 経路が短い場合は矢印を表示しない
+                if distance < 5:
+                    return
+                target = field.walk(start[0], start[1], ARROW_LOOKAHEAD)[-1]
+                dx = target[0] - start[0]
+                dy = target[1] - start[1]
+            else:
+                # 経路がなければ目的地への直線方向
+                dx = field.target[0] - start[0]
+                dy = field.target[1] - start[1]
+                
+                # 距離が近い場合は矢印を表示しない
+                if abs(dx) < 5 and abs(dy) < 5:
+                    return
                 
             # 方向を正規化
             length = (dx**2 + dy**2)**0.5
@@ -905,117 +1120,50 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
         self.camera_x = max(0, min(self.camera_x, self.map_manager.current_map.width * tile_size - 800))
         self.camera_y = max(0, min(self.camera_y, self.map_manager.current_map.height * tile_size - 600))
         
-        # Calculate starting tile
+        # Calculate visible tile range
         start_x = self.camera_x // tile_size
         start_y = self.camera_y // tile_size
-        
-        # Draw tiles
-        for y in range(start_y, start_y + visible_tiles_y):
-            for x in range(start_x, start_x + visible_tiles_x):
-                # Check if within map bounds
-                if 0 <= x < self.map_manager.current_map.width and 0 <= y < self.map_manager.current_map.height:
-                    tile_type = self.map_manager.current_map.tiles[y][x]
-                    screen_x = x * tile_size - self.camera_x
-                    screen_y = y * tile_size - self.camera_y
-                    
-                    # Draw appropriate image based on tile type
-                    if tile_type == TILE_EMPTY:
-                        # Draw floor for empty tiles (to prevent black tiles)
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                    elif tile_type == TILE_FLOOR:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                    elif tile_type == TILE_WALL:
-                        self.screen.blit(self.assets.get_image("wall"), (screen_x, screen_y))
-                    elif tile_type == TILE_GRASS:
-                        self.screen.blit(self.assets.get_image("grass"), (screen_x, screen_y))
-                    elif tile_type == TILE_WATER:
-                        self.screen.blit(self.assets.get_image("water"), (screen_x, screen_y))
-                    elif tile_type == TILE_ROAD:
-                        self.screen.blit(self.assets.get_image("road"), (screen_x, screen_y))
-                    elif tile_type == TILE_DOOR:
-                        # Draw floor under door
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        self.screen.blit(self.assets.get_image("door"), (screen_x, screen_y))
-                    elif tile_type == TILE_NPC:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        self.screen.blit(self.assets.get_image("npc"), (screen_x, screen_y))
-                    elif tile_type == TILE_PORTAL:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        
-                        # Portal animation effect
-                        current_time = pygame.time.get_ticks()
-                        pulse = (math.sin(current_time / 300) + 1) / 2  # Pulse between 0 and 1
-                        
-                        # Portal scaling effect
-                        scale_factor = 1.0 + pulse * 0.2  # Scale between 1.0 and 1.2
-                        portal_img = self.assets.get_image("portal")
-                        
-                        # Create scaled portal image
-                        scaled_size = int(tile_size * scale_factor)
-                        offset = (scaled_size - tile_size) // 2
-                        
-                        # Place scaled portal centered
-                        self.screen.blit(portal_img, (screen_x - offset, screen_y - offset))
-                        
-                        # Show town name above portal
-                        portal = self.map_manager.current_map.get_portal_at(x, y)
-                        if portal and "destination" in portal:
-                            # Animate name color (brightness)
-                            name_brightness = int(200 + 55 * pulse)  # Brightness between 200-255
-                            name_color = (name_brightness, name_brightness, name_brightness)
-                            
-                            town_name = self.assets.render_text(portal["destination"], "small", name_color)
-                            # Center the name
-                            name_x = screen_x + (tile_size - town_name.get_width()) // 2
-                            name_y = screen_y - 20  # Position above tile
-                            
-                            # Add slightly dark background for readability
-                            name_bg = pygame.Surface((town_name.get_width() + 8, town_name.get_height() + 4))
-                            name_bg.fill((0, 0, 50))
-                            name_bg.set_alpha(150)  # Semi-transparent
-                            self.screen.blit(name_bg, (name_x - 4, name_y - 2))
-                            self.screen.blit(town_name, (name_x, name_y))
-                    elif tile_type == TILE_SHOP:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        self.screen.blit(self.assets.get_image("shop"), (screen_x, screen_y))
-                    elif tile_type == TILE_MOUNTAIN:
-                        self.screen.blit(self.assets.get_image("mountain"), (screen_x, screen_y))
-                    elif tile_type == TILE_FOREST:
-                        self.screen.blit(self.assets.get_image("forest"), (screen_x, screen_y))
-                    elif tile_type == TILE_SAND:
-                        self.screen.blit(self.assets.get_image("sand"), (screen_x, screen_y))
-                    elif tile_type == TILE_FOUNTAIN:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        self.screen.blit(self.assets.get_image("fountain"), (screen_x, screen_y))
-                    elif tile_type == TILE_BENCH:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        self.screen.blit(self.assets.get_image("bench"), (screen_x, screen_y))
-                    elif tile_type == TILE_LAMP:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        self.screen.blit(self.assets.get_image("lamp"), (screen_x, screen_y))
-                    elif tile_type == TILE_SIGN:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        self.screen.blit(self.assets.get_image("sign"), (screen_x, screen_y))
-                    elif tile_type == TILE_FLOWERBED:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        self.screen.blit(self.assets.get_image("flowerbed"), (screen_x, screen_y))
-                    elif tile_type == TILE_INN:
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
-                        # Use a different color for the inn to make it stand out
-                        inn_img = self.assets.get_image("shop")  # Reuse shop image for now
-                        # Draw a bed icon or something to indicate it's an inn
-                        self.screen.blit(inn_img, (screen_x, screen_y))
-                        
-                        # Draw "INN" text above it
-                        inn_text = self.assets.render_text("INN", "small", (255, 255, 0))
-                        self.screen.blit(inn_text, (screen_x + (tile_size - inn_text.get_width()) // 2, 
-                                                  screen_y - 15))
-                    else:
-                        # Default to floor for undefined tile types
-                        self.screen.blit(self.assets.get_image("floor"), (screen_x, screen_y))
+        end_x = start_x + visible_tiles_x
+        end_y = start_y + visible_tiles_y
+        
+        # Draw the pre-baked static tile layer (stream in nearby chunks, drop far ones over budget)
+        current_map = self.map_manager.current_map
+        current_map.stream_around(self.camera_x, self.camera_y, 800, 600)
+        current_map.draw_static_layer(self.screen, self.assets, self.camera_x, self.camera_y)
+        
+        # Portal animation frame from the shared clock
+        portal_frame = get_animation_frame(pygame.time.get_ticks(), PORTAL_PULSE_PERIOD, PORTAL_ANIMATION_FRAMES)
+        portal_img, portal_offset = self.assets.get_portal_frames()[portal_frame]
+        
+        # Draw animated tiles on top of the static layer
+        self.portals_in_view = False
+        for x, y, tile_type, portal in current_map.get_overlay_tiles():
+            if not (start_x <= x < end_x and start_y <= y < end_y):
+                continue
+            screen_x = x * tile_size - self.camera_x
+            screen_y = y * tile_size - self.camera_y
+            
+            if tile_type == TILE_PORTAL:
+                # Pre-scaled portal frame, centered on the tile (the largest frame's area changes every frame)
+                self.screen.blit(portal_img, (screen_x - portal_offset, screen_y - portal_offset))
+                self.portals_in_view = True
+                self.screen_updater.mark((screen_x - tile_size // 10, screen_y - tile_size // 10,
+                                          tile_size + tile_size // 5, tile_size + tile_size // 5))
+                
+                # Show town name above portal
+                if portal and "destination" in portal:
+                    name_label = self.assets.get_portal_label(portal["destination"], portal_frame)
+                    label_pos = (screen_x + (tile_size - name_label.get_width()) // 2, screen_y - 22)
+                    self.screen.blit(name_label, label_pos)
+                    self.screen_updater.mark(name_label.get_rect(topleft=label_pos))
+            elif tile_type == TILE_INN:
+                # Draw "INN" text above it
+                inn_text = self.assets.render_text("INN", "small", (255, 255, 0))
+                self.screen.blit(inn_text, (screen_x + (tile_size - inn_text.get_width()) // 2, 
+                                          screen_y - 15))
     
-        # NPCの描画
-        for npc in self.map_manager.current_map.npcs:
+        # NPCの描画（空間ハッシュから表示範囲付近のNPCだけを取り出す）
+        for npc in current_map.get_npcs_in_rect(start_x - 1, start_y - 1, visible_tiles_x + 1, visible_tiles_y + 1):
             npc_x = npc["x"] * tile_size - self.camera_x
             npc_y = npc["y"] * tile_size - self.camera_y
             
@@ -1081,7 +1229,7 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
                                                 bubble_y - bubble_text.get_height() // 2))
     
         # Draw shops
-        for shop in self.map_manager.current_map.shops:
+        for shop in current_map.get_shops_in_rect(start_x - 1, start_y - 1, visible_tiles_x + 1, visible_tiles_y + 1):
             shop_x = shop["x"] * tile_size - self.camera_x
             shop_y = shop["y"] * tile_size - self.camera_y
             
@@ -1192,27 +1340,8 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
         line_height = 24  # Height of each line
         y_position = 460  # Starting Y position
         
-        # Split text into lines
-        lines = []
-        words = self.dialog.split()
-        current_line = ""
-        
-        for word in words:
-            # Check if adding this word would exceed the max width
-            test_line = current_line + word + " "
-            test_text = self.assets.render_text(test_line, "normal", WHITE)
-            
-            if test_text.get_width() > max_width:
-                # Line would be too long, add current line to lines and start a new one
-                lines.append(current_line)
-                current_line = word + " "
-            else:
-                # Add word to current line
-                current_line = test_line
-        
-        # Add the last line
-        if current_line:
-            lines.append(current_line)
+        # Lines are laid out once per dialog text and cached
+        lines = self.assets.text_layout.wrap(self.dialog, "normal", max_width)
         
         # Draw each line
         for line in lines:
@@ -1242,23 +1371,8 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
                 # Update position in player data for saving
                 self.player["position"] = [new_x, new_y]
                 
-                # Check for portals
-                portal = self.map_manager.current_map.get_portal_at(new_x, new_y)
-                if portal:
-                    # Check if the destination town is discovered
-                    if portal["destination"] in self.discovered_towns:
-                        self.change_map(portal["destination"], portal["dest_x"], portal["dest_y"])
-                        
-                        # Update quest progress if entering Computing Town
-                        if portal["destination"] == "Computing Town" and "explore_computing_town" in self.quest_system.active_quests:
-                            self.quest_system.complete_quest("explore_computing_town")
-                            # Add new quest
-                            self.quest_system.add_quest("defeat_sql_injection")
-                            # Save game after quest completion
-                            self.save_game()
-                    else:
-                        # Show message that the town is not yet discovered
-                        self.start_dialog(f"You can see {portal['destination']} in the distance, but you don't know how to get there yet. Complete more quests to discover this location.")
+                # Run step triggers (portals, quest events) on the new tile
+                self.run_triggers(new_x, new_y, TRIGGER_STEP)
                     
                 # Random encounters
                 if random.random() < self.map_manager.current_map.encounter_rate:
@@ -1288,6 +1402,69 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
             print(f"Error during player movement: {e}")
             return False
             
+    def run_triggers(self, x, y, on):
+        """マップの (x, y) のトリガーを実行。調べる場合は最初に処理できたものだけ実行する"""
+        handled = False
+        for trigger in self.map_manager.current_map.get_triggers(x, y, on):
+            handler = self.trigger_handlers.get(trigger["type"])
+            if handler and handler(trigger):
+                handled = True
+                if on == TRIGGER_INTERACT:
+                    break
+        return handled
+        
+    def trigger_portal(self, trigger):
+        """ポータル：発見済みの町なら移動"""
+        portal = trigger["portal"]
+        # Check if the destination town is discovered
+        if self.can_enter_map(portal["destination"]):
+            self.change_map(portal["destination"], portal["dest_x"], portal["dest_y"])
+        else:
+            # Show message that the town is not yet discovered
+            self.start_dialog(f"You can see {portal['destination']} in the distance, but you don't know how to get there yet. Complete more quests to discover this location.")
+        return True
+        
+    def can_enter_map(self, map_name):
+        """ポータルで入れるマップか（町は発見済みのものだけ。ワールドマップにはいつでも戻れる）"""
+        # マップを作らずに登録内容で判定する（経路のグラフを作るたびに全マップについて呼ばれる）
+        return map_name in self.discovered_towns or get_map_type(map_name) == MAP_WORLD
+        
+    def trigger_npc(self, trigger):
+        """NPC：会話を開始"""
+        npc = trigger["npc"]
+        print(f"NPCが見つかりました: {npc['name']} at ({npc['x']}, {npc['y']})")
+        self.start_dialog(npc["dialog"], npc)
+        return True
+        
+    def trigger_shop(self, trigger):
+        """ショップ：買い物を開始"""
+        print(f"E key pressed: Entering shop {trigger['shop']['name']}")
+        self.start_shop(trigger["shop"])
+        return True
+        
+    def trigger_inn(self, trigger):
+        """宿屋：休憩してHP・MPを回復"""
+        print("E key pressed: Resting at inn")
+        self.rest_at_inn()
+        return True
+        
+    def trigger_quest(self, trigger):
+        """クエストイベント：進行中のクエストを完了し、次のクエストを追加"""
+        if "requires_town" in trigger and trigger["requires_town"] not in self.discovered_towns:
+            return False
+        if trigger["quest"] not in self.quest_system.active_quests:
+            return False
+        self.quest_system.complete_quest(trigger["quest"])
+        if "next_quest" in trigger:
+            self.quest_system.add_quest(trigger["next_quest"])
+        if trigger.get("save"):
+            # Save game after quest completion
+            try:
+                self.save_game()
+            except Exception as e:
+                print(f"Error saving game: {e}")
+        return True
+        
     def rest_at_inn(self):
         """Rest at the inn to recover HP and MP"""
         # Show dialog
@@ -1342,6 +1519,31 @@ Current objective: Go to Computing Town and talk to EC2. Other towns will be dis
         self.shop_system.set_shop_type(shop["type"])
         self.shop_system.active = True
         self.start_dialog(shop["dialog"], {"name": shop["name"]})
+        
+    def save_game(self):
+        """Save the current game state"""
+        try:
+            save_data = {
+                "player": self.player,
+                "party": self.party,
+                "current_map": self.map_manager.current_map.name,
+                "position": [self.player["tile_x"], self.player["tile_y"]],
+                "quests": {
+                    "active": self.quest_system.active_quests,
+                    "completed": self.quest_system.completed_quests
+                },
+                "discovered_towns": self.discovered_towns,
+                "map_overlays": self.map_manager.get_save_data()
+            }
+            
+            with open(self.save_file, 'w') as f:
+                json.dump(save_data, f)
+                
+            print(f"Game saved successfully to {self.save_file}")
+            return True
+        except Exception as e:
+            print(f"Error saving game: {e}")
+            return False
 
 # Define save_game as a standalone function first
         return False
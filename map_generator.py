@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+from tile_grid import TileGrid
+
+try:
+    import numpy
+except ImportError:  # numpyが無ければ同じ結果を1マスずつ計算する
+    numpy = None
+
+# Tile types（fixed_maps.py と同じ値）
+TILE_FLOOR = 1
+TILE_WALL = 2
+TILE_GRASS = 3
+TILE_WATER = 4
+TILE_ROAD = 5
+TILE_PORTAL = 8
+TILE_MOUNTAIN = 10
+TILE_FOREST = 11
+TILE_SAND = 12
+
+# ワールドマップの配置の基準になる大きさ（50x50で固定マップと同じ配置になる）
+WORLD_BASE_SIZE = 50
+
+# 乱数シードを指定したワールドで森にするノイズの閾値
+WORLD_FOREST_NOISE = 0.72
+
+# これより小さい範囲はnumpyを使わずに1マスずつ計算する（配列を作る手間の方が大きい）
+VECTORIZE_MIN_TILES = 1024
+
+# マスク関数は x, y（numpyの配列または整数）を受け取り、真偽を返す。
+# 配列にも整数にも使える演算（比較・算術・&・|）だけで書くと、numpyの有無で結果が変わらない
+
+def circle(center_x, center_y, radius_squared):
+    """中心からの距離の2乗が radius_squared 以下のマスク"""
+    return lambda x, y: (x - center_x) ** 2 + (y - center_y) ** 2 <= radius_squared
+
+def threshold(field, value):
+    """ノイズ（noise_fieldの結果）が value を超えるマスク"""
+    if numpy is not None:
+        return lambda x, y: field[y, x] > value
+    return lambda x, y: field[y][x] > value
+
+def _clip(tiles, x0, y0, x1, y1, bounds):
+    bx0, by0, bx1, by1 = bounds if bounds is not None else (0, 0, tiles.width, tiles.height)
+    return max(x0, bx0, 0), max(y0, by0, 0), min(x1, bx1, tiles.width), min(y1, by1, tiles.height)
+
+def paint(tiles, x0, y0, x1, y1, tile_type, mask=None, replace=(), keep=(), bounds=None):
+    """矩形 [x0, x1) x [y0, y1) のうち mask が真のタイルを tile_type にする
+    
+    replace を指定すればそのタイルだけを、keep を指定すればそれ以外のタイルだけを書き換える。
+    bounds (x0, y0, x1, y1) を指定すればその範囲の外は書き換えない。
+    """
+    x0, y0, x1, y1 = _clip(tiles, x0, y0, x1, y1, bounds)
+    if x0 >= x1 or y0 >= y1:
+        return
+    if mask is None and not replace and not keep:
+        tiles.fill_region(x0, y0, x1 - x0, y1 - y0, tile_type)
+        return
+    if numpy is not None and (x1 - x0) * (y1 - y0) >= VECTORIZE_MIN_TILES:
+        view = tiles.as_array()[y0:y1, x0:x1]
+        selected = numpy.ones(view.shape, dtype=bool)
+        if mask is not None:
+            y, x = numpy.ogrid[y0:y1, x0:x1]
+            selected &= mask(x, y)
+        if replace:
+            selected &= numpy.isin(view, replace)
+        if keep:
+            selected &= ~numpy.isin(view, keep)
+        view[selected] = tile_type
+        return
+    for y in range(y0, y1):
+        row = tiles[y]
+        for x in range(x0, x1):
+            if (mask is None or mask(x, y)) and (not replace or row[x] in replace) and row[x] not in keep:
+                row[x] = tile_type
+
+def place_building(tiles, x, y, width, height, wall=TILE_WALL, floor=TILE_FLOOR, bounds=None):
+    """外周が壁・内側が床の建物を置く（bounds の外は書き換えない）"""
+    paint(tiles, x, y, x + width, y + height, floor, bounds=bounds)
+    paint(tiles, x, y, x + width, y + 1, wall, bounds=bounds)
+    paint(tiles, x, y + height - 1, x + width, y + height, wall, bounds=bounds)
+    paint(tiles, x, y, x + 1, y + height, wall, bounds=bounds)
+    paint(tiles, x + width - 1, y, x + width, y + height, wall, bounds=bounds)
+
+def region_contains(tiles, x0, y0, x1, y1, tile_types):
+    """矩形 [x0, x1) x [y0, y1)（マップ外は除く）に tile_types のいずれかがあるか"""
+    x0, y0, x1, y1 = _clip(tiles, x0, y0, x1, y1, None)
+    if x0 >= x1 or y0 >= y1:
+        return False
+    if numpy is not None and (x1 - x0) * (y1 - y0) >= VECTORIZE_MIN_TILES:
+        return bool(numpy.isin(tiles.as_array()[y0:y1, x0:x1], tile_types).any())
+    return any(tile in tile_types for y in range(y0, y1) for tile in tiles.row(y, x0, x1))
+
+def noise_field(width, height, seed, cell_size):
+    """格子点の乱数を双線形補間したバリューノイズ（0以上1未満）
+    
+    格子点の乱数はシードから random.Random で作るので、numpyの有無で同じ値になる。
+    numpyがあれば (height, width) の配列、無ければ行のリスト。
+    """
+    rng = random.Random(seed)
+    lattice_width = width // cell_size + 2
+    lattice_height = height // cell_size + 2
+    lattice = [[rng.random() for _ in range(lattice_width)] for _ in range(lattice_height)]
+    
+    if numpy is not None:
+        grid = numpy.array(lattice)
+        y, x = numpy.ogrid[0:height, 0:width]
+        cell_x, cell_y = x // cell_size, y // cell_size
+        fx = (x % cell_size) / cell_size
+        fy = (y % cell_size) / cell_size
+        top = grid[cell_y, cell_x] * (1 - fx) + grid[cell_y, cell_x + 1] * fx
+        bottom = grid[cell_y + 1, cell_x] * (1 - fx) + grid[cell_y + 1, cell_x + 1] * fx
+        return top * (1 - fy) + bottom * fy
+    
+    field = []
+    for y in range(height):
+        cell_y, fy = y // cell_size, (y % cell_size) / cell_size
+        row = []
+        for x in range(width):
+            cell_x, fx = x // cell_size, (x % cell_size) / cell_size
+            top = lattice[cell_y][cell_x] * (1 - fx) + lattice[cell_y][cell_x + 1] * fx
+            bottom = lattice[cell_y + 1][cell_x] * (1 - fx) + lattice[cell_y + 1][cell_x + 1] * fx
+            row.append(top * (1 - fy) + bottom * fy)
+        field.append(row)
+    return field
+
+def rasterize_path(points):
+    """折れ線（頂点 (x, y) のリスト）が通るタイル。区間ごとに長い方の軸で1マスずつ進める"""
+    if numpy is not None:
+        xs, ys = [], []
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            steps = max(abs(x1 - x0), abs(y1 - y0), 1)
+            i = numpy.arange(steps + 1)
+            xs.append(x0 + ((x1 - x0) * i) // steps)
+            ys.append(y0 + ((y1 - y0) * i) // steps)
+        if not xs:
+            return numpy.array([points[0][0]]), numpy.array([points[0][1]])
+        return numpy.concatenate(xs), numpy.concatenate(ys)
+    
+    xs, ys = [points[0][0]], [points[0][1]]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        steps = max(abs(x1 - x0), abs(y1 - y0), 1)
+        for i in range(steps + 1):
+            xs.append(x0 + ((x1 - x0) * i) // steps)
+            ys.append(y0 + ((y1 - y0) * i) // steps)
+    return xs, ys
+
+def draw_path(tiles, points, tile_type, radius=0, keep=(), bounds=None):
+    """折れ線に沿って幅 radius*2+1 の道・川を描く（keep のタイルは書き換えない）"""
+    xs, ys = rasterize_path(points)
+    x0, y0, x1, y1 = _clip(tiles, 0, 0, tiles.width, tiles.height, bounds)
+    if numpy is not None:
+        offsets = numpy.arange(-radius, radius + 1)
+        px, py = numpy.broadcast_arrays(xs[:, None, None] + offsets[None, None, :], ys[:, None, None] + offsets[None, :, None])
+        px, py = px.ravel(), py.ravel()
+        inside = (px >= x0) & (px < x1) & (py >= y0) & (py < y1)
+        flat = tiles.as_array().reshape(-1)
+        indices = numpy.unique(py[inside] * tiles.width + px[inside])
+        if keep:
+            indices = indices[~numpy.isin(flat[indices], keep)]
+        flat[indices] = tile_type
+        return
+    for cx, cy in zip(xs, ys):
+        for y in range(max(cy - radius, y0), min(cy + radius + 1, y1)):
+            for x in range(max(cx - radius, x0), min(cx + radius + 1, x1)):
+                if tiles.get(x, y) not in keep:
+                    tiles.set(x, y, tile_type)
+
+def _add_rivers(tiles, rng, scaled):
+    """西から東へ蛇行する川（頂点を乱数で決めて折れ線で描く）"""
+    width, height = tiles.width, tiles.height
+    step = scaled(5)
+    for _ in range(max(1, width // 500)):
+        y = rng.randrange(height // 10, height * 9 // 10)
+        points = []
+        for x in range(1, width - 1, step):
+            points.append((x, y))
+            y = max(1, min(height - 2, y + rng.randint(-step, step)))
+        points.append((width - 2, y))
+        draw_path(tiles, points, TILE_WATER, radius=scaled(1) // 8, keep=(TILE_WALL,), bounds=(1, 1, width - 1, height - 1))
+
+def generate_world_tiles(width=WORLD_BASE_SIZE, height=WORLD_BASE_SIZE, seed=None):
+    """ワールドマップのタイルを生成（50x50・シード無しで固定マップと同じ配置。大きさに合わせて配置を拡大する）
+    
+    seed を指定すると、ノイズの森と蛇行する川を加える。
+    """
+    tiles = TileGrid(width, height, TILE_GRASS)
+    tiles.fill_border(0, 0, width, height, TILE_WALL)
+    interior = (1, 1, width - 1, height - 1)
+    
+    def scaled(n):
+        return max(1, n * min(width, height) // WORLD_BASE_SIZE)
+    
+    center_x, center_y = width // 2, height // 2
+    west, east = width // 5, width * 4 // 5
+    north, south = height // 5, height * 4 // 5
+    
+    # 中央に大きな湖（上下は帯状に切り取る）
+    paint(tiles, width * 3 // 10, height * 2 // 5, width * 7 // 10, height * 3 // 5, TILE_WATER, circle(center_x, center_y, (width // 5) ** 2))
+    # 北側に山脈、南側に森（固定パターン）、東側に砂漠
+    paint(tiles, west, height // 10, east, height * 3 // 10, TILE_MOUNTAIN, lambda x, y: ((x + y) % 3 == 0) | ((x - y) % 5 == 0))
+    paint(tiles, west, height * 7 // 10, east, height * 9 // 10, TILE_FOREST, lambda x, y: ((x * y) % 7 == 0) | ((x + y) % 8 == 0))
+    paint(tiles, width * 7 // 10, height * 3 // 10, width * 9 // 10, height * 7 // 10, TILE_SAND)
+    
+    if seed is not None:
+        rng = random.Random(seed)
+        field = noise_field(width, height, rng.random(), scaled(8))
+        paint(tiles, 1, 1, width - 1, height - 1, TILE_FOREST, threshold(field, WORLD_FOREST_NOISE), replace=(TILE_GRASS,))
+        _add_rivers(tiles, rng, scaled)
+    
+    # 道路：中央の十字路と初期位置の安全地帯、町への道路
+    paint(tiles, 1, center_y, width - 1, center_y + 1, TILE_ROAD)
+    paint(tiles, center_x, 1, center_x + 1, height - 1, TILE_ROAD)
+    paint(tiles, center_x - 2, center_y - 2, center_x + 3, center_y + 3, TILE_ROAD)
+    for road_y, x0, x1 in ((north, west, center_x), (north, center_x, east), (south, west, center_x), (south, center_x, east)):
+        paint(tiles, x0, road_y, x1, road_y + 1, TILE_ROAD)
+    for road_x, y0, y1 in ((west, north, center_y), (east, north, center_y), (west, center_y, south), (east, center_y, south)):
+        paint(tiles, road_x, y0, road_x + 1, y1, TILE_ROAD)
+    
+    # 町の位置（ポータル）。周辺の山や森を草原に戻して入口を確保
+    clearance = scaled(3)
+    for x, y in ((west, north), (east, north), (west, south), (east, south)):
+        tiles.set(x, y, TILE_PORTAL)
+        paint(tiles, x - clearance, y - clearance, x + clearance + 1, y + clearance + 1, TILE_GRASS,
+              replace=(TILE_MOUNTAIN, TILE_FOREST), bounds=interior)
+    
+    # 四隅の小さな湖
+    radius = scaled(2)
+    for x, y in ((width * 7 // 50, height * 7 // 50), (width * 21 // 25, height * 7 // 50),
+                 (width * 7 // 50, height * 21 // 25), (width * 21 // 25, height * 21 // 25)):
+        paint(tiles, x - radius, y - radius, x + radius + 1, y + radius + 1, TILE_WATER, circle(x, y, radius ** 2))
+    
+    # 森林・山岳のクラスター（道路・水・ポータルは上書きしない）
+    clusters = (
+        (TILE_FOREST, width * 3 // 10, height * 3 // 10, scaled(3)),
+        (TILE_FOREST, width * 7 // 10, height * 7 // 10, scaled(4)),
+        (TILE_FOREST, width * 3 // 10, height * 7 // 10, scaled(3)),
+        (TILE_FOREST, width * 7 // 10, height * 3 // 10, scaled(4)),
+        (TILE_MOUNTAIN, width * 2 // 5, north, scaled(2)),
+        (TILE_MOUNTAIN, width * 3 // 5, north, scaled(3)),
+        (TILE_MOUNTAIN, width * 2 // 5, south, scaled(3)),
+        (TILE_MOUNTAIN, width * 3 // 5, south, scaled(2))
+    )
+    for tile_type, x, y, size in clusters:
+        paint(tiles, x - size, y - size, x + size + 1, y + size + 1, tile_type, circle(x, y, size ** 2),
+              keep=(TILE_ROAD, TILE_WATER, TILE_PORTAL), bounds=interior)
+    return tiles
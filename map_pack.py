@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import inspect
+import map_generator
+from tile_grid import TileGrid
+
+# マップパックの形式
+#   ヘッダー: マジック, バージョン, マップ数, 内容ハッシュ(sha256), 索引の長さ
+#   索引: マップごとの名前・サイズ・タイルとエンティティの位置（JSON）
+#   本体: マップごとのタイル（1タイル1バイト、行優先）とエンティティ表（npcs/portals/shops/triggers のJSON）
+MAP_PACK_MAGIC = b"AWMP"
+MAP_PACK_VERSION = 1
+MAP_PACK_HEADER = struct.Struct("<4sHH32sI")
+
+# マップパックのファイル（ゲームと同じディレクトリに作る）
+MAP_PACK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps.pack")
+
+# マップ生成時の乱数シード（パックの有無で町の配置が変わらないように固定する）
+MAP_PACK_SEED = 20250101
+
+# エンティティ表に入れるキー
+ENTITY_KEYS = ("npcs", "portals", "shops", "triggers")
+
+def _module_bytecode(module):
+    """モジュールで定義した関数・メソッドのバイトコード（ソースファイルが無い凍結・.pycのみの配布でハッシュに使う）"""
+    parts = []
+    for name, value in sorted(vars(module).items()):
+        if getattr(value, "__module__", None) != module.__name__:
+            continue
+        if inspect.isfunction(value):
+            parts.append(value.__code__.co_code)
+        elif inspect.isclass(value):
+            parts.extend(method.__code__.co_code for _, method in sorted(vars(value).items()) if inspect.isfunction(method))
+    return b"".join(parts)
+
+def compute_content_hash(builders, build_layout=None):
+    """マップ生成関数・build_layout のソースとパックの形式から内容ハッシュを求める（変わればパックを作り直す）"""
+    digest = hashlib.sha256()
+    digest.update(f"{MAP_PACK_VERSION}:{MAP_PACK_SEED}".encode())
+    objects = []
+    for name, (builder, map_type) in builders.items():
+        digest.update(f"{name}:{builder.__module__}.{builder.__name__}:{map_type}".encode("utf-8"))
+        objects.append(builder)
+    # タイルの格納形式と地形の生成、乱数シードの決め方とタイルIDの定義（build_layoutのモジュール）も含める
+    if build_layout is not None:
+        objects.append(build_layout)
+    objects.append(TileGrid)
+    objects.append(map_generator)
+    
+    sources = set()
+    compiled = {}  # ソースファイルが無いモジュール（モジュール名 -> モジュール）
+    for obj in objects:
+        try:
+            path = inspect.getsourcefile(obj)
+        except TypeError:
+            path = None
+        if path is not None:
+            sources.add(path)
+        else:
+            module = inspect.getmodule(obj)
+            compiled[module.__name__] = module
+    for path in sorted(sources):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    for name, module in sorted(compiled.items()):
+        digest.update(name.encode("utf-8"))
+        digest.update(_module_bytecode(module))
+    return digest.digest()
+
+def compile_map_pack(path, builders, build_layout, content_hash=None):
+    """全マップを一度だけ生成してマップパックに書き出す"""
+    if content_hash is None:
+        content_hash = compute_content_hash(builders, build_layout)
+    
+    index = []
+    blobs = []
+    offset = 0
+    for name in builders:
+        layout = build_layout(name)
+        tiles = bytes(layout["tiles"].data)
+        entities = json.dumps({key: layout[key] for key in ENTITY_KEYS if key in layout}, ensure_ascii=False).encode("utf-8")
+        index.append({
+            "name": name,
+            "width": layout["width"],
+            "height": layout["height"],
+            "map_type": layout["map_type"],
+            "encounter_rate": layout.get("encounter_rate", 0.0),
+            "tiles": [offset, len(tiles)],
+            "entities": [offset + len(tiles), len(entities)]
+        })
+        blobs.append(tiles)
+        blobs.append(entities)
+        offset += len(tiles) + len(entities)
+    
+    index_data = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    header = MAP_PACK_HEADER.pack(MAP_PACK_MAGIC, MAP_PACK_VERSION, len(index), content_hash, len(index_data))
+    
+    # 書き込み途中のパックを読まないよう、一時ファイルから置き換える
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(header)
+        f.write(index_data)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temp_path, path)
+
+class MapPack:
+    """mmapで開いたマップパック。タイルはファイルを複製せずに参照する"""
+        
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        
+        if len(self._mmap) < MAP_PACK_HEADER.size:
+            raise ValueError("map pack is truncated")
+        magic, self.version, count, self.content_hash, index_length = MAP_PACK_HEADER.unpack_from(self._mmap)
+        if magic != MAP_PACK_MAGIC:
+            raise ValueError("not a map pack")
+        
+        index_start = MAP_PACK_HEADER.size
+        self.data_offset = index_start + index_length
+        self.maps = {entry["name"]: entry for entry in json.loads(bytes(self._view[index_start:self.data_offset]).decode("utf-8"))}
+        if len(self.maps) != count:
+            raise ValueError("map pack index is corrupt")
+        # 本体が短い・索引が壊れているパックは開いた時点で弾き、作り直させる
+        for name, entry in self.maps.items():
+            for key in ("tiles", "entities"):
+                start, length = entry[key]
+                if start < 0 or length < 0 or self.data_offset + start + length > len(self._mmap):
+                    raise ValueError(f"map pack data for {name} is truncated")
+            if entry["tiles"][1] != entry["width"] * entry["height"]:
+                raise ValueError(f"map pack tiles for {name} do not match its size")
+        
+    def close(self):
+        """mmapを閉じる（get_layoutで返したタイルを使い終わってから）"""
+        self._view.release()
+        self._mmap.close()
+        
+    def _slice(self, span):
+        start = self.data_offset + span[0]
+        return self._view[start:start + span[1]]
+        
+    def get_layout(self, name):
+        """マップの基本レイアウトを取得（タイルはmmapのビューを共有する読み取り専用のTileGrid）"""
+        entry = self.maps.get(name)
+        if entry is None:
+            return None
+        layout = json.loads(bytes(self._slice(entry["entities"])).decode("utf-8"))
+        layout["name"] = name
+        layout["width"] = entry["width"]
+        layout["height"] = entry["height"]
+        layout["map_type"] = entry["map_type"]
+        layout["encounter_rate"] = entry["encounter_rate"]
+        layout["tiles"] = TileGrid(entry["width"], entry["height"], data=self._slice(entry["tiles"]))
+        return layout
+
+def open_map_pack(path, builders, build_layout):
+    """マップパックを開く。無い・形式が古い・内容ハッシュが違う場合は作り直す"""
+    content_hash = compute_content_hash(builders, build_layout)
+    try:
+        pack = MapPack(path)
+        if pack.version == MAP_PACK_VERSION and pack.content_hash == content_hash and set(pack.maps) == set(builders):
+            return pack
+        pack.close()
+        print("マップパックが古いため作り直します")
+    except (OSError, ValueError) as e:
+        print(f"マップパックを作成します: {e}")
+    
+    compile_map_pack(path, builders, build_layout, content_hash)
+    return MapPack(path)
+
+if __name__ == "__main__":
+    # python map_pack.py [出力先] でマップパックを作り直す
+    from game_map import MAP_BUILDERS, build_layout
+    output = sys.argv[1] if len(sys.argv) > 1 else MAP_PACK_PATH
+    compile_map_pack(output, MAP_BUILDERS, build_layout)
+    print(f"Wrote {output} ({os.path.getsize(output)} bytes)")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from map_pack import MapPack
+from game_map import MAP_BUILDERS, START_POSITION, get_base_layout, get_property_table, PROP_WALKABLE, TILE_INN, NPC_TALK_RADIUS, SHOP_INTERACT_RADIUS
+
+# これより少ないマップはプロセスプールを使わずに検証する（起動の手間の方が大きい）
+VALIDATE_POOL_MIN_MAPS = 4
+
+def label_components(walkable, width, height):
+    """歩行可能なタイルの連結成分（上下左右）にラベルを付ける
+    
+    行ごとに歩行可能な区間を取り出し、前の行の区間と重なれば同じ成分としてまとめる（Union-Find）。
+    戻り値は (ラベルの配列, 成分の数)。ラベルは1から始まり、歩行不可のタイルは0。
+    """
+    parent = [0]
+    
+    def find(label):
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+    
+    runs = []           # (開始インデックス, 終了インデックス, 仮のラベル)
+    previous = []       # 前の行の (開始x, 終了x, 仮のラベル)
+    data = bytes(walkable)
+    for y in range(height):
+        offset = y * width
+        current = []
+        start = data.find(1, offset, offset + width)
+        index = 0
+        while start != -1:
+            end = data.find(0, start, offset + width)
+            if end == -1:
+                end = offset + width
+            x0, x1 = start - offset, end - offset
+            # 前の行で重なる区間のラベルをまとめる
+            while index < len(previous) and previous[index][1] <= x0:
+                index += 1
+            label = None
+            scan = index
+            while scan < len(previous) and previous[scan][0] < x1:
+                other = find(previous[scan][2])
+                if label is None:
+                    label = other
+                elif other != label:
+                    parent[other] = label
+                scan += 1
+            if label is None:
+                label = len(parent)
+                parent.append(label)
+            current.append((x0, x1, label))
+            runs.append((start, end, label))
+            start = data.find(1, end, offset + width)
+        previous = current
+    
+    labels = array("i", bytes(4 * width * height))
+    final = {}
+    for start, end, label in runs:
+        root = find(label)
+        number = final.get(root)
+        if number is None:
+            number = final[root] = len(final) + 1
+        labels[start:end] = array("i", [number]) * (end - start)
+    return labels, len(final)
+
+def _issue(map_name, kind, message):
+    return {"map": map_name, "kind": kind, "message": message}
+
+def validate_map(task):
+    """1つのマップを検証し、問題の一覧を返す（プロセスプールから呼ぶのでタスクは素のデータ）
+    
+    task は build_tasks が作る辞書（名前・大きさ・歩行可能ビットマップ・エンティティ・出現位置）。
+    """
+    name, width, height = task["name"], task["width"], task["height"]
+    walkable = task["walkable"]
+    labels, _ = label_components(walkable, width, height)
+    issues = []
+    
+    # 出現位置（開始位置やポータルの移動先）は歩行可能でなければならない
+    reachable = set()
+    for x, y, source in task["spawns"]:
+        if not (0 <= x < width and 0 <= y < height):
+            issues.append(_issue(name, "spawn", f"{source} lands outside the map at ({x}, {y})"))
+        elif not walkable[y * width + x]:
+            issues.append(_issue(name, "spawn", f"{source} lands on a non-walkable tile at ({x}, {y})"))
+        else:
+            reachable.add(labels[y * width + x])
+    if not task["spawns"]:
+        issues.append(_issue(name, "spawn", "no portal or start position leads to this map"))
+        return issues
+    
+    # エンティティは、話しかけられる範囲のどこかに出現位置からたどり着ければよい
+    for kind, label, x, y, radius in task["entities"]:
+        if not (0 <= x < width and 0 <= y < height):
+            issues.append(_issue(name, kind, f"{label} is outside the map at ({x}, {y})"))
+            continue
+        found = False
+        for tile_y in range(max(0, y - radius), min(height, y + radius + 1)):
+            row = tile_y * width
+            if any(labels[row + tile_x] in reachable for tile_x in range(max(0, x - radius), min(width, x + radius + 1))):
+                found = True
+                break
+        if not found:
+            issues.append(_issue(name, kind, f"{label} at ({x}, {y}) is unreachable from spawn"))
+    return issues
+
+def build_tasks(layouts, start=START_POSITION):
+    """マップの基本レイアウト（マップ名 -> レイアウト）から検証タスクを作る。マップをまたぐ問題も返す"""
+    table = get_property_table(PROP_WALKABLE)
+    spawns = {name: [] for name in layouts}
+    issues = []
+    if start is not None and start[0] in spawns:
+        spawns[start[0]].append((start[1], start[2], "start position"))
+    for name, layout in layouts.items():
+        for portal in layout.get("portals", []):
+            destination = portal["destination"]
+            if destination not in spawns:
+                issues.append(_issue(name, "portal", f"portal at ({portal['x']}, {portal['y']}) leads to unknown map {destination}"))
+                continue
+            spawns[destination].append((portal["dest_x"], portal["dest_y"], f"portal from {name} ({portal['x']}, {portal['y']})"))
+    
+    tasks = []
+    for name, layout in layouts.items():
+        tiles = layout["tiles"]
+        entities = []
+        for portal in layout.get("portals", []):
+            entities.append(("portal", f"portal to {portal['destination']}", portal["x"], portal["y"], 0))
+        for npc in layout.get("npcs", []):
+            entities.append(("npc", f"NPC {npc['name']}", npc["x"], npc["y"], NPC_TALK_RADIUS))
+        for shop in layout.get("shops", []):
+            entities.append(("shop", f"shop {shop['name']}", shop["x"], shop["y"], SHOP_INTERACT_RADIUS))
+        for x, y in tiles.find_all(TILE_INN):
+            entities.append(("inn", "inn", x, y, 0))
+        for trigger in layout.get("triggers", []):
+            entities.append(("trigger", f"{trigger['type']} trigger", trigger["x"], trigger["y"], trigger.get("radius", 0)))
+        tasks.append({
+            "name": name,
+            "width": layout["width"],
+            "height": layout["height"],
+            "walkable": bytes(tiles.data).translate(table),
+            "entities": entities,
+            "spawns": spawns[name]
+        })
+    return tasks, issues
+
+def validate_layouts(layouts, start=START_POSITION, workers=None):
+    """全マップを検証して問題の一覧を返す（マップが多ければプロセスプールで並列に検証）"""
+    tasks, issues = build_tasks(layouts, start)
+    if workers == 1 or len(tasks) < VALIDATE_POOL_MIN_MAPS:
+        for task in tasks:
+            issues.extend(validate_map(task))
+        return issues
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(validate_map, tasks, chunksize=max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))):
+            issues.extend(result)
+    return issues
+
+def load_layouts(pack_path=None):
+    """検証するレイアウト（パスを指定すればそのマップパック、無ければ登録済みの全マップ）"""
+    if pack_path:
+        pack = MapPack(pack_path)
+        return {name: pack.get_layout(name) for name in pack.maps}
+    return {name: get_base_layout(name) for name in MAP_BUILDERS}
+
+if __name__ == "__main__":
+    # python map_validator.py [マップパック] で全マップを検証する（問題があれば終了コード1）
+    started = time.perf_counter()
+    layouts = load_layouts(sys.argv[1] if len(sys.argv) > 1 else None)
+    issues = validate_layouts(layouts)
+    for issue in issues:
+        print(f"[{issue['map']}] {issue['kind']}: {issue['message']}")
+    print(f"Validated {len(layouts)} maps in {time.perf_counter() - started:.2f}s: {len(issues)} issue(s)")
+    sys.exit(1 if issues else 0)
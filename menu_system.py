@@ -23,15 +23,14 @@ class MenuSystem:
         self.selected_party_member = None
         self.message = ""
         
-    def draw(self, screen):
-        """メニュー画面を描画"""
+    def draw(self, screen, dim_background=True):
+        """メニュー画面を描画（背景が暗転済みならdim_background=False）"""
         if not self.active:
             return
             
         # 半透明の背景
-        overlay = pygame.Surface((800, 600), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
+        if dim_background:
+            screen.blit(self.assets.get_overlay(800, 600), (0, 0))
         
         # メニューパネル
         menu_panel = pygame.Rect(50, 50, 700, 500)
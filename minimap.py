@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pygame
+from collections import OrderedDict
+
+try:
+    import numpy
+except ImportError:  # numpyが無い環境ではミニマップを作らない（pygame.surfarrayもnumpyが必要）
+    numpy = None
+
+# ミニマップを作れるかどうか
+MINIMAP_SUPPORTED = numpy is not None
+
+# ミニマップ画像の長辺の最大ピクセル数（大きなマップは数タイルを1ピクセルに縮める）
+MINIMAP_MAX_SIZE = 1024
+
+# ストリーミングでまだ読み込んでいない範囲の色
+MINIMAP_UNKNOWN_COLOR = (0, 0, 0)
+
+# 書き直す範囲がこれより多くたまったら、全体を囲む1つの矩形にまとめる
+MINIMAP_MAX_DIRTY_RECTS = 64
+
+# 拡大縮小した表示用の画像のキャッシュ件数（ミニマップの窓と全体図）
+MINIMAP_VIEW_CACHE_MAX_ENTRIES = 4
+
+class Minimap:
+    """マップ全体を縮小した画像。タイルの種類をパレットで色に変換し、surfarrayでまとめて書き込む
+    
+    1ピクセルは scale x scale タイルの左上のタイルの色。タイルが変わったら、変わった範囲のピクセルだけを書き直す。
+    """
+        
+    def __init__(self, game_map, colors, max_size=MINIMAP_MAX_SIZE):
+        self.game_map = game_map
+        self.palette = numpy.frombuffer(bytes(colors), dtype=numpy.uint8).reshape(256, 3)  # タイルタイプ -> RGB
+        self.scale = max(1, -(-max(game_map.width, game_map.height) // max_size))  # 1ピクセルあたりのタイル数
+        self.width = -(-game_map.width // self.scale)
+        self.height = -(-game_map.height // self.scale)
+        self.surface = pygame.Surface((self.width, self.height))
+        self.version = 0        # 書き直すたびに増える
+        self._full = True       # 次の update で全体を書き直すかどうか
+        self._dirty = []        # 次の update で書き直す範囲（ピクセル座標の (left, top, right, bottom)）
+        self._views = OrderedDict()  # (x, y, width, height, size) -> 拡大縮小した画像（最近使った順）
+        
+    def mark_dirty(self, x=None, y=None, width=1, height=1):
+        """タイルが変わった範囲（タイル座標。指定がなければ全体）を次の update で書き直す"""
+        if x is None or y is None:
+            self._full = True
+            return
+        if self._full:
+            return
+        scale = self.scale
+        left, top = max(0, x // scale), max(0, y // scale)
+        right = min(self.width, -(-(x + width) // scale))
+        bottom = min(self.height, -(-(y + height) // scale))
+        if left >= right or top >= bottom:
+            return
+        self._dirty.append((left, top, right, bottom))
+        if len(self._dirty) > MINIMAP_MAX_DIRTY_RECTS:
+            rects = self._dirty
+            self._dirty = [(min(rect[0] for rect in rects), min(rect[1] for rect in rects),
+                            max(rect[2] for rect in rects), max(rect[3] for rect in rects))]
+        
+    def update(self):
+        """たまっている変更を画像に反映する"""
+        if self._full:
+            self._full = False
+            self._dirty = []
+            self.surface.fill(MINIMAP_UNKNOWN_COLOR)
+            self._render(0, 0, self.width, self.height)
+        elif self._dirty:
+            for rect in self._dirty:
+                self._render(*rect)
+            self._dirty = []
+        else:
+            return
+        self.version += 1
+        self._views.clear()
+        
+    def _render(self, left, top, right, bottom):
+        """ピクセルの範囲を書き直す（ストリーミングするマップは読み込み済みのチャンクだけ。新たに読み込みはしない）"""
+        tiles = self.game_map.tiles
+        if self.game_map.streamed:
+            size = tiles.chunk_size
+            for (chunk_x, chunk_y), chunk in tiles.chunks.items():
+                self._blit_tiles(chunk.as_array(), chunk_x * size, chunk_y * size, left, top, right, bottom)
+        else:
+            self._blit_tiles(tiles.as_array(), 0, 0, left, top, right, bottom)
+        
+    def _blit_tiles(self, grid, origin_x, origin_y, left, top, right, bottom):
+        """タイル配列 grid（左上がタイル座標 (origin_x, origin_y)）のうち、ピクセルの範囲に入る部分を書き込む"""
+        scale = self.scale
+        grid_height, grid_width = grid.shape
+        x0 = max(left, -(-origin_x // scale))
+        y0 = max(top, -(-origin_y // scale))
+        x1 = min(right, -(-(origin_x + grid_width) // scale))
+        y1 = min(bottom, -(-(origin_y + grid_height) // scale))
+        if x0 >= x1 or y0 >= y1:
+            return
+        # 各ピクセルの左上のタイルを取り出し、パレットで色に変換（surfarrayは (x, y) の順）
+        sample = grid[y0 * scale - origin_y:(y1 - 1) * scale - origin_y + 1:scale,
+                      x0 * scale - origin_x:(x1 - 1) * scale - origin_x + 1:scale]
+        pygame.surfarray.blit_array(self.surface.subsurface((x0, y0, x1 - x0, y1 - y0)), self.palette[sample.T])
+        
+    def get_view(self, x, y, width, height, size):
+        """タイル座標の矩形 (x, y, width, height) を size（ピクセルの幅と高さ）に拡大縮小した画像"""
+        self.update()
+        key = (x, y, width, height, tuple(size))
+        view = self._views.get(key)
+        if view is not None:
+            self._views.move_to_end(key)
+            return view
+        scale = self.scale
+        left, top = x // scale, y // scale
+        rect = pygame.Rect(left, top, -(-(x + width) // scale) - left, -(-(y + height) // scale) - top)
+        view = self._views[key] = pygame.transform.scale(self.surface.subsurface(rect.clip(self.surface.get_rect())), key[4])
+        if len(self._views) > MINIMAP_VIEW_CACHE_MAX_ENTRIES:
+            self._views.popitem(last=False)
+        return view
+        
+    def memory_usage(self):
+        """ミニマップ画像と表示用の画像のバイト数"""
+        surfaces = [self.surface] + list(self._views.values())
+        return sum(surface.get_width() * surface.get_height() * surface.get_bytesize() for surface in surfaces)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import heapq
+from collections import OrderedDict
+
+# 経路キャッシュの上限件数
+PATH_CACHE_MAX_ENTRIES = 128
+
+# 上下左右の移動
+NEIGHBOR_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+def _walkable_at(walkable, width, height, x, y):
+    return 0 <= x < width and 0 <= y < height and walkable[y * width + x] == 1
+
+def _build_path(came_from, goal_index, width):
+    """came_from（インデックス -> 直前のインデックス）をたどって経路を作る"""
+    path = []
+    index = goal_index
+    while index is not None:
+        path.append((index % width, index // width))
+        index = came_from[index]
+    path.reverse()
+    return path
+
+def find_path_astar(walkable, width, height, start, goal):
+    """二分ヒープを使ったA*で start から goal への最短経路（上下左右の移動）を探す
+    
+    walkable は1タイル1バイトの歩行可能ビットマップ（行優先、歩行可能なら1）。
+    経路は start と goal を含む (x, y) のリスト。見つからなければNone。
+    """
+    if not _walkable_at(walkable, width, height, *start) or not _walkable_at(walkable, width, height, *goal):
+        return None
+    goal_x, goal_y = goal
+    start_index = start[1] * width + start[0]
+    goal_index = goal_y * width + goal_x
+    
+    came_from = {start_index: None}
+    cost = {start_index: 0}
+    h = abs(start[0] - goal_x) + abs(start[1] - goal_y)
+    open_heap = [(h, h, start_index)]
+    closed = set()
+    while open_heap:
+        _, _, index = heapq.heappop(open_heap)
+        if index == goal_index:
+            return _build_path(came_from, goal_index, width)
+        if index in closed:
+            continue
+        closed.add(index)
+        y, x = divmod(index, width)
+        next_cost = cost[index] + 1
+        for step_x, step_y in NEIGHBOR_STEPS:
+            nx, ny = x + step_x, y + step_y
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            neighbor = index + step_y * width + step_x
+            if walkable[neighbor] != 1:
+                continue
+            if next_cost < cost.get(neighbor, next_cost + 1):
+                cost[neighbor] = next_cost
+                came_from[neighbor] = index
+                h = abs(nx - goal_x) + abs(ny - goal_y)
+                # fが同じならゴールに近い方を先に調べる
+                heapq.heappush(open_heap, (next_cost + h, h, neighbor))
+    return None
+
+def pad_walkable(walkable, width, height):
+    """周囲を1マスの歩行不可で囲んだビットマップ（範囲チェックを省くため）"""
+    padded = bytearray((width + 2) * (height + 2))
+    stride = width + 2
+    for y in range(height):
+        start = (y + 1) * stride + 1
+        padded[start:start + width] = bytes(walkable[y * width:(y + 1) * width])
+    return padded
+
+def find_path_jps(walkable, width, height, start, goal, padded=None):
+    """上下左右移動のジャンプポイントサーチ（一様コストのグリッド向け）。結果はA*と同じ長さの最短経路
+    
+    padded に pad_walkable の結果を渡すと、同じマップでの探索のたびに作り直さずに済む。
+    """
+    if not _walkable_at(walkable, width, height, *start) or not _walkable_at(walkable, width, height, *goal):
+        return None
+    if padded is None:
+        padded = pad_walkable(walkable, width, height)
+    stride = width + 2
+    goal_index = (goal[1] + 1) * stride + goal[0] + 1
+    start_index = (start[1] + 1) * stride + start[0] + 1
+    
+    def jump_horizontal(index, step):
+        # 横方向は、上下に回り込める場所（強制隣接）があればジャンプポイント
+        while padded[index]:
+            if index == goal_index:
+                return True
+            if (padded[index - stride] and not padded[index - stride - step]) or (padded[index + stride] and not padded[index + stride - step]):
+                return True
+            index += step
+        return False
+    
+    def jump(index, step):
+        if step == 1 or step == -1:
+            while padded[index]:
+                if index == goal_index:
+                    return index
+                if (padded[index - stride] and not padded[index - stride - step]) or (padded[index + stride] and not padded[index + stride - step]):
+                    return index
+                index += step
+            return None
+        while padded[index]:
+            if index == goal_index:
+                return index
+            if (padded[index - 1] and not padded[index - 1 - step]) or (padded[index + 1] and not padded[index + 1 - step]):
+                return index
+            # 縦方向に進むときは、横方向にジャンプポイントがあればここで曲がる
+            if jump_horizontal(index + 1, 1) or jump_horizontal(index - 1, -1):
+                return index
+            index += step
+        return None
+    
+    all_steps = (1, -1, stride, -stride)
+    goal_x, goal_y = goal_index % stride, goal_index // stride
+    came_from = {start_index: None}
+    cost = {start_index: 0}
+    h = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
+    open_heap = [(h, h, start_index)]
+    closed = set()
+    while open_heap:
+        _, _, index = heapq.heappop(open_heap)
+        if index == goal_index:
+            break
+        if index in closed:
+            continue
+        closed.add(index)
+        
+        parent = came_from[index]
+        if parent is None:
+            steps = all_steps
+        elif abs(index - parent) < stride:
+            # 横方向に来たら上下と直進だけ調べる
+            step = 1 if index > parent else -1
+            steps = (stride, -stride, step)
+        else:
+            step = stride if index > parent else -stride
+            steps = (1, -1, step)
+        
+        x, y = index % stride, index // stride
+        for step in steps:
+            point = jump(index + step, step)
+            if point is None:
+                continue
+            point_x, point_y = point % stride, point // stride
+            next_cost = cost[index] + abs(point_x - x) + abs(point_y - y)
+            if next_cost < cost.get(point, next_cost + 1):
+                cost[point] = next_cost
+                came_from[point] = index
+                h = abs(point_x - goal_x) + abs(point_y - goal_y)
+                heapq.heappush(open_heap, (next_cost + h, h, point))
+    else:
+        return None
+    
+    # ジャンプポイントの間を1マスずつの経路に展開
+    points = []
+    index = goal_index
+    while index is not None:
+        points.append((index % stride - 1, index // stride - 1))
+        index = came_from[index]
+    points.reverse()
+    path = [points[0]]
+    for x, y in points[1:]:
+        last_x, last_y = path[-1]
+        step_x = (x > last_x) - (x < last_x)
+        step_y = (y > last_y) - (y < last_y)
+        while (last_x, last_y) != (x, y):
+            last_x += step_x
+            last_y += step_y
+            path.append((last_x, last_y))
+    return path
+
+class PathFinder:
+    """マップの歩行可能ビットマップ上の経路探索（結果はLRUキャッシュし、タイルが変わったら破棄）"""
+        
+    def __init__(self, game_map, jump_points=False):
+        self.game_map = game_map
+        self.jump_points = jump_points  # Trueならジャンプポイントサーチを使う
+        self.paths = OrderedDict()      # (start, goal) -> (経路, 座標 -> 経路上の位置)
+        self.tiles_version = None
+        self.padded = None              # ジャンプポイントサーチ用の外周付きビットマップ
+        self.stats = {"hits": 0, "reused": 0, "misses": 0}
+        
+    def find_path(self, start, goal):
+        """start から goal への経路（(x, y) のリスト、見つからなければNone）"""
+        start, goal = tuple(start), tuple(goal)
+        if self.tiles_version != self.game_map.tiles_version:
+            self.paths.clear()
+            self.padded = None
+            self.tiles_version = self.game_map.tiles_version
+        
+        key = (start, goal)
+        entry = self.paths.get(key)
+        if entry is not None:
+            self.paths.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[0]
+        
+        # 同じ目的地へのキャッシュ済みの経路上にいれば、その続きを使う
+        for (cached_start, cached_goal), (path, positions) in reversed(self.paths.items()):
+            if cached_goal == goal and path is not None and start in positions:
+                self.stats["reused"] += 1
+                return path[positions[start]:]
+        
+        self.stats["misses"] += 1
+        walkable = self.game_map.get_walkable_grid()
+        width, height = self.game_map.width, self.game_map.height
+        if self.jump_points:
+            if self.padded is None:
+                self.padded = pad_walkable(walkable, width, height)
+            path = find_path_jps(walkable, width, height, start, goal, self.padded)
+        else:
+            path = find_path_astar(walkable, width, height, start, goal)
+        positions = {point: i for i, point in enumerate(path)} if path else None
+        self.paths[key] = (path, positions)
+        if len(self.paths) > PATH_CACHE_MAX_ENTRIES:
+            self.paths.popitem(last=False)
+        return path
+        
+    def clear(self):
+        """キャッシュを破棄"""
+        self.paths.clear()
+        self.padded = None
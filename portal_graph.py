@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from array import array
+from flow_field import UNREACHABLE
+
+class PortalGraph:
+    """マップ間をポータルでつないだグラフ。どのマップのどのタイルからでも、別のマップへ向かうポータルを定数時間で引ける"""
+        
+    def __init__(self, maps, open_maps=None):
+        self.maps = dict(maps)  # マップ名 -> GameMap（か、同じ属性を持つ経路用ビュー）
+        self.open_maps = frozenset(self.maps if open_maps is None else open_maps)  # 入れるマップ（ここに無いマップへのポータルは使わない）
+        self.versions = {name: game_map.tiles_version for name, game_map in self.maps.items()}
+        self.build()
+        
+    def is_stale(self, maps, open_maps=None):
+        """マップの差し替えやタイルの変更（ポータルの追加を含む）、入れるマップの変化があれば作り直しが必要"""
+        if set(maps) != set(self.maps) or frozenset(maps if open_maps is None else open_maps) != self.open_maps:
+            return True
+        return any(maps[name] is not game_map or game_map.tiles_version != self.versions[name]
+                   for name, game_map in self.maps.items())
+        
+    def build(self):
+        """ポータルごとの距離場と、マップの組ごとの経路表を作る"""
+        # ポータル一覧と、マップ内の各タイルからそのポータルまでの距離場
+        self.portals = []   # (マップ名, ポータル)
+        self.fields = []    # ポータルの番号 -> 距離場（FlowField、マップのキャッシュと共有）
+        self.map_portals = {name: [] for name in self.maps}
+        for name, game_map in self.maps.items():
+            for portal in game_map.portals:
+                if portal["destination"] not in self.maps or portal["destination"] not in self.open_maps:
+                    continue
+                self.map_portals[name].append(len(self.portals))
+                self.portals.append((name, portal))
+                self.fields.append(game_map.get_flow_field(portal["x"], portal["y"]))
+        
+        # ポータルをくぐった後、目的のマップに着くまでの歩数（ベルマン-フォード法）
+        self.costs = [{portal["destination"]: 0} for _, portal in self.portals]
+        changed = True
+        while changed:
+            changed = False
+            for index, (_, portal) in enumerate(self.portals):
+                arrival_map = self.maps[portal["destination"]]
+                if not (0 <= portal["dest_x"] < arrival_map.width and 0 <= portal["dest_y"] < arrival_map.height):
+                    continue
+                arrival = portal["dest_y"] * arrival_map.width + portal["dest_x"]
+                costs = self.costs[index]
+                for next_index in self.map_portals[portal["destination"]]:
+                    steps = self.fields[next_index].distances[arrival]
+                    if steps == UNREACHABLE:
+                        continue
+                    for target, cost in list(self.costs[next_index].items()):
+                        total = steps + cost
+                        if total < costs.get(target, total + 1):
+                            costs[target] = total
+                            changed = True
+        
+        # マップの組ごとに、各タイルから最短で目的のマップに着くポータルとその歩数
+        self.routes = {}  # (マップ名, 目的のマップ名) -> (歩数の配列, ポータル番号の配列)
+        for name, game_map in self.maps.items():
+            size = game_map.width * game_map.height
+            for target in self.maps:
+                if target == name:
+                    continue
+                distances = array("i", [UNREACHABLE]) * size
+                choices = array("i", [UNREACHABLE]) * size
+                for index in self.map_portals[name]:
+                    cost = self.costs[index].get(target)
+                    if cost is None:
+                        continue
+                    for tile, steps in enumerate(self.fields[index].distances):
+                        if steps == UNREACHABLE:
+                            continue
+                        total = steps + cost
+                        if distances[tile] == UNREACHABLE or total < distances[tile]:
+                            distances[tile] = total
+                            choices[tile] = index
+                if any(choice != UNREACHABLE for choice in choices):
+                    self.routes[(name, target)] = (distances, choices)
+        
+    def _route_index(self, map_name, x, y, target):
+        route = self.routes.get((map_name, target))
+        if route is None:
+            return None, None
+        game_map = self.maps[map_name]
+        if not (0 <= x < game_map.width and 0 <= y < game_map.height):
+            return None, None
+        tile = y * game_map.width + x
+        index = route[1][tile]
+        if index == UNREACHABLE:
+            return None, None
+        return index, tile
+        
+    def get_next_portal(self, map_name, x, y, target):
+        """(x, y) から target のマップへ向かうとき、最初にくぐるポータル（無ければNone）"""
+        index, _ = self._route_index(map_name, x, y, target)
+        return None if index is None else self.portals[index][1]
+        
+    def get_distance(self, map_name, x, y, target):
+        """(x, y) から target のマップに着くまでの歩数（着けなければNone）"""
+        index, tile = self._route_index(map_name, x, y, target)
+        return None if index is None else self.routes[(map_name, target)][0][tile]
+        
+    def get_portal_distance(self, map_name, x, y, target):
+        """(x, y) から最初にくぐるポータルまでの歩数（経路が無ければNone）"""
+        index, tile = self._route_index(map_name, x, y, target)
+        return None if index is None else self.fields[index].distances[tile]
+        
+    def get_flow_field(self, map_name, x, y, target):
+        """(x, y) から target のマップへ向かうときにたどる距離場（最初にくぐるポータルへの距離場。無ければNone）"""
+        index, _ = self._route_index(map_name, x, y, target)
+        return None if index is None else self.fields[index]
+        
+    def get_next_step(self, map_name, x, y, target):
+        """target のマップへ向かうときに次に進むタイル（ポータル上や経路が無ければNone）"""
+        field = self.get_flow_field(map_name, x, y, target)
+        return None if field is None else field.next_step(x, y)
+        
+    def get_map_route(self, map_name, x, y, target):
+        """(x, y) から target までに通るマップ名の一覧（map_name と target を含む。着けなければNone）"""
+        route = [map_name]
+        while map_name != target:
+            portal = self.get_next_portal(map_name, x, y, target)
+            if portal is None or len(route) > len(self.maps):
+                return None
+            map_name, x, y = portal["destination"], portal["dest_x"], portal["dest_y"]
+            route.append(map_name)
+        return route
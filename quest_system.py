@@ -16,18 +16,21 @@ class QuestSystem:
             "meet_ec2": {
                 "title": "Meet EC2",
                 "description": "Talk to EC2 in Computing Town",
-                "reward": {"exp": 50, "credits": 100}
+                "reward": {"exp": 50, "credits": 100},
+                "location": {"map": "Computing Town", "npc": "EC2"}
             },
             "explore_computing_town": {
                 "title": "Explore Computing Town",
                 "description": "Explore Computing Town thoroughly",
                 "reward": {"exp": 50, "credits": 100},
+                "location": {"map": "Computing Town"},
                 "unlocks_town": "Storage Town"
             },
             "ec2_quest": {
                 "title": "EC2's Request",
                 "description": "Complete the request from EC2",
-                "reward": {"exp": 100, "credits": 200}
+                "reward": {"exp": 100, "credits": 200},
+                "location": {"map": "Computing Town", "npc": "EC2"}
             },
             "defeat_sql_injection": {
                 "title": "Defeat SQL Injection",
@@ -38,28 +41,33 @@ class QuestSystem:
             "s3_quest": {
                 "title": "S3's Request",
                 "description": "Complete the request from S3",
-                "reward": {"exp": 100, "credits": 200}
+                "reward": {"exp": 100, "credits": 200},
+                "location": {"map": "Storage Town", "npc": "S3"}
             },
             "secure_data": {
                 "title": "Secure the Data",
                 "description": "Prevent data leakage in Storage Town",
                 "reward": {"exp": 150, "credits": 300},
+                "location": {"map": "Storage Town"},
                 "unlocks_town": "Security Town"
             },
             "dynamodb_quest": {
                 "title": "DynamoDB's Request",
                 "description": "Complete the request from DynamoDB",
-                "reward": {"exp": 100, "credits": 200}
+                "reward": {"exp": 100, "credits": 200},
+                "location": {"map": "Database Town", "npc": "DynamoDB"}
             },
             "rds_quest": {
                 "title": "RDS's Request",
                 "description": "Complete the request from RDS",
-                "reward": {"exp": 100, "credits": 200}
+                "reward": {"exp": 100, "credits": 200},
+                "location": {"map": "Database Town", "npc": "RDS"}
             },
             "iam_quest": {
                 "title": "IAM's Request",
                 "description": "Complete the request from IAM",
-                "reward": {"exp": 100, "credits": 200}
+                "reward": {"exp": 100, "credits": 200},
+                "location": {"map": "Security Town", "npc": "IAM"}
             },
             "final_battle": {
                 "title": "Final Battle",
@@ -107,13 +115,12 @@ class QuestSystem:
         """Get quest details"""
         return self.quest_data.get(quest_id)
         
-    def draw_quest_log(self, screen):
-        """Draw the quest log"""
+    def draw_quest_log(self, screen, dim_background=True):
+        """Draw the quest log (pass dim_background=False if the background is already dimmed)"""
         try:
             # Background overlay
-            overlay = pygame.Surface((800, 600), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
-            screen.blit(overlay, (0, 0))
+            if dim_background:
+                screen.blit(self.assets.get_overlay(800, 600), (0, 0))
             
             # Panel
             panel = pygame.Rect(100, 100, 600, 400)
@@ -165,6 +172,14 @@ class QuestSystem:
             pygame.draw.rect(screen, (100, 100, 200), close_button)
             return close_button
         
+    def get_objective_location(self):
+        """Get where the current objective takes place ({"map": ..., "npc": ...}) or None"""
+        for quest_id in self.active_quests:
+            location = self.quest_data.get(quest_id, {}).get("location")
+            if location:
+                return location
+        return None
+        
     def get_current_objective(self):
         """Get the current objective"""
         try:
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+from tile_grid import TileGrid
+
+# テストで使う乱数のタイル・マップ（シードを決めれば毎回同じものを作る）
+
+def random_tiles(width, height, seed, tile_types=range(6)):
+    """tile_types からシードで選んだタイルを並べたTileGrid"""
+    rng = random.Random(seed)
+    tile_types = list(tile_types)
+    return TileGrid(width, height, data=bytearray(rng.choice(tile_types) for _ in range(width * height)))
+
+def chunk_loader(tiles, chunk_size):
+    """tiles からチャンクを切り出す load_chunk（GameMap.from_chunk_loader 用）"""
+    def load_chunk(chunk_x, chunk_y, width, height):
+        chunk = TileGrid(width, height)
+        for y in range(height):
+            chunk[y][:] = tiles.row(chunk_y * chunk_size + y, chunk_x * chunk_size, chunk_x * chunk_size + width)
+        return chunk
+    return load_chunk
+
+def random_walkable(width, height, seed, density=0.3):
+    """割合 density が歩行不可の歩行可能ビットマップ（1タイル1バイト、行優先）"""
+    rng = random.Random(seed)
+    return bytearray(0 if rng.random() < density else 1 for _ in range(width * height))
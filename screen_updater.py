@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pygame
+
+# 更新する矩形の合計面積が画面のこの割合を超えたら全体をflipする
+FULL_UPDATE_AREA_RATIO = 0.5
+
+class ScreenUpdater:
+    def __init__(self, screen, enabled=True):
+        self.screen_rect = screen.get_rect()
+        self.enabled = enabled  # Falseなら常にflip
+        self.rects = []
+        self.full_update = True
+        self.view_key = None
+        self.stats = {"full": 0, "partial": 0, "skipped": 0}
+        
+    def mark(self, rect):
+        """このフレームで変化した矩形を登録"""
+        rect = self.screen_rect.clip(rect)
+        if rect.width > 0 and rect.height > 0:
+            self.rects.append(rect)
+        
+    def mark_all(self, rects):
+        """矩形の一覧をまとめて登録"""
+        for rect in rects:
+            self.mark(rect)
+        
+    def mark_full(self):
+        """画面全体の更新を要求"""
+        self.full_update = True
+        
+    def set_view(self, view_key):
+        """状態・カメラ位置などが前フレームから変わっていれば画面全体を更新する"""
+        if view_key != self.view_key:
+            self.view_key = view_key
+            self.full_update = True
+        
+    def present(self):
+        """登録された矩形だけをディスプレイに転送（必要なら全体をflip）"""
+        if not self.enabled or self.full_update:
+            pygame.display.flip()
+            self.stats["full"] += 1
+        elif not self.rects:
+            # 何も変化していなければ転送しない
+            self.stats["skipped"] += 1
+        elif sum(rect.width * rect.height for rect in self.rects) > self.screen_rect.width * self.screen_rect.height * FULL_UPDATE_AREA_RATIO:
+            pygame.display.flip()
+            self.stats["full"] += 1
+        else:
+            pygame.display.update(self.rects)
+            self.stats["partial"] += 1
+        self.rects = []
+        self.full_update = False
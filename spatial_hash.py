@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# 空間ハッシュのセルの大きさ（タイル数）
+SPATIAL_CELL_SIZE = 8
+
+class SpatialHash:
+    """"x"/"y" キーを持つエンティティ（NPC・ショップ・ポータル）をタイル座標で引くための空間ハッシュ"""
+        
+    def __init__(self, entities=(), cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.rebuild(entities)
+        
+    def rebuild(self, entities):
+        """エンティティの一覧から作り直す"""
+        self.cells = {}      # (セルx, セルy) -> [(登録順, エンティティ), ...]
+        self.positions = {}  # (x, y) -> [(登録順, エンティティ), ...]
+        self.next_order = 0
+        for entity in entities:
+            self.insert(entity)
+        
+    def insert(self, entity):
+        """エンティティを登録（同じ位置に複数あれば登録順に返す）"""
+        x, y = entity["x"], entity["y"]
+        item = (self.next_order, entity)
+        self.next_order += 1
+        self.cells.setdefault((x // self.cell_size, y // self.cell_size), []).append(item)
+        self.positions.setdefault((x, y), []).append(item)
+        
+    def remove(self, entity):
+        """エンティティを削除"""
+        x, y = entity["x"], entity["y"]
+        for key, table in (((x // self.cell_size, y // self.cell_size), self.cells), ((x, y), self.positions)):
+            items = table.get(key, [])
+            items[:] = [item for item in items if item[1] is not entity]
+            if not items:
+                table.pop(key, None)
+        
+    def get_at(self, x, y):
+        """(x, y) にある最初のエンティティ（なければNone）"""
+        items = self.positions.get((x, y))
+        return items[0][1] if items else None
+        
+    def query_radius(self, x, y, radius):
+        """(x, y) からチェビシェフ距離radius以内のエンティティを登録順で取得"""
+        found = []
+        for tile_y in range(y - radius, y + radius + 1):
+            for tile_x in range(x - radius, x + radius + 1):
+                found.extend(self.positions.get((tile_x, tile_y), ()))
+        found.sort(key=lambda item: item[0])
+        return [entity for _, entity in found]
+        
+    def query_rect(self, x, y, width, height):
+        """矩形範囲（タイル座標）内のエンティティを登録順で取得"""
+        x1, y1 = x + width, y + height
+        found = []
+        for cell_y in range(y // self.cell_size, (y1 - 1) // self.cell_size + 1):
+            for cell_x in range(x // self.cell_size, (x1 - 1) // self.cell_size + 1):
+                for item in self.cells.get((cell_x, cell_y), ()):
+                    entity = item[1]
+                    if x <= entity["x"] < x1 and y <= entity["y"] < y1:
+                        found.append(item)
+        found.sort(key=lambda item: item[0])
+        return [entity for _, entity in found]
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from game_map import GameMap, TILE_WALL
+from random_grids import chunk_loader, random_tiles
+
+SIZE = 320
+CHUNK_SIZE = 32
+
+def make_streamed_map(seed=19):
+    full = random_tiles(SIZE, SIZE, seed, range(10))
+    return GameMap.from_chunk_loader("Streamed", SIZE, SIZE, chunk_loader(full, CHUNK_SIZE), chunk_size=CHUNK_SIZE), full
+
+def test_reads_match_loader():
+    game_map, full = make_streamed_map()
+    rng = random.Random(1)
+    for _ in range(500):
+        x, y = rng.randrange(SIZE), rng.randrange(SIZE)
+        assert game_map.tiles[y][x] == full.get(x, y)
+    assert game_map.tiles.row(40, 20, 90) == full.row(40, 20, 90)
+
+def test_stream_around_stays_under_budget():
+    game_map, _ = make_streamed_map()
+    game_map.memory_budget = 9 * CHUNK_SIZE * CHUNK_SIZE
+    chunk_pixels = CHUNK_SIZE * 40
+    for step in range(SIZE // CHUNK_SIZE):
+        game_map.stream_around(step * chunk_pixels, step * chunk_pixels, 800, 600)
+        assert game_map.memory_usage() <= game_map.memory_budget
+        assert game_map.tiles.is_loaded(step, step)
+    assert game_map.tiles.stats["evictions"] > 0
+
+def test_loads_outside_camera_stay_under_budget():
+    game_map, full = make_streamed_map()
+    game_map.memory_budget = 8 * CHUNK_SIZE * CHUNK_SIZE
+    game_map.stream_around(0, 0, 800, 600)
+    camera = set(game_map.tiles.chunks)
+    assert camera
+    rng = random.Random(2)
+    for _ in range(300):
+        # 経路探索やトリガーの判定のように、カメラから遠いタイルを読む
+        x, y = rng.randrange(SIZE), rng.randrange(SIZE)
+        assert game_map.tiles.get(x, y) == full.get(x, y)
+        assert game_map.memory_usage() <= game_map.memory_budget
+        assert camera <= set(game_map.tiles.chunks)
+    assert game_map.tiles.stats["evictions"] > 0
+
+def test_edits_survive_eviction():
+    game_map, _ = make_streamed_map()
+    game_map.memory_budget = 4 * CHUNK_SIZE * CHUNK_SIZE
+    game_map.set_tile(300, 300, TILE_WALL)
+    game_map.stream_around(0, 0, 800, 600)
+    assert not game_map.tiles.is_loaded(300 // CHUNK_SIZE, 300 // CHUNK_SIZE)
+    assert game_map.tiles.get(300, 300) == TILE_WALL
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+from flow_field import FlowField
+from pathfinding import find_path_astar
+from random_grids import random_walkable
+
+def test_distances_match_astar_on_random_grids():
+    rng = random.Random(22)
+    for seed in range(30):
+        width, height = rng.randint(1, 25), rng.randint(1, 25)
+        walkable = random_walkable(width, height, seed)
+        target = (rng.randrange(width), rng.randrange(height))
+        if not walkable[target[1] * width + target[0]]:
+            continue
+        field = FlowField(walkable, width, height, *target)
+        for y in range(height):
+            for x in range(width):
+                path = find_path_astar(walkable, width, height, (x, y), target)
+                if path is None:
+                    assert field.distance(x, y) is None
+                    assert field.next_step(x, y) is None
+                else:
+                    assert field.distance(x, y) == len(path) - 1
+
+def test_walk_follows_decreasing_distance():
+    rng = random.Random(23)
+    width, height = 30, 20
+    walkable = random_walkable(width, height, 7)
+    walkable[0] = 1
+    field = FlowField(walkable, width, height, 0, 0)
+    for _ in range(100):
+        x, y = rng.randrange(width), rng.randrange(height)
+        distance = field.distance(x, y)
+        if distance is None:
+            continue
+        path = field.walk(x, y, distance + 5)
+        assert path[-1] == (0, 0)
+        assert len(path) - 1 == distance
+        for (px, py), (nx, ny) in zip(path, path[1:]):
+            assert abs(nx - px) + abs(ny - py) == 1
+            assert walkable[ny * width + nx] == 1
+            assert field.distance(nx, ny) == field.distance(px, py) - 1
+
+def test_unreachable_and_outside_tiles():
+    width, height = 5, 1
+    walkable = bytearray([1, 1, 0, 1, 1])
+    field = FlowField(walkable, width, height, 0, 0)
+    assert field.distance(4, 0) is None
+    assert field.next_step(4, 0) is None
+    assert field.walk(4, 0, 3) == [(4, 0)]
+    assert field.distance(0, 0) == 0
+    assert field.next_step(0, 0) is None
+    assert field.distance(-1, 0) is None and field.distance(5, 0) is None
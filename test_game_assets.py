@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from game_assets import GameAssets
+from game_map import GameMap
+
+def test_static_chunks_follow_display_format():
+    pygame.init()
+    try:
+        pygame.display.set_mode((320, 240))
+        assets = GameAssets()
+        assets.finalize_display_format()
+        game_map = GameMap("Test", 20, 20)
+        chunk = game_map.get_static_chunk(0, 0, assets)
+        assert game_map.get_static_chunk(0, 0, assets) is chunk
+        # 画面のモードを変えたら、前の画像から描いたチャンクは使わない
+        pygame.display.set_mode((640, 480))
+        assets.finalize_display_format()
+        assert game_map.get_static_chunk(0, 0, assets) is not chunk
+    finally:
+        pygame.quit()
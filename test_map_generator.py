@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import hashlib
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+import map_generator
+from game_map import MAP_BUILDERS, build_layout
+from map_generator import generate_world_tiles
+
+# 元の固定マップ（生成処理を書き換える前の各マップ関数）が作ったタイルのmd5
+BASELINE_TILE_DIGESTS = {
+    "AWS Cloud World": "390aced60f32f302d219c1e615f91a2e",
+    "Computing Town": "bc384f7509b74d896e8ee828d031e522",
+    "Storage Town": "961f7b6925fa8867807b32a261da5762",
+    "Database Town": "df65a400c17249e859867346267fd41e",
+    "Security Town": "90e2b8ba276491bc9892536de7749c99",
+}
+
+requires_numpy = pytest.mark.skipif(map_generator.numpy is None, reason="numpy is not installed")
+
+def tile_digest(tiles):
+    return hashlib.md5(bytes(tiles.data)).hexdigest()
+
+def test_fixed_maps_match_baseline():
+    assert set(MAP_BUILDERS) == set(BASELINE_TILE_DIGESTS)
+    for name, digest in BASELINE_TILE_DIGESTS.items():
+        assert tile_digest(build_layout(name)["tiles"]) == digest, name
+
+@requires_numpy
+def test_fixed_maps_match_without_numpy(monkeypatch):
+    monkeypatch.setattr(map_generator, "numpy", None)
+    for name, digest in BASELINE_TILE_DIGESTS.items():
+        assert tile_digest(build_layout(name)["tiles"]) == digest, name
+
+@requires_numpy
+@pytest.mark.parametrize("width, height, seed", [(50, 50, None), (50, 50, 3), (320, 200, 7), (97, 143, 11)])
+def test_world_tiles_match_without_numpy(monkeypatch, width, height, seed):
+    expected = generate_world_tiles(width, height, seed)
+    monkeypatch.setattr(map_generator, "numpy", None)
+    tiles = generate_world_tiles(width, height, seed)
+    assert (tiles.width, tiles.height) == (width, height)
+    assert bytes(tiles.data) == bytes(expected.data)
+
+def test_world_tiles_depend_on_seed():
+    assert bytes(generate_world_tiles(120, 120, 1).data) == bytes(generate_world_tiles(120, 120, 1).data)
+    assert bytes(generate_world_tiles(120, 120, 1).data) != bytes(generate_world_tiles(120, 120, 2).data)
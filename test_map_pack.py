@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+import game_map
+import map_pack
+from game_map import MAP_BUILDERS, build_layout
+from map_pack import ENTITY_KEYS, MapPack, compile_map_pack, compute_content_hash, open_map_pack
+
+def other_build_layout(name):
+    """別のモジュールの build_layout（内容ハッシュが変わることの確認用）"""
+    return build_layout(name)
+
+def test_pack_round_trip(tmp_path):
+    path = str(tmp_path / "maps.pack")
+    compile_map_pack(path, MAP_BUILDERS, build_layout)
+    pack = MapPack(path)
+    assert set(pack.maps) == set(MAP_BUILDERS)
+    assert pack.content_hash == compute_content_hash(MAP_BUILDERS, build_layout)
+    for name in MAP_BUILDERS:
+        expected = build_layout(name)
+        layout = pack.get_layout(name)
+        assert (layout["width"], layout["height"], layout["map_type"]) == (expected["width"], expected["height"], expected["map_type"])
+        assert layout["encounter_rate"] == expected.get("encounter_rate", 0.0)
+        assert bytes(layout["tiles"].data) == bytes(expected["tiles"].data)
+        for key in ENTITY_KEYS:
+            assert layout.get(key) == expected.get(key)
+        del layout
+    assert pack.get_layout("No Such Town") is None
+    pack.close()
+
+def test_content_hash_follows_builders_and_build_layout():
+    base = compute_content_hash(MAP_BUILDERS, build_layout)
+    assert compute_content_hash(MAP_BUILDERS, build_layout) == base
+    assert compute_content_hash(MAP_BUILDERS, other_build_layout) != base
+    builders = dict(MAP_BUILDERS)
+    builder, map_type = builders["Storage Town"]
+    builders["Storage Town"] = (builder, map_type + 1)
+    assert compute_content_hash(builders, build_layout) != base
+
+def test_content_hash_without_source_files(monkeypatch):
+    # 凍結・.pycのみの配布ではソースファイルが無い
+    monkeypatch.setattr(map_pack.inspect, "getsourcefile", lambda obj: None)
+    base = compute_content_hash(MAP_BUILDERS, build_layout)
+    assert compute_content_hash(MAP_BUILDERS, build_layout) == base
+    assert compute_content_hash(MAP_BUILDERS, other_build_layout) != base
+
+def test_open_map_pack_rebuilds_stale_or_broken_packs(tmp_path):
+    path = str(tmp_path / "maps.pack")
+    content_hash = compute_content_hash(MAP_BUILDERS, build_layout)
+    compile_map_pack(path, MAP_BUILDERS, build_layout, content_hash=b"\0" * 32)
+    pack = open_map_pack(path, MAP_BUILDERS, build_layout)
+    assert pack.content_hash == content_hash
+    pack.close()
+    with open(path, "wb") as f:
+        f.write(b"broken")
+    pack = open_map_pack(path, MAP_BUILDERS, build_layout)
+    assert pack.content_hash == content_hash
+    pack.close()
+
+def test_damaged_index_or_body_is_rejected(tmp_path):
+    path = str(tmp_path / "maps.pack")
+    compile_map_pack(path, MAP_BUILDERS, build_layout)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:-100])
+    with pytest.raises(ValueError):
+        MapPack(path)
+    # タイルの長さがマップの大きさと合わない索引
+    assert data.count(b'"width": 50,') == 1
+    with open(path, "wb") as f:
+        f.write(data.replace(b'"width": 50,', b'"width": 49,'))
+    with pytest.raises(ValueError):
+        MapPack(path)
+    pack = open_map_pack(path, MAP_BUILDERS, build_layout)
+    assert len(pack.get_layout("AWS Cloud World")["tiles"].data) == 50 * 50
+    pack.close()
+
+def test_corrupt_entities_fall_back_to_builders(tmp_path, monkeypatch):
+    path = str(tmp_path / "maps.pack")
+    compile_map_pack(path, MAP_BUILDERS, build_layout)
+    pack = MapPack(path)
+    start, length = pack.maps["Storage Town"]["entities"]
+    offset = pack.data_offset + start
+    pack.close()
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(b"\xff" * length)
+    
+    monkeypatch.setattr(game_map, "MAP_PACK_PATH", path)
+    monkeypatch.setattr(game_map, "_map_pack", None)
+    monkeypatch.setattr(game_map, "_base_layouts", {})
+    layout = game_map.get_base_layout("Storage Town")
+    expected = build_layout("Storage Town")
+    assert bytes(layout["tiles"].data) == bytes(expected["tiles"].data)
+    assert layout["npcs"] == expected["npcs"]
+    # 壊れたパックは使わず、次回の起動で作り直すために削除する
+    assert game_map._map_pack is False
+    assert not os.path.exists(path)
+    assert game_map.get_base_layout("Computing Town")["name"] == "Computing Town"
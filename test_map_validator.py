@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+from collections import deque
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from game_map import TILE_FLOOR, TILE_WALL
+from map_validator import label_components, load_layouts, validate_layouts
+from random_grids import random_walkable
+from tile_grid import TileGrid
+
+def bfs_components(walkable, width, height):
+    """幅優先探索で求めた連結成分（タイルのインデックスの集合の集合）"""
+    seen = set()
+    components = set()
+    for index in range(width * height):
+        if not walkable[index] or index in seen:
+            continue
+        seen.add(index)
+        component = {index}
+        queue = deque([index])
+        while queue:
+            y, x = divmod(queue.popleft(), width)
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                neighbor = ny * width + nx
+                if 0 <= nx < width and 0 <= ny < height and walkable[neighbor] and neighbor not in seen:
+                    seen.add(neighbor)
+                    component.add(neighbor)
+                    queue.append(neighbor)
+        components.add(frozenset(component))
+    return components
+
+def test_label_components_match_bfs():
+    rng = random.Random(24)
+    for seed in range(60):
+        width, height = rng.randint(1, 40), rng.randint(1, 40)
+        walkable = random_walkable(width, height, seed, rng.choice((0.0, 0.3, 0.45, 0.6, 1.0)))
+        labels, count = label_components(walkable, width, height)
+        groups = {}
+        for index, label in enumerate(labels):
+            assert (label == 0) == (walkable[index] == 0)
+            if label:
+                groups.setdefault(label, set()).add(index)
+        assert set(groups) == set(range(1, count + 1))
+        assert {frozenset(group) for group in groups.values()} == bfs_components(walkable, width, height)
+
+def test_shipped_maps_have_no_issues():
+    layouts = load_layouts()
+    assert validate_layouts(layouts, workers=1) == []
+    assert validate_layouts(layouts) == []
+
+def make_layout(name, portals=(), npcs=()):
+    """x=1 の壁で左右に分かれた 12x3 のマップ"""
+    tiles = TileGrid(12, 3, TILE_FLOOR)
+    for y in range(3):
+        tiles[y][1] = TILE_WALL
+    return {"name": name, "width": 12, "height": 3, "tiles": tiles, "portals": list(portals), "npcs": list(npcs)}
+
+def test_detects_broken_layouts():
+    npc = {"name": "Hermit", "x": 11, "y": 1}
+    portal = {"x": 0, "y": 2, "destination": "Nowhere", "dest_x": 0, "dest_y": 0}
+    layouts = {"Test": make_layout("Test", [portal], [npc])}
+    issues = validate_layouts(layouts, start=("Test", 0, 0), workers=1)
+    assert {(issue["map"], issue["kind"]) for issue in issues} == {("Test", "portal"), ("Test", "npc")}
+    assert any("Nowhere" in issue["message"] for issue in issues)
+    
+    # 壁の向こうから始めればNPCには話しかけられる
+    assert validate_layouts({"Test": make_layout("Test", npcs=[npc])}, start=("Test", 5, 1), workers=1) == []
+    issues = validate_layouts({"Test": make_layout("Test")}, start=("Test", 1, 1), workers=1)
+    assert [issue["kind"] for issue in issues] == ["spawn"]
+    assert validate_layouts({"Test": make_layout("Test")}, start=None, workers=1)[0]["kind"] == "spawn"
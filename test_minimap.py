@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+from game_map import GameMap, TILE_MINIMAP_COLORS
+from minimap import MINIMAP_SUPPORTED, Minimap
+from random_grids import chunk_loader, random_tiles
+
+pytestmark = pytest.mark.skipif(not MINIMAP_SUPPORTED, reason="numpy is not installed")
+
+def random_map(width, height, seed):
+    game_map = GameMap("Test", width, height, generate=False)
+    game_map.tiles = random_tiles(width, height, seed, range(22))
+    return game_map
+
+def expected_color(tiles, minimap, px, py):
+    """ピクセル (px, py) の色（scale x scale タイルの左上のタイルの色）"""
+    tile_type = tiles.get(px * minimap.scale, py * minimap.scale)
+    return tuple(TILE_MINIMAP_COLORS[tile_type * 3:tile_type * 3 + 3])
+
+def assert_matches(game_map, minimap, pixels=None):
+    minimap.update()
+    surface = minimap.surface
+    if pixels is None:
+        pixels = [(px, py) for py in range(minimap.height) for px in range(minimap.width)]
+    for px, py in pixels:
+        assert tuple(surface.get_at((px, py)))[:3] == expected_color(game_map.tiles, minimap, px, py), (px, py)
+
+@pytest.mark.parametrize("width, height, max_size", [(50, 50, 1024), (37, 53, 10), (100, 61, 7)])
+def test_minimap_follows_tile_changes(width, height, max_size):
+    rng = random.Random(width)
+    game_map = random_map(width, height, width)
+    minimap = game_map._minimap = Minimap(game_map, TILE_MINIMAP_COLORS, max_size)
+    assert max(minimap.width, minimap.height) <= max_size
+    assert_matches(game_map, minimap)
+    for i in range(200):
+        game_map.set_tile(rng.randrange(width), rng.randrange(height), rng.randrange(22))
+        if i % 37 == 0:
+            assert_matches(game_map, minimap)
+    assert_matches(game_map, minimap)
+
+def test_views_are_cached_until_tiles_change():
+    game_map = random_map(50, 50, 3)
+    minimap = game_map.get_minimap()
+    view = minimap.get_view(3, 4, 20, 10, (100, 50))
+    assert view.get_size() == (100, 50)
+    assert minimap.get_view(3, 4, 20, 10, (100, 50)) is view
+    game_map.set_tile(5, 5, (game_map.tiles.get(5, 5) + 1) % 22)
+    assert minimap.get_view(3, 4, 20, 10, (100, 50)) is not view
+
+def test_streamed_map_draws_loaded_chunks_only():
+    full = random_tiles(300, 200, 25, range(1, 22))
+    game_map = GameMap.from_chunk_loader("Streamed", 300, 200, chunk_loader(full, 32), chunk_size=32)
+    minimap = game_map._minimap = Minimap(game_map, TILE_MINIMAP_COLORS, 100)
+    game_map.tiles.get(0, 0)
+    minimap.update()
+    game_map.tiles.get(299, 199)
+    minimap.update()
+    assert len(game_map.tiles.chunks) == 2
+    scale = minimap.scale
+    loaded = [(px, py) for py in range(minimap.height) for px in range(minimap.width)
+              if game_map.tiles.is_loaded(px * scale // 32, py * scale // 32)]
+    assert_matches(game_map, minimap, loaded)
+    # まだ読み込んでいない範囲は黒のまま
+    assert tuple(minimap.surface.get_at((minimap.width // 2, minimap.height // 2)))[:3] == (0, 0, 0)
+    assert len(game_map.tiles.chunks) == 2
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+from collections import deque
+from pathfinding import PathFinder, find_path_astar, find_path_jps, pad_walkable
+from random_grids import random_walkable
+
+def bfs_length(walkable, width, height, start, goal):
+    """幅優先探索での最短歩数（着けなければNone）"""
+    if not walkable[start[1] * width + start[0]] or not walkable[goal[1] * width + goal[0]]:
+        return None
+    seen = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        if (x, y) == goal:
+            return seen[goal]
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < width and 0 <= ny < height and walkable[ny * width + nx] == 1 and (nx, ny) not in seen:
+                seen[(nx, ny)] = seen[(x, y)] + 1
+                queue.append((nx, ny))
+    return None
+
+def assert_valid_path(path, walkable, width, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for (x, y), (nx, ny) in zip(path, path[1:]):
+        assert abs(nx - x) + abs(ny - y) == 1
+    assert all(walkable[y * width + x] == 1 for x, y in path)
+
+class FakeMap:
+    def __init__(self, walkable, width, height):
+        self.walkable = walkable
+        self.width = width
+        self.height = height
+        self.tiles_version = 0
+        
+    def get_walkable_grid(self):
+        return self.walkable
+
+def test_astar_and_jps_match_bfs_on_random_grids():
+    rng = random.Random(20)
+    for seed in range(40):
+        width, height = rng.randint(1, 30), rng.randint(1, 30)
+        walkable = random_walkable(width, height, seed, rng.choice((0.0, 0.2, 0.35)))
+        padded = pad_walkable(walkable, width, height)
+        for _ in range(15):
+            start = (rng.randrange(width), rng.randrange(height))
+            goal = (rng.randrange(width), rng.randrange(height))
+            expected = bfs_length(walkable, width, height, start, goal)
+            astar = find_path_astar(walkable, width, height, start, goal)
+            jps = find_path_jps(walkable, width, height, start, goal, padded)
+            if expected is None:
+                assert astar is None and jps is None
+                continue
+            assert len(astar) - 1 == expected
+            assert len(jps) - 1 == expected
+            assert_valid_path(astar, walkable, width, start, goal)
+            assert_valid_path(jps, walkable, width, start, goal)
+
+def test_blocked_endpoints_and_walls():
+    width, height = 5, 3
+    walkable = bytearray([1, 1, 0, 1, 1] * height)
+    assert find_path_astar(walkable, width, height, (0, 0), (4, 2)) is None
+    assert find_path_jps(walkable, width, height, (0, 0), (4, 2)) is None
+    assert find_path_astar(walkable, width, height, (2, 1), (0, 0)) is None
+    assert find_path_jps(walkable, width, height, (0, 0), (2, 1)) is None
+    assert find_path_astar(walkable, width, height, (1, 1), (1, 1)) == [(1, 1)]
+    assert find_path_jps(walkable, width, height, (1, 1), (1, 1)) == [(1, 1)]
+
+def test_path_finder_caches_and_reuses_paths():
+    width, height = 20, 20
+    game_map = FakeMap(bytearray([1]) * (width * height), width, height)
+    finder = PathFinder(game_map, jump_points=True)
+    path = finder.find_path((0, 0), (19, 19))
+    assert len(path) == 39
+    assert finder.find_path((0, 0), (19, 19)) is path
+    assert finder.stats["hits"] == 1
+    # キャッシュ済みの経路の途中からは続きを使う
+    assert finder.find_path(path[10], (19, 19)) == path[10:]
+    assert finder.stats["reused"] == 1
+    assert finder.stats["misses"] == 1
+
+def test_path_finder_drops_cache_when_tiles_change():
+    width, height = 5, 1
+    game_map = FakeMap(bytearray([1]) * width, width, height)
+    finder = PathFinder(game_map)
+    assert finder.find_path((0, 0), (4, 0)) == [(x, 0) for x in range(5)]
+    game_map.walkable[2] = 0
+    game_map.tiles_version += 1
+    assert finder.find_path((0, 0), (4, 0)) is None
+    assert finder.stats["misses"] == 2
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from game_map import GameMap, MAP_BUILDERS, MAP_WORLD, MapManager, RoutingMap, START_POSITION, TILE_FLOOR, TILE_WALL, get_map_type
+from portal_graph import PortalGraph
+from tile_grid import TileGrid
+
+def make_corridor(name, portals, walls=()):
+    """幅5・高さ1の通路のマップ"""
+    tiles = TileGrid(5, 1, TILE_FLOOR)
+    for x in walls:
+        tiles[0][x] = TILE_WALL
+    return GameMap.from_map_data({"name": name, "width": 5, "height": 1, "tiles": tiles, "portals": portals, "npcs": []})
+
+def portal(x, destination, dest_x):
+    return {"x": x, "y": 0, "destination": destination, "dest_x": dest_x, "dest_y": 0}
+
+def make_chain(walls_b=()):
+    """A -> B -> C とポータルでつながったマップ（着く位置はポータルの隣）"""
+    return {
+        "A": make_corridor("A", [portal(4, "B", 1)]),
+        "B": make_corridor("B", [portal(0, "A", 3), portal(4, "C", 1)], walls_b),
+        "C": make_corridor("C", [portal(0, "B", 3)]),
+    }
+
+def test_routes_through_several_maps():
+    graph = PortalGraph(make_chain())
+    assert graph.get_map_route("A", 0, 0, "C") == ["A", "B", "C"]
+    assert graph.get_distance("A", 0, 0, "C") == 7
+    assert graph.get_portal_distance("A", 0, 0, "C") == 4
+    assert graph.get_next_step("A", 0, 0, "C") == (1, 0)
+    assert graph.get_next_portal("C", 2, 0, "A")["destination"] == "B"
+
+def test_blocked_and_closed_maps_are_not_used():
+    assert PortalGraph(make_chain(walls_b=(2,))).get_map_route("A", 0, 0, "C") is None
+    graph = PortalGraph(make_chain(), open_maps={"A", "C"})
+    assert graph.get_map_route("A", 0, 0, "C") is None
+    assert graph.get_distance("A", 0, 0, "B") is None
+
+def test_graph_is_stale_after_tile_change():
+    maps = make_chain()
+    graph = PortalGraph(maps)
+    assert not graph.is_stale(maps)
+    assert graph.is_stale(maps, {"A", "B"})
+    maps["B"].set_tile(2, 0, TILE_WALL)
+    assert graph.is_stale(maps)
+
+def test_routes_between_shipped_maps():
+    graph = MapManager().get_portal_graph()
+    start_map, x, y = START_POSITION
+    for town in MAP_BUILDERS:
+        if town != start_map:
+            assert graph.get_map_route(start_map, x, y, town) == [start_map, town]
+            entry = graph.maps[town].portals[0]
+            assert graph.get_map_route(town, entry["x"], entry["y"], start_map) == [town, start_map]
+
+def test_portal_graph_does_not_create_maps():
+    manager = MapManager()
+    manager.get_portal_graph()
+    assert manager.maps == {}
+    # ゲームと同じ入れるマップの判定（発見済みの町とワールドマップ）でも、マップを作らない
+    discovered_towns = ["Computing Town"]
+    can_enter = lambda name: name in discovered_towns or get_map_type(name) == MAP_WORLD
+    manager.get_map(START_POSITION[0])
+    graph = manager.get_portal_graph(can_enter)
+    assert list(manager.maps) == [START_POSITION[0]]
+    assert manager.get_portal_graph(can_enter) is graph
+    assert graph.open_maps == {START_POSITION[0], "Computing Town"}
+
+def test_routing_views_match_created_maps():
+    views = MapManager().get_portal_graph()
+    manager = MapManager()
+    for map_name in MAP_BUILDERS:
+        manager.get_map(map_name)
+    created = manager.get_portal_graph()
+    assert all(not isinstance(game_map, RoutingMap) for game_map in created.maps.values())
+    assert views.routes.keys() == created.routes.keys()
+    for key, (distances, choices) in views.routes.items():
+        assert created.routes[key][0] == distances
+        assert created.routes[key][1] == choices
+
+def test_graph_follows_map_manager_changes():
+    manager = MapManager()
+    graph = manager.get_portal_graph()
+    assert manager.get_portal_graph() is graph
+    # まだ作成していないマップのタイルを変えても、マップは作らずに作り直す
+    start_map, x, y = START_POSITION
+    manager.set_tile(start_map, x, y, TILE_WALL)
+    changed = manager.get_portal_graph()
+    assert changed is not graph and manager.maps == {}
+    assert changed.get_distance(start_map, x, y, "Computing Town") is None
+    manager.get_map(start_map)
+    assert manager.get_portal_graph() is not changed
+    closed = manager.get_portal_graph(can_enter=lambda name: name != "Storage Town")
+    assert "Storage Town" not in closed.open_maps
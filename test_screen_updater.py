@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pygame
+import pytest
+from screen_updater import ScreenUpdater
+
+@pytest.fixture
+def display_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(pygame.display, "flip", lambda: calls.append("flip"))
+    monkeypatch.setattr(pygame.display, "update", lambda rects: calls.append([pygame.Rect(rect) for rect in rects]))
+    return calls
+
+def make_updater(enabled=True):
+    updater = ScreenUpdater(pygame.Surface((800, 600)), enabled)
+    updater.present()  # 最初のフレームは常に全体
+    return updater
+
+def test_first_frame_is_full(display_calls):
+    updater = ScreenUpdater(pygame.Surface((800, 600)))
+    updater.present()
+    assert display_calls == ["flip"]
+
+def test_partial_update_clips_rects(display_calls):
+    updater = make_updater()
+    updater.mark((790, 590, 40, 40))
+    updater.mark((-10, -10, 5, 5))  # 画面外
+    updater.present()
+    assert display_calls[-1] == [pygame.Rect(790, 590, 10, 10)]
+    assert updater.stats["partial"] == 1
+
+def test_nothing_marked_skips_transfer(display_calls):
+    updater = make_updater()
+    updater.present()
+    assert display_calls == ["flip"]
+    assert updater.stats["skipped"] == 1
+
+def test_large_area_flips(display_calls):
+    updater = make_updater()
+    updater.mark_all([(0, 0, 800, 200), (0, 200, 800, 200)])
+    updater.present()
+    assert display_calls[-1] == "flip"
+
+def test_view_change_forces_full(display_calls):
+    updater = make_updater()
+    updater.set_view(("game", 1, 2))
+    updater.mark((0, 0, 10, 10))
+    updater.present()
+    assert display_calls[-1] == "flip"
+    updater.set_view(("game", 1, 2))
+    updater.mark((0, 0, 10, 10))
+    updater.present()
+    assert display_calls[-1] == [pygame.Rect(0, 0, 10, 10)]
+
+def test_disabled_always_flips(display_calls):
+    updater = make_updater(enabled=False)
+    updater.present()
+    assert display_calls == ["flip", "flip"]
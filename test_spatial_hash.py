@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import random
+from spatial_hash import SpatialHash
+
+def make_entities(count, size, seed):
+    rng = random.Random(seed)
+    return [{"x": rng.randrange(-5, size), "y": rng.randrange(-5, size), "id": i} for i in range(count)]
+
+def test_get_at_returns_first_registered():
+    first, second = {"x": 3, "y": 4}, {"x": 3, "y": 4}
+    index = SpatialHash([first, second])
+    assert index.get_at(3, 4) is first
+    assert index.get_at(4, 3) is None
+
+def test_query_radius_matches_scan():
+    entities = make_entities(300, 60, 1)
+    index = SpatialHash(entities, cell_size=8)
+    rng = random.Random(2)
+    for _ in range(200):
+        x, y, radius = rng.randrange(-5, 60), rng.randrange(-5, 60), rng.randrange(4)
+        expected = [entity for entity in entities if abs(entity["x"] - x) <= radius and abs(entity["y"] - y) <= radius]
+        assert index.query_radius(x, y, radius) == expected
+
+def test_query_rect_matches_scan():
+    entities = make_entities(300, 60, 3)
+    index = SpatialHash(entities, cell_size=8)
+    rng = random.Random(4)
+    for _ in range(200):
+        x, y = rng.randrange(-10, 60), rng.randrange(-10, 60)
+        width, height = rng.randrange(1, 30), rng.randrange(1, 30)
+        expected = [entity for entity in entities if x <= entity["x"] < x + width and y <= entity["y"] < y + height]
+        assert index.query_rect(x, y, width, height) == expected
+
+def test_remove():
+    entities = make_entities(50, 20, 5)
+    index = SpatialHash(entities)
+    removed = entities[10]
+    index.remove(removed)
+    assert removed not in index.query_rect(-5, -5, 30, 30)
+    assert len(index.query_rect(-5, -5, 30, 30)) == 49
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+from text_layout import TextLayout
+
+FONT_SIZES = {"small": 24, "normal": 32, "large": 48}
+
+WORDS = ["x" * 20, "jyk", "AWS", "Lambda", "WWW", "illicit", "EC2", "S3", "DynamoDB", "quick,", "brown.", "fox!",
+         "Cloud", "VAVAVA", "Tokyo", "r", "ff", "...", "Kinesis", "AVAILABILITY", "データベース", "東京リージョン。"]
+
+@pytest.fixture(scope="module")
+def fonts():
+    pygame.font.init()
+    loaded = {name: pygame.font.SysFont(None, size) for name, size in FONT_SIZES.items()}
+    yield loaded
+    pygame.font.quit()
+
+def test_repeated_glyphs_do_not_overflow(fonts):
+    layout = TextLayout(fonts.get)
+    for line in layout.wrap("x" * 20, "normal", 200):
+        assert fonts["normal"].size(line)[0] <= 200
+
+def test_wrapped_lines_fit_max_width(fonts):
+    rng = random.Random(8)
+    layout = TextLayout(fonts.get)
+    for _ in range(600):
+        font_size = rng.choice(list(FONT_SIZES))
+        font = fonts[font_size]
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 12)))
+        # 1文字は必ず入る幅にする（それより狭いと1文字の行でもはみ出す）
+        widest = max(font.size(ch)[0] for ch in text)
+        max_width = rng.randint(widest, 500)
+        lines = layout.wrap(text, font_size, max_width)
+        for line in lines:
+            assert font.size(line)[0] <= max_width, (line, max_width)
+        # 空白以外の文字はすべて、元の順で残っている
+        assert "".join(lines).replace(" ", "") == text.replace(" ", "")
+
+def test_words_are_kept_together_when_they_fit(fonts):
+    layout = TextLayout(fonts.get)
+    lines = layout.wrap("Welcome to the AWS Cloud World", "small", fonts["small"].size("Welcome to the")[0])
+    assert lines[0] == "Welcome to the"
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import tile_grid
+from random_grids import random_tiles
+from tile_grid import TileGrid
+
+def make_rows(width, height, seed):
+    return random_tiles(width, height, seed).to_rows()
+
+def test_rows_round_trip():
+    rows = make_rows(13, 7, 1)
+    grid = TileGrid.from_rows(rows)
+    assert (grid.width, grid.height) == (13, 7)
+    assert grid.to_rows() == rows
+    assert all(list(grid[y]) == rows[y] for y in range(7))
+
+def test_row_and_column_slices():
+    rows = make_rows(11, 9, 2)
+    grid = TileGrid.from_rows(rows)
+    for y in range(9):
+        assert grid.row(y) == bytes(rows[y])
+        assert grid.row(y, 3, 8) == bytes(rows[y][3:8])
+    for x in range(11):
+        assert grid.column(x) == bytes(row[x] for row in rows)
+        assert grid.column(x, 2, 6) == bytes(row[x] for row in rows[2:6])
+
+def test_writes_through_row_view():
+    grid = TileGrid(5, 4, 1)
+    grid[2][3] = 7
+    grid.set(0, 3, 9)
+    assert grid.get(3, 2) == 7
+    assert grid.get(0, 3) == 9
+    assert grid.data[2 * 5 + 3] == 7
+
+def test_fill_region_clips_to_grid():
+    grid = TileGrid(6, 5, 0)
+    grid.fill_region(-2, 3, 4, 10, 4)
+    expected = [[4 if x < 2 and y >= 3 else 0 for x in range(6)] for y in range(5)]
+    assert grid.to_rows() == expected
+
+def test_find_all_matches_scan():
+    rows = make_rows(17, 12, 3)
+    grid = TileGrid.from_rows(rows)
+    for tile_types in ((2,), (0, 5), (1, 3, 4)):
+        expected = [(x, y) for y in range(12) for x in range(17) if rows[y][x] in tile_types]
+        assert grid.find_all(*tile_types) == expected
+        assert sum(grid.count(tile_type) for tile_type in tile_types) == len(expected)
+
+def test_find_all_without_numpy(monkeypatch):
+    rows = make_rows(9, 9, 4)
+    grid = TileGrid.from_rows(rows)
+    expected = grid.find_all(1, 2)
+    monkeypatch.setattr(tile_grid, "numpy", None)
+    assert grid.find_all(1, 2) == expected
+    assert grid.as_array() is None
+
+def test_read_only_view():
+    data = bytes(range(12))
+    grid = TileGrid(4, 3, data=memoryview(data))
+    assert grid.get(1, 2) == 9
+    assert grid.find_all(5) == [(1, 1)]
+    assert grid.copy().data == bytearray(data)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+
+# レイアウト結果キャッシュの上限件数
+LAYOUT_CACHE_MAX_ENTRIES = 256
+
+# グリフ幅を測るときに同じ文字を並べる数（並べた幅を割り、端数まで含めた送り幅を求める）
+GLYPH_SAMPLE_LENGTH = 64
+
+# フォントを初めて使うときに測っておく文字（誤差の上限を見積もるため）
+GLYPH_PROBE_TEXT = "".join(chr(code) for code in range(0x21, 0x7F))
+
+# 行頭に置けない文字（句読点・閉じ括弧・小書き仮名など）
+NO_LINE_START = set("、。，．・：；？！ー～）］｝」』】〉》〕ぁぃぅぇぉっゃゅょゎァィゥェォッャュョヮヵヶ々ゝゞヽヾ,.!?:;)]}")
+
+# 行末に置けない文字（開き括弧）
+NO_LINE_END = set("（［｛「『【〈《〔([{")
+
+# 折り返し単位の種類
+UNIT_WORD = 0
+UNIT_SPACE = 1
+UNIT_NEWLINE = 2
+
+def is_cjk(ch):
+    """1文字ごとに改行できる文字（漢字・仮名・全角記号・ハングル）かどうか"""
+    code = ord(ch)
+    return (0x3000 <= code <= 0x30FF or 0x3400 <= code <= 0x9FFF or
+            0xF900 <= code <= 0xFAFF or 0xFF00 <= code <= 0xFFEF or
+            0xAC00 <= code <= 0xD7AF)
+
+class TextLayout:
+    def __init__(self, get_font):
+        self.get_font = get_font
+        self.glyph_widths = {}
+        self.glyph_errors = {}  # フォントごとの、グリフ幅の合計と実際の幅の差の1文字あたりの上限（測るたびに広げる）
+        self.layouts = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+        
+    def wrap(self, text, font_size, max_width):
+        """テキストをmax_width（ピクセル）で折り返した行のリストを取得"""
+        return [text[start:end] for start, end in self.get_line_spans(text, font_size, max_width)]
+        
+    def get_line_spans(self, text, font_size, max_width):
+        """折り返した各行の (開始位置, 終了位置) を取得（結果はキャッシュ）"""
+        key = (text, font_size, max_width)
+        spans = self.layouts.get(key)
+        if spans is not None:
+            self.layouts.move_to_end(key)
+            self.stats["hits"] += 1
+            return spans
+        
+        self.stats["misses"] += 1
+        spans = self._layout(text, font_size, max_width)
+        self.layouts[key] = spans
+        if len(self.layouts) > LAYOUT_CACHE_MAX_ENTRIES:
+            self.layouts.popitem(last=False)
+        return spans
+        
+    def measure(self, text, font_size):
+        """グリフ幅の合計でテキストの幅を求める"""
+        widths = self._get_glyph_widths(text, font_size)
+        return sum(widths[ch] for ch in text)
+        
+    def clear(self):
+        """フォント変更時などにキャッシュを破棄"""
+        self.glyph_widths.clear()
+        self.glyph_errors.clear()
+        self.layouts.clear()
+        
+    def _get_glyph_widths(self, text, font_size):
+        """フォントごとの文字幅テーブル（未登録の文字だけ測る。初回は GLYPH_PROBE_TEXT も測って誤差の上限を見積もる）"""
+        widths = self.glyph_widths.get(font_size)
+        if widths is None:
+            widths = self.glyph_widths[font_size] = {}
+            self.glyph_errors[font_size] = 0
+            text = GLYPH_PROBE_TEXT + text
+        missing = set(ch for ch in text if ch not in widths)
+        if missing:
+            font = self.get_font(font_size)
+            error = self.glyph_errors[font_size]
+            for ch in missing:
+                # 1文字の送り幅は整数に丸められているので、並べて測った幅を割って端数まで求める
+                widths[ch] = font.size(ch * GLYPH_SAMPLE_LENGTH)[0] / GLYPH_SAMPLE_LENGTH
+                error = max(error, abs(font.size(ch)[0] - widths[ch]))
+            self.glyph_errors[font_size] = error
+        return widths
+        
+    def _fits(self, text, start, end, estimate, font_size, max_width):
+        """text[start:end] が幅に収まるか
+        
+        グリフ幅の合計は、カーニングや文字の端のはみ出しで実際の幅と1文字あたり数pxずれる。
+        フォントごとに測った誤差の上限を使い、明らかに収まる・はみ出す場合以外は実際の幅を測る。
+        """
+        margin = self.glyph_errors[font_size] * (end - start)
+        if estimate - margin > max_width:
+            return False
+        if estimate + margin <= max_width:
+            return True
+        width = self.get_font(font_size).size(text[start:end])[0]
+        # 測った誤差で上限を広げる（以降の見積もりに反映）
+        self.glyph_errors[font_size] = max(self.glyph_errors[font_size], abs(width - estimate) / (end - start))
+        return width <= max_width
+        
+    def _split_units(self, text):
+        """改行位置の候補で区切った (開始, 終了, 種類) の一覧（禁則文字は前後とつなげる）"""
+        units = []
+        i = 0
+        while i < len(text):
+            ch = text[i]
+            if ch == "\n":
+                units.append([i, i + 1, UNIT_NEWLINE])
+                i += 1
+                continue
+            if ch.isspace():
+                units.append([i, i + 1, UNIT_SPACE])
+                i += 1
+                continue
+            if is_cjk(ch):
+                end = i + 1
+            else:
+                # 英単語などは空白かCJK文字までをひとまとまりにする
+                end = i + 1
+                while end < len(text) and not text[end].isspace() and not is_cjk(text[end]):
+                    end += 1
+            
+            previous = units[-1] if units else None
+            if previous and previous[2] == UNIT_WORD and previous[1] == i and (
+                    ch in NO_LINE_START or text[i - 1] in NO_LINE_END):
+                # 行頭禁則・行末禁則の文字は直前の単位とつなげる
+                previous[1] = end
+            else:
+                units.append([i, end, UNIT_WORD])
+            i = end
+        return units
+        
+    def _layout(self, text, font_size, max_width):
+        """貪欲法で行を詰める。1単位で幅を超える場合は文字単位で分割"""
+        widths = self._get_glyph_widths(text, font_size)
+        spans = []
+        line_start = 0
+        line_end = 0  # 行末の空白を含まない終了位置
+        line_width = 0
+        empty = True
+        
+        for start, end, kind in self._split_units(text):
+            if kind == UNIT_NEWLINE:
+                spans.append((line_start, line_end if not empty else line_start))
+                line_start = line_end = end
+                line_width = 0
+                empty = True
+                continue
+            
+            unit_width = sum(widths[ch] for ch in text[start:end])
+            if kind == UNIT_SPACE:
+                # 行頭の空白は詰める
+                if empty:
+                    line_start = line_end = end
+                else:
+                    line_width += unit_width
+                continue
+            
+            if empty:
+                line_start = start
+            elif not self._fits(text, line_start, end, line_width + unit_width, font_size, max_width):
+                spans.append((line_start, line_end))
+                line_start = start
+                line_width = 0
+            
+            if not self._fits(text, start, end, unit_width, font_size, max_width):
+                # 長すぎる単語は文字単位で分割
+                for i in range(start, end):
+                    glyph_width = widths[text[i]]
+                    if i > line_start and not self._fits(text, line_start, i + 1, line_width + glyph_width, font_size, max_width):
+                        spans.append((line_start, i))
+                        line_start = i
+                        line_width = 0
+                    line_width += glyph_width
+            else:
+                line_width += unit_width
+            line_end = end
+            empty = False
+        
+        if not empty:
+            spans.append((line_start, line_end))
+        return tuple(spans)
+
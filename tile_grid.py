@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+try:
+    import numpy
+except ImportError:  # numpyが無くてもタイルグリッド自体は使える
+    numpy = None
+
+class TileGrid:
+    """1タイル1バイトで保持するタイルグリッド（grid[y][x] で従来のリストと同じように読み書きできる。dataが読み取り専用なら読み取りのみ）"""
+        
+    def __init__(self, width, height, fill=0, data=None):
+        self.width = width
+        self.height = height
+        if data is None:
+            data = bytearray([fill]) * (width * height)
+        self.data = data
+        self._view = memoryview(self.data)
+        
+    @classmethod
+    def from_rows(cls, rows):
+        """リストのリスト（従来形式）から作成"""
+        height = len(rows)
+        width = len(rows[0]) if height else 0
+        data = bytearray()
+        for row in rows:
+            data.extend(row)
+        return cls(width, height, data=data)
+        
+    def to_rows(self):
+        """リストのリスト（従来形式）に変換"""
+        return [list(self[y]) for y in range(self.height)]
+        
+    def copy(self):
+        """複製を作成"""
+        return TileGrid(self.width, self.height, data=bytearray(self.data))
+        
+    def __len__(self):
+        return self.height
+        
+    def __getitem__(self, y):
+        """y行目のビュー（書き込みも元のグリッドに反映される）"""
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("tile row out of range")
+        start = y * self.width
+        return self._view[start:start + self.width]
+        
+    def __iter__(self):
+        for y in range(self.height):
+            yield self[y]
+        
+    def __eq__(self, other):
+        if isinstance(other, TileGrid):
+            return self.width == other.width and self.height == other.height and self.data == other.data
+        return NotImplemented
+        
+    def get(self, x, y):
+        """(x, y) のタイルを取得"""
+        return self.data[y * self.width + x]
+        
+    def set(self, x, y, tile_type):
+        """(x, y) のタイルを設定"""
+        self.data[y * self.width + x] = tile_type
+        
+    def row(self, y, start=0, end=None):
+        """y行目の start～end のタイル（bytes）"""
+        offset = y * self.width
+        end = self.width if end is None else end
+        return bytes(self._view[offset + start:offset + end])
+        
+    def column(self, x, start=0, end=None):
+        """x列目の start～end のタイル（bytes）"""
+        end = self.height if end is None else end
+        return bytes(self.data[start * self.width + x:end * self.width:self.width])
+        
+    def fill(self, tile_type):
+        """全体を同じタイルで埋める"""
+        self._view[:] = bytes([tile_type]) * len(self.data)
+        
+    def fill_region(self, x, y, width, height, tile_type):
+        """矩形範囲を同じタイルで埋める（グリッド外の部分は無視）"""
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + width), min(self.height, y + height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        line = bytes([tile_type]) * (x1 - x0)
+        for row_y in range(y0, y1):
+            start = row_y * self.width + x0
+            self._view[start:start + len(line)] = line
+        
+    def fill_border(self, x, y, width, height, tile_type):
+        """矩形の外周1マスを同じタイルで埋める"""
+        self.fill_region(x, y, width, 1, tile_type)
+        self.fill_region(x, y + height - 1, width, 1, tile_type)
+        self.fill_region(x, y, 1, height, tile_type)
+        self.fill_region(x + width - 1, y, 1, height, tile_type)
+        
+    def _bytes(self):
+        """find/countが使えるデータ（mmapなどのmemoryviewならbytesに変換）"""
+        return self.data if isinstance(self.data, (bytes, bytearray)) else bytes(self.data)
+        
+    def count(self, tile_type):
+        """指定タイルの数"""
+        return self._bytes().count(bytes([tile_type]))
+        
+    def find_all(self, *tile_types):
+        """指定タイル（複数可）の座標 (x, y) の一覧を行優先の順で取得"""
+        if numpy is not None:
+            flat = numpy.frombuffer(self.data, dtype=numpy.uint8)
+            indices = numpy.flatnonzero(numpy.isin(flat, tile_types)).tolist()
+            return [(index % self.width, index // self.width) for index in indices]
+        data = self._bytes()
+        indices = []
+        for tile_type in tile_types:
+            needle = bytes([tile_type])
+            index = data.find(needle)
+            while index != -1:
+                indices.append(index)
+                index = data.find(needle, index + 1)
+        if len(tile_types) > 1:
+            indices.sort()
+        return [(index % self.width, index // self.width) for index in indices]
+        
+    def as_array(self):
+        """データを共有するNumPy配列（shape: (height, width)）。numpyが無ければNone"""
+        if numpy is None:
+            return None
+        return numpy.frombuffer(self.data, dtype=numpy.uint8).reshape(self.height, self.width)